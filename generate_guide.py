@@ -1710,9 +1710,19 @@ document.addEventListener('DOMContentLoaded', function() {{
 
 def main():
 
+    # --minify: collapse whitespace (this template is double-spaced) and strip comments
+
+    minify = '--minify' in sys.argv
+
+    if minify:
+
+        sys.argv.remove('--minify')
+
+    
+
     if len(sys.argv) < 3:
 
-        print("Usage: python generate_guide.py <input.json> <output.html>")
+        print("Usage: python generate_guide.py <input.json> <output.html> [--minify]")
 
         print("\nExample:")
 
@@ -1750,6 +1760,20 @@ def main():
 
     
 
+    if minify:
+
+        from generators.minify_html import minify_html
+
+        bytes_before = len(html.encode('utf-8'))
+
+        html = minify_html(html)
+
+        bytes_after = len(html.encode('utf-8'))
+
+        print(f"Minified: {bytes_before:,} -> {bytes_after:,} bytes (saved {bytes_before - bytes_after:,})")
+
+    
+
     print(f"Writing output to: {output_file}")
 
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,9 @@
+"""
+Guide generators: rendering, batch builds and site tooling.
+
+The modules import each other relatively, so they always resolve to this
+package rather than to same-named modules elsewhere on sys.path (the repo
+root has its own guide_generator.py). Each one still runs as a script
+(python generators/build_guides.py ...): when it has no package it puts the
+repo root on sys.path and imports its siblings as generators.*.
+"""
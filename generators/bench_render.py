@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Placeholder Substitution Benchmark
+Times the three ways of filling {{NAME}} placeholders on the real guide template:
+
+    loop      one str.replace() per variable (a full copy of the page each time)
+    regex     substitute_placeholders(): one PLACEHOLDER_PATTERN pass + dict lookup
+    compiled  CompiledTemplate.render() on the pre-parsed template
+
+Also compares the root guide_generator.replace_variables() with the str.replace()
+loop it used to run.
+
+Usage:
+    python generators/bench_render.py --race race_data/unbound_gravel_200.json --repeat 200
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import timeit
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import guide_generator
+
+ROOT_GENERATOR_PATH = guide_generator.REPO_ROOT / 'guide_generator.py'
+ROOT_GUIDE_DATA_PATH = guide_generator.REPO_ROOT / 'guide_data_complete.json'
+
+
+def replace_loop(text, values):
+    """The original approach: one str.replace() per variable"""
+    for name, value in values.items():
+        text = text.replace(f'{{{{{name}}}}}', str(value))
+    return text
+
+
+def capture_context(race_path, tier_name, ability_level):
+    """
+    Run generate_guide() once and return the slot values it rendered with,
+    with every lazy fragment evaluated to a string.
+    """
+    captured = {}
+
+    def capture(template, context, *args, **kwargs):
+        captured.update(context)
+        return ''
+
+    # generate_guide() picks its own template variant (font URLs depend on
+    # the output path), so intercept every CompiledTemplate
+    render = guide_generator.CompiledTemplate.render
+    guide_generator.CompiledTemplate.render = capture
+    try:
+        race = guide_generator.load_race_data(race_path)
+        guide_generator.generate_guide(race, tier_name, ability_level, os.devnull, verbose=False)
+    finally:
+        guide_generator.CompiledTemplate.render = render
+    return {name: str(value() if callable(value) else value) for name, value in captured.items()}
+
+
+def load_root_generator():
+    """Import the root guide_generator.py (it shares a module name with this package)"""
+    spec = importlib.util.spec_from_file_location('root_guide_generator', ROOT_GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def best_of(func, repeat):
+    """Best per-call time in milliseconds over `repeat` runs"""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def print_row(label, ms, baseline_ms):
+    print(f"  {label:<11} {ms:8.3f} ms  {baseline_ms / ms:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark placeholder substitution on the real template')
+    parser.add_argument('--race', default=str(guide_generator.REPO_ROOT / 'race_data' / 'unbound_gravel_200.json'),
+                        help='Race JSON used to build the substitution values')
+    parser.add_argument('--tier', default='FINISHER', help='Tier name (default: FINISHER)')
+    parser.add_argument('--ability', default='Intermediate', help='Ability level (default: Intermediate)')
+    parser.add_argument('--repeat', type=int, default=100, help='Timed runs per method (default: 100)')
+    args = parser.parse_args()
+
+    source = guide_generator.load_template()
+    template = guide_generator.load_compiled_template()
+    values = capture_context(args.race, args.tier, args.ability)
+
+    # All three must produce the same page before their timings mean anything
+    expected = template.render(values)
+    unknown = []
+    assert replace_loop(source, values) == expected
+    assert guide_generator.substitute_placeholders(source, values, unknown) == expected
+
+    print(f"Template: {guide_generator.TEMPLATE_PATH.name} ({len(source):,} chars, "
+          f"{len(template.slot_names)} slots), {len(values)} values, {len(set(unknown))} unresolved")
+    loop_ms = best_of(lambda: replace_loop(source, values), args.repeat)
+    print_row('loop', loop_ms, loop_ms)
+    print_row('regex', best_of(lambda: guide_generator.substitute_placeholders(source, values), args.repeat), loop_ms)
+    print_row('compiled', best_of(lambda: template.render(values), args.repeat), loop_ms)
+
+    if ROOT_GENERATOR_PATH.exists() and ROOT_GUIDE_DATA_PATH.exists():
+        root = load_root_generator()
+        with open(ROOT_GUIDE_DATA_PATH, 'r', encoding='utf-8') as f:
+            guide_data = json.load(f)
+
+        # The loop replaced every mapped name; unresolved ones keep their placeholder
+        root_values = {name: f'{{{{{name}}}}}' if root.PLACEHOLDER_VALUE_PATTERN.fullmatch(str(value)) else str(value)
+                       for name, value in root.build_variable_map(guide_data).items()}
+        unresolved = []
+        rendered = root.replace_variables(source, guide_data, unresolved)
+        assert replace_loop(source, root_values) == rendered
+
+        print(f"\nRoot replace_variables(): {len(root_values)} variables, {len(set(unresolved))} unresolved")
+        root_loop_ms = best_of(lambda: replace_loop(source, root_values), args.repeat)
+        print_row('loop', root_loop_ms, root_loop_ms)
+        print_row('regex', best_of(lambda: guide_generator.substitute_placeholders(source, root_values), args.repeat),
+                  root_loop_ms)
+        print_row('end-to-end', best_of(lambda: root.replace_variables(source, guide_data), args.repeat), root_loop_ms)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Batch Guide Builder
+Renders every race × plan variant into <output-dir>/<race>-<variant>/index.html.
+
+Usage:
+    python generators/build_guides.py --races race_data/ --output-dir athletes/ --jobs 8
+
+Each race is one task, so all of its variants render in the same worker and
+share the race-level fragment cache. Workers are created once and reused for
+the whole run.
+
+A build manifest (<output-dir>/.build-manifest.json) records a hash of every
+input that went into each page. Pages whose input hash is unchanged are
+skipped; pass --force for a full rebuild.
+
+By default the brand CSS is written once to <output-dir>/assets/guide.<hash>.css
+and linked from every page; --css inline embeds it in each page instead, with
+the fonts linked from <output-dir>/assets/fonts/ (or embedded with --embed-fonts).
+With --critical-css, pages inline only the rules the header, nav and the
+opening of the first section need and load the shared stylesheet asynchronously. With --prune-css,
+each page type (combination of conditional template blocks) gets its own
+stylesheet without the rules it can never use.
+
+Every build also refreshes the catalog (<output-dir>/guides.json and
+<output-dir>/index.html, see catalog.py) from the manifest; --search also
+updates the sharded search index the catalog page queries (see
+search_index.py), re-reading only pages whose output hash changed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import (
+    catalog,
+    check_links,
+    compress_site,
+    guide_generator,
+    page_weight,
+    scan_leftovers,
+    search_index,
+    service_worker,
+    subset_fonts,
+)
+
+# Variant slug -> generate_guide() parameters
+DEFAULT_VARIANTS = {
+    'compete-12wk': {'tier_name': 'COMPETE', 'ability_level': 'Intermediate', 'plan_weeks': 12},
+    'finisher-12wk': {'tier_name': 'FINISHER', 'ability_level': 'Intermediate', 'plan_weeks': 12},
+    'finisher-8wk': {'tier_name': 'FINISHER', 'ability_level': 'Intermediate', 'plan_weeks': 8},
+    'masters-12wk': {'tier_name': 'FINISHER', 'ability_level': 'Masters', 'plan_weeks': 12},
+    'save-my-race-6wk': {'tier_name': 'FINISHER', 'ability_level': 'Save My Race', 'plan_weeks': 6},
+    'time-crunched-12wk': {'tier_name': 'AYAHUASCA', 'ability_level': 'Intermediate', 'plan_weeks': 12},
+    'time-crunched-8wk': {'tier_name': 'AYAHUASCA', 'ability_level': 'Intermediate', 'plan_weeks': 8},
+}
+
+
+MANIFEST_NAME = '.build-manifest.json'
+
+# Shared build assets (stylesheet) live here, relative to the output dir
+ASSETS_DIR_NAME = 'assets'
+
+
+def load_variant_matrix(matrix_path=None):
+    """Load the variant matrix from JSON, or return the default 7 variants"""
+    if not matrix_path:
+        return dict(DEFAULT_VARIANTS)
+    with open(matrix_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def discover_races(race_dir):
+    """Return sorted (slug, path) pairs for every race JSON in race_dir"""
+    races = []
+    for path in sorted(Path(race_dir).glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Plan templates and other JSON files share the directory; skip them
+        if not isinstance(data, dict) or not ('race_metadata' in data or 'name' in data):
+            print(f"  → Skipped {path.name} (not race data)")
+            continue
+        races.append((path.stem.replace('_', '-').lower(), str(path)))
+    return races
+
+
+def shared_input_hash(fonts_css=None):
+    """
+    Hash of the inputs every page shares: brand CSS, fonts.css, the font
+    files it references (fonts_css, default: brand/fonts/fonts.css), the
+    generator version and the reference inputs (template, generator source,
+    reference athlete and races) critical and pruned CSS are derived from
+    """
+    paths = guide_generator.reference_input_paths() + guide_generator.BRAND_CSS_PATHS + guide_generator.font_paths(fonts_css)
+    digest = hashlib.sha256(guide_generator.GENERATOR_VERSION.encode('utf-8'))
+    for path in paths:
+        digest.update(b'\0')
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def page_input_hash(shared_hash, race_bytes, params):
+    """Hash of everything that goes into one page"""
+    digest = hashlib.sha256(shared_hash.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(race_bytes)
+    digest.update(b'\0')
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir):
+    """Load the build manifest, or an empty one if missing/unreadable"""
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'generator_version': guide_generator.GENERATOR_VERSION, 'pages': {}}
+    manifest.setdefault('pages', {})
+    return manifest
+
+
+def save_manifest(output_dir, manifest):
+    """Write the build manifest atomically"""
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, manifest_path)
+
+
+def plan_tasks(races, variants, output_dir, manifest, force=False, options=None):
+    """
+    Work out which pages need rendering.
+
+    Returns (tasks, skipped) where tasks are build_race() arguments holding
+    only the variants whose input hash changed (or whose output is missing)
+    and skipped is the number of up-to-date pages.
+    """
+    options = options or {}
+    shared_hash = shared_input_hash(options.get('fonts_css'))
+    previous = manifest.get('pages', {})
+    tasks = []
+    skipped = 0
+    for slug, race_path in races:
+        race_bytes = Path(race_path).read_bytes()
+        stale = {}
+        hashes = {}
+        for variant, params in variants.items():
+            key = f"{slug}-{variant}/index.html"
+            input_hash = page_input_hash(shared_hash, race_bytes, dict(params, css=options.get('css', 'inline'), minify=options.get('minify', False),
+                                                      fonts=options.get('fonts_hash'),
+                                                      critical_css=options.get('critical_css', False),
+                                                      prune_css=options.get('prune_css', False),
+                                                      split_sections=options.get('split_sections', False),
+                                                      offline=options.get('offline', False),
+                                                      embed_fonts=options.get('embed_fonts', False)))
+            entry = previous.get(key)
+            if (not force and entry and entry.get('input_hash') == input_hash
+                    and (Path(output_dir) / key).exists()):
+                skipped += 1
+                continue
+            stale[variant] = params
+            hashes[variant] = input_hash
+        if stale:
+            tasks.append((slug, race_path, stale, hashes, str(output_dir), options))
+    return tasks, skipped
+
+
+def build_race(task):
+    """
+    Render every variant of one race. Runs inside a pool worker.
+
+    Returns a dict with the pages written and the worker's fragment cache
+    counters for this task.
+    """
+    slug, race_path, variants, input_hashes, output_dir, options = task
+    race_data = guide_generator.load_race_data(race_path)
+    cache_before = guide_generator.FRAGMENT_CACHE.stats()
+
+    pages = []
+    for variant, params in variants.items():
+        page_dir = Path(output_dir) / f"{slug}-{variant}"
+        page_dir.mkdir(parents=True, exist_ok=True)
+        output_path = page_dir / 'index.html'
+        css_href = None
+        font_href = None
+        if options.get('css_path'):
+            css_href = Path(os.path.relpath(options['css_path'], page_dir)).as_posix()
+        elif options.get('font_dir'):
+            font_href = Path(os.path.relpath(options['font_dir'], page_dir)).as_posix()
+        report = {}
+        guide_generator.generate_guide(
+            race_data=race_data,
+            tier_name=params['tier_name'],
+            ability_level=params['ability_level'],
+            output_path=str(output_path),
+            plan_weeks=params.get('plan_weeks'),
+            report=report,
+            verbose=False,
+            stream=options.get('stream', False),
+            css_href=css_href,
+            minify=options.get('minify', False),
+            fonts_css=options.get('fonts_css'),
+            critical_css=options.get('critical_css', False),
+            prune_css=options.get('prune_css', False),
+            split_sections=options.get('split_sections', False),
+            font_href=font_href,
+            embed_fonts=options.get('embed_fonts', False),
+        )
+        content = output_path.read_bytes()
+        if options.get('offline'):
+            sw_href = Path(os.path.relpath(Path(output_dir) / service_worker.SW_NAME, page_dir)).as_posix()
+            registered = service_worker.add_registration(content.decode('utf-8'), sw_href).encode('utf-8')
+            if registered != content:
+                content = registered
+                output_path.write_bytes(content)
+        pages.append({
+            'path': str(output_path),
+            'key': f"{slug}-{variant}/index.html",
+            'race': slug,
+            'variant': variant,
+            'name': race_data.name or slug,
+            'weeks': params.get('plan_weeks'),
+            'input_hash': input_hashes[variant],
+            'output_hash': hashlib.sha256(content).hexdigest(),
+            'bytes': len(content),
+            'unknown_placeholders': report['unknown_placeholders'],
+            'bytes_saved': report['minify']['bytes_before'] - report['minify']['bytes_after'] if 'minify' in report else 0,
+            'fragment_bytes': report.get('split_sections', {}).get('fragment_bytes', 0),
+            'stylesheet': report.get('stylesheet'),
+            'prune_css_uncovered': report.get('prune_css_uncovered', []),
+        })
+
+    cache_after = guide_generator.FRAGMENT_CACHE.stats()
+    return {
+        'race': slug,
+        'pages': pages,
+        'cache_hits': cache_after['hits'] - cache_before['hits'],
+        'cache_misses': cache_after['misses'] - cache_before['misses'],
+    }
+
+
+def run_batch(races, variants, output_dir, jobs=None, force=False, stream=False, css='link', minify=False,
+              fonts_css=None, critical_css=False, prune_css=False, split_sections=False, offline=False,
+              embed_fonts=False):
+    """
+    Render the race × variant matrix, skipping pages whose inputs are unchanged.
+
+    Args:
+        races: List of (slug, race_json_path) pairs
+        variants: Dict mapping variant slug to generate_guide() parameters
+        output_dir: Root directory for <race>-<variant>/index.html pages
+        jobs: Worker processes (defaults to CPU count; 1 renders in-process)
+        force: Re-render every page regardless of the build manifest
+        stream: Stream each page to disk instead of building it in memory
+        css: 'link' to share one assets/guide.<hash>.css across pages,
+            'inline' to embed the brand CSS in every page
+        minify: Minify every page (see minify_html.py)
+        fonts_css: @font-face stylesheet to build against instead of
+            brand/fonts/fonts.css (see subset_fonts.py)
+        critical_css: Inline only the above-the-fold CSS and load the
+            shared stylesheet asynchronously (css='link' only)
+        prune_css: Drop the CSS rules each page type can never use; linked
+            pages share one pruned stylesheet per page type
+        split_sections: Write each page as a shell with the first section
+            plus sections/<id>.html fragments (see split_sections.py)
+        offline: Register the <output_dir>/sw.js service worker from every
+            page (see service_worker.py; main() writes the worker once the
+            site is complete)
+        embed_fonts: With css='inline', embed the regular latin fonts in
+            every page as data: URIs instead of linking the shared
+            assets/fonts/ copies
+
+    Returns:
+        Summary dict with page/byte counts, timings and cache counters
+    """
+    jobs = jobs or os.cpu_count() or 1
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    options = {'stream': stream, 'css': css, 'minify': minify, 'prune_css': prune_css,
+               'split_sections': split_sections, 'offline': offline, 'embed_fonts': embed_fonts}
+    if fonts_css:
+        options['fonts_css'] = str(fonts_css)
+        options['fonts_hash'] = hashlib.sha256(Path(fonts_css).read_bytes()).hexdigest()
+    if css == 'link':
+        css_path = guide_generator.write_stylesheet(Path(output_dir) / ASSETS_DIR_NAME, fonts_css)
+        options['css_path'] = str(css_path)
+        css_bytes = css_path.read_bytes()
+        manifest.setdefault('assets', {})[css_path.relative_to(output_dir).as_posix()] = {
+            'output_hash': hashlib.sha256(css_bytes).hexdigest(),
+            'bytes': len(css_bytes),
+        }
+        if critical_css:
+            # Computed once here; workers read it back from the on-disk cache
+            options['critical_css'] = True
+            guide_generator.critical_css(fonts_css)
+    elif not embed_fonts:
+        # Inline pages share one copy of the fonts
+        options['font_dir'] = str(guide_generator.write_fonts(Path(output_dir) / ASSETS_DIR_NAME, fonts_css))
+    tasks, skipped = plan_tasks(races, variants, output_dir, manifest, force, options)
+
+    start = time.perf_counter()
+    if jobs == 1 or len(tasks) <= 1:
+        results = [build_race(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(build_race, tasks))
+    elapsed = time.perf_counter() - start
+
+    pages = [page for result in results for page in result['pages']]
+    for page in pages:
+        manifest['pages'][page['key']] = {
+            'race': page['race'],
+            'variant': page['variant'],
+            'name': page['name'],
+            'weeks': page['weeks'],
+            'input_hash': page['input_hash'],
+            'output_hash': page['output_hash'],
+            'bytes': page['bytes'],
+            'bytes_saved': page['bytes_saved'],
+        }
+        if page['fragment_bytes']:
+            manifest['pages'][page['key']]['fragment_bytes'] = page['fragment_bytes']
+    for stylesheet in sorted({page['stylesheet'] for page in pages if page['stylesheet']}):
+        css_bytes = Path(stylesheet).read_bytes()
+        manifest.setdefault('assets', {})[Path(stylesheet).relative_to(Path(output_dir).resolve()).as_posix()] = {
+            'output_hash': hashlib.sha256(css_bytes).hexdigest(),
+            'bytes': len(css_bytes),
+        }
+    manifest['generator_version'] = guide_generator.GENERATOR_VERSION
+    save_manifest(output_dir, manifest)
+
+    catalog_summary = catalog.write_catalog(output_dir, manifest['pages'], offline or None)
+
+    total_bytes = sum(page['bytes'] for page in pages)
+    hits = sum(result['cache_hits'] for result in results)
+    misses = sum(result['cache_misses'] for result in results)
+    return {
+        'races': len(results),
+        'pages': len(pages),
+        'skipped': skipped,
+        'bytes': total_bytes,
+        'bytes_saved': sum(page['bytes_saved'] for page in pages),
+        'fragment_bytes': sum(page['fragment_bytes'] for page in pages),
+        'seconds': elapsed,
+        'jobs': jobs,
+        'cache_hits': hits,
+        'cache_misses': misses,
+        'unknown_placeholders': {page['key']: page['unknown_placeholders']
+                                 for page in pages if page['unknown_placeholders']},
+        'prune_css_uncovered': {page['key']: page['prune_css_uncovered']
+                                for page in pages if page['prune_css_uncovered']},
+        'results': results,
+        'catalog': catalog_summary,
+    }
+
+
+def print_summary(summary):
+    """Print the final throughput summary"""
+    seconds = summary['seconds'] or 1e-9
+    megabytes = summary['bytes'] / (1024 * 1024)
+    lookups = summary['cache_hits'] + summary['cache_misses']
+    hit_rate = summary['cache_hits'] / lookups if lookups else 0.0
+    print(f"\n✓ Built {summary['pages']} pages for {summary['races']} races with {summary['jobs']} worker(s)")
+    print(f"  → {summary['skipped']} unchanged pages skipped")
+    print(f"  → {megabytes:.1f} MB in {summary['seconds']:.2f}s")
+    if summary['bytes_saved']:
+        saved = summary['bytes_saved']
+        print(f"  → Minified: saved {saved / (1024 * 1024):.1f} MB "
+              f"({saved / (summary['bytes'] + summary['fragment_bytes'] + saved):.1%}, "
+              f"{saved // max(summary['pages'], 1):,} bytes/page)")
+    if summary['fragment_bytes']:
+        deferred = summary['fragment_bytes']
+        print(f"  → Split sections: {deferred / (1024 * 1024):.1f} MB moved out of the shell pages "
+              f"({deferred / (summary['bytes'] + deferred):.1%}, loaded on demand)")
+    print(f"  → {summary['pages'] / seconds:.1f} pages/s, {megabytes / seconds:.1f} MB/s")
+    print(f"  → Fragment cache hit rate: {hit_rate:.0%} ({summary['cache_hits']}/{lookups})")
+    catalog.print_summary(summary['catalog'])
+    for key, names in sorted(summary['unknown_placeholders'].items()):
+        print(f"  ⚠ {key}: unknown placeholders {', '.join(names)}")
+    for key, names in sorted(summary['prune_css_uncovered'].items()):
+        print(f"  ⚠ {key}: pruned CSS does not cover {', '.join(names)}; kept the full stylesheet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render every race × plan variant guide')
+    parser.add_argument('--races', required=True, help='Directory of race JSON files')
+    parser.add_argument('--variants', help='JSON file mapping variant slug to tier_name/ability_level/plan_weeks')
+    parser.add_argument('--output-dir', default='athletes', help='Output root (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render every page, ignoring the build manifest')
+    parser.add_argument('--stream', action='store_true', help='Stream pages straight to disk (lower peak memory per worker)')
+    parser.add_argument('--minify', action='store_true', help='Minify pages (collapse whitespace, strip marker comments, minify CSS/JS)')
+    parser.add_argument('--compress', action='store_true',
+                        help='Write precompressed .gz/.br siblings after the build (see compress_site.py)')
+    parser.add_argument('--subset-fonts', action='store_true',
+                        help='Subset the brand fonts to the glyphs the pages use (see subset_fonts.py; needs fontTools)')
+    parser.add_argument('--search', action='store_true',
+                        help='Update the sharded client-side search index (see search_index.py)')
+    parser.add_argument('--check-leftovers', action='store_true',
+                        help='Fail the build on unresolved placeholders, stray START/END markers or empty sections '
+                             '(see scan_leftovers.py)')
+    parser.add_argument('--check-links', action='store_true',
+                        help='Fail the build on broken internal links or anchors (see check_links.py)')
+    parser.add_argument('--check-weight', nargs='?', const='', metavar='BUDGETS',
+                        help='Report bytes per section, CSS, JS and infographics and fail the build on pages over '
+                             'budget (default budgets: generators/page_budgets.json; see page_weight.py)')
+    parser.add_argument('--css', choices=('link', 'inline'), default='link',
+                        help='link: one shared assets/guide.<hash>.css (default); inline: CSS embedded in every page')
+    parser.add_argument('--embed-fonts', action='store_true',
+                        help='With --css inline, embed the regular latin fonts in every page (single-file pages)')
+    parser.add_argument('--critical-css', action='store_true',
+                        help='Inline the above-the-fold CSS and load the shared stylesheet asynchronously')
+    parser.add_argument('--prune-css', action='store_true',
+                        help='Emit per-page-type CSS without rules for blocks the page type never renders')
+    parser.add_argument('--offline', action='store_true',
+                        help='Write a service worker that caches guides for offline use (see service_worker.py)')
+    parser.add_argument('--split-sections', action='store_true',
+                        help='Write a shell page with the first section; load the others on demand from sections/')
+    args = parser.parse_args()
+    if args.critical_css and args.css != 'link':
+        parser.error('--critical-css needs --css link')
+    if args.embed_fonts and args.css != 'inline':
+        parser.error('--embed-fonts needs --css inline')
+
+    variants = load_variant_matrix(args.variants)
+    races = discover_races(args.races)
+    if not races:
+        print(f"No race JSON files found in {args.races}")
+        return 1
+
+    build_args = (races, variants, args.output_dir, args.jobs, args.force, args.stream, args.css, args.minify)
+    generated_fonts_css = Path(args.output_dir) / ASSETS_DIR_NAME / 'fonts' / subset_fonts.GENERATED_CSS_NAME
+    fonts_css = generated_fonts_css if args.subset_fonts and generated_fonts_css.exists() else None
+    build_options = {'critical_css': args.critical_css, 'prune_css': args.prune_css,
+                     'split_sections': args.split_sections, 'offline': args.offline, 'embed_fonts': args.embed_fonts}
+    summary = run_batch(*build_args, fonts_css=fonts_css, **build_options)
+    if args.subset_fonts:
+        try:
+            fonts_summary = subset_fonts.subset_site(args.output_dir, args.jobs)
+        except RuntimeError as e:
+            print(f"  ⚠ Font subsetting skipped: {e}")
+        else:
+            subset_fonts.print_summary(fonts_summary)
+            if fonts_summary['changed']:
+                # Pages link the old subsets; render them again against the new fonts.css
+                print("  → Font subsets changed; re-rendering pages")
+                summary = run_batch(*build_args, fonts_css=fonts_summary['fonts_css'], **build_options)
+    print_summary(summary)
+    if args.search:
+        manifest = load_manifest(args.output_dir)
+        search_index.print_summary(search_index.build_index(args.output_dir, manifest['pages'], args.jobs))
+        # Adds the search box to the catalog page on the first indexed build
+        catalog.write_catalog(args.output_dir, manifest['pages'], args.offline or None)
+    if args.offline:
+        # Last, so the precache manifest covers the catalog and search files
+        service_worker.print_summary(service_worker.write_service_worker(args.output_dir, load_manifest(args.output_dir)))
+    if args.compress:
+        compress_summary = compress_site.compress_tree(args.output_dir, args.jobs)
+        compress_site.print_summary(compress_summary, per_file=False)
+    if args.check_leftovers:
+        leftovers = scan_leftovers.scan_site(args.output_dir, variants, args.jobs)
+        scan_leftovers.print_summary(leftovers)
+        if leftovers['pages']:
+            return 1
+    if args.check_links:
+        links = check_links.check_site(args.output_dir, args.jobs)
+        check_links.print_summary(links)
+        if links['broken']:
+            return 1
+    if args.check_weight is not None:
+        try:
+            budgets = page_weight.load_budgets(args.check_weight or None)
+        except (OSError, ValueError) as e:
+            print(f"Could not load budgets: {e}")
+            return 1
+        weight = page_weight.weigh_site(args.output_dir, variants, budgets, args.jobs)
+        page_weight.print_summary(weight)
+        if weight['over_budget']:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Guide Catalog
+Writes <site>/guides.json and a catalog page (<site>/index.html) listing
+every built guide.
+
+guides.json stores each race name once and one compact row per guide:
+
+    {"fields": ["race", "variant", "weeks", "url", "bytes", "hash"],
+     "races": {"unbound-gravel-200": "Unbound Gravel 200", ...},
+     "guides": [["unbound-gravel-200", "finisher-12wk", 12, "unbound-gravel-200-finisher-12wk/", 74211, "1a2b3c4d5e6f"], ...]}
+
+The catalog page is a small static shell that fetches guides.json once
+(versioned by a content-hash query string, so it can be cached) and filters
+and paginates on the client.
+
+Usage:
+    python generators/catalog.py athletes/
+
+Guides are read from the build manifest (see build_guides.py) when there is
+one; otherwise the site is scanned for <race>-<variant>/index.html pages.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import guide_generator
+
+CATALOG_TEMPLATE_PATH = guide_generator.REPO_ROOT / 'templates' / 'catalog_template.html'
+GUIDES_JSON_NAME = 'guides.json'
+CATALOG_PAGE_NAME = 'index.html'
+
+GUIDE_FIELDS = ['race', 'variant', 'weeks', 'url', 'bytes', 'hash']
+
+# Written by search_index.py; the catalog shows a search box once it exists
+SEARCH_SCRIPT_PATH = 'search/search.js'
+SEARCH_PANEL = '''
+    <section class="catalog-search">
+      <form data-guide-search="catalog-search-results" role="search" onsubmit="return false">
+        <label>Search inside guides <input type="search" placeholder="e.g. heat adaptation, flint, altitude" autocomplete="off"></label>
+      </form>
+      <ol id="catalog-search-results"></ol>
+      <script src="{src}" defer></script>
+    </section>
+'''
+
+# Written by service_worker.py; every page then registers it
+SERVICE_WORKER_NAME = 'sw.js'
+SERVICE_WORKER_SCRIPT = "<script>if ('serviceWorker' in navigator) navigator.serviceWorker.register('{src}');</script>\n"
+
+WEEKS_PATTERN = re.compile(r'(\d+)wk$')
+
+# Guide headings read '<race> – <plan> (<n> weeks)'
+HEADING_PATTERN = re.compile(r'<h1[^>]*>\s*(.*?)\s*</h1>', re.IGNORECASE | re.DOTALL)
+HEADING_WEEKS_PATTERN = re.compile(r'\((\d+) weeks\)')
+
+
+def variant_weeks(variant):
+    """Plan length encoded in a variant slug ('finisher-8wk' -> 8), or None"""
+    match = WEEKS_PATTERN.search(variant or '')
+    return int(match.group(1)) if match else None
+
+
+def split_page_dir(name, variants):
+    """Split '<race>-<variant>' into (race, variant); unknown suffixes are a race with no variant"""
+    for variant in sorted(variants, key=len, reverse=True):
+        if name.endswith('-' + variant) and len(name) > len(variant) + 1:
+            return name[:-len(variant) - 1], variant
+    return name, ''
+
+
+def scan_pages(site_dir, variants):
+    """
+    Build manifest-style page entries by reading every <dir>/index.html
+    under site_dir. Used when the site has no build manifest.
+    """
+    pages = {}
+    for page_path in sorted(Path(site_dir).glob('*/index.html')):
+        content = page_path.read_bytes()
+        race, variant = split_page_dir(page_path.parent.name, variants)
+        heading = HEADING_PATTERN.search(content.decode('utf-8', 'replace'))
+        heading = html.unescape(re.sub(r'<[^>]+>', '', heading.group(1))) if heading else ''
+        weeks = HEADING_WEEKS_PATTERN.search(heading)
+        pages[f"{page_path.parent.name}/index.html"] = {
+            'race': race,
+            'variant': variant,
+            'name': heading.split(' – ')[0].strip() or race,
+            'weeks': variant_weeks(variant) or (int(weeks.group(1)) if weeks else None),
+            'output_hash': hashlib.sha256(content).hexdigest(),
+            'bytes': len(content),
+        }
+    return pages
+
+
+def page_url(key):
+    """'race-variant/index.html' -> 'race-variant/' (servers resolve the index page)"""
+    return key[:-len(CATALOG_PAGE_NAME)] if key.endswith('/' + CATALOG_PAGE_NAME) else key
+
+
+def catalog_data(pages):
+    """The guides.json document for manifest page entries"""
+    races = {}
+    guides = []
+    for key, entry in sorted(pages.items(), key=lambda item: (item[1]['race'], item[1].get('variant', ''))):
+        race = entry['race']
+        races.setdefault(race, entry.get('name') or race)
+        weeks = entry.get('weeks') or variant_weeks(entry.get('variant'))
+        url = page_url(key)
+        guides.append([race, entry.get('variant', ''), weeks or 0, url, entry['bytes'], entry['output_hash'][:12]])
+    return {'fields': GUIDE_FIELDS, 'races': races, 'guides': guides}
+
+
+def _write_if_changed(path, text):
+    """Write text atomically unless path already holds it; return True if written"""
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_catalog(site_dir, pages, service_worker=None):
+    """
+    Write <site_dir>/guides.json and the catalog page for the given
+    manifest page entries. The page includes a search box when the site
+    has a search index (see search_index.py), and registers the offline
+    service worker when the site has one (see service_worker.py; pass
+    service_worker=True before it is first written). Unchanged files are
+    left alone.
+
+    Returns a summary dict with guide/race counts and the guides.json size.
+    """
+    data = catalog_data(pages)
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n'
+    json_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+    site_dir = Path(site_dir)
+    if service_worker is None:
+        service_worker = (site_dir / SERVICE_WORKER_NAME).exists()
+    search_panel = ''
+    search_script = site_dir / SEARCH_SCRIPT_PATH
+    if search_script.exists():
+        script_hash = hashlib.sha256(search_script.read_bytes()).hexdigest()[:12]
+        search_panel = SEARCH_PANEL.format(src=f"{SEARCH_SCRIPT_PATH}?v={script_hash}")
+
+    with open(CATALOG_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    page = guide_generator.substitute_placeholders(template, {
+        'GUIDE_COUNT': f"{len(data['guides']):,}",
+        'RACE_COUNT': f"{len(data['races']):,}",
+        'GUIDES_JSON_URL': f"{GUIDES_JSON_NAME}?v={json_hash}",
+        'SEARCH_PANEL': search_panel,
+        'SERVICE_WORKER': SERVICE_WORKER_SCRIPT.format(src=SERVICE_WORKER_NAME) if service_worker else '',
+    })
+
+    site_dir.mkdir(parents=True, exist_ok=True)
+    written = _write_if_changed(site_dir / GUIDES_JSON_NAME, payload)
+    written = _write_if_changed(site_dir / CATALOG_PAGE_NAME, page) or written
+    return {
+        'guides': len(data['guides']),
+        'races': len(data['races']),
+        'json_bytes': len(payload.encode('utf-8')),
+        'page_bytes': len(page.encode('utf-8')),
+        'written': written,
+    }
+
+
+def print_summary(summary):
+    print(f"  → Catalog: {summary['guides']:,} guides for {summary['races']:,} races "
+          f"({GUIDES_JSON_NAME} {summary['json_bytes'] / 1024:.1f} KB, page {summary['page_bytes'] / 1024:.1f} KB"
+          f"{'' if summary['written'] else ', unchanged'})")
+
+
+def main():
+    from . import build_guides
+
+    parser = argparse.ArgumentParser(description='Write guides.json and a catalog page for a generated site')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--variants', help='Variant matrix JSON used to split <race>-<variant> directory names')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+
+    manifest = build_guides.load_manifest(args.site)
+    pages = manifest['pages'] or scan_pages(args.site, build_guides.load_variant_matrix(args.variants))
+    print_summary(write_catalog(args.site, pages))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
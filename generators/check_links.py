@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Internal Link Checker
+Checks every internal href/src in a built site against the files and id=
+anchors that actually exist.
+
+One pass over the site (in a process pool) collects each page's ids and
+links; the checker then resolves every link against that index:
+
+- 'race-variant/' and 'race-variant/index.html' need the file
+- '#section-14' and 'other/#masters' also need the id on the target page
+- the catalog's guides.json rows are checked as links from the catalog page
+
+External URLs (http:, mailto:, //host, ...) are skipped. Split pages (see
+split_sections.py) are checked with their sections, so anchors inside
+deferred sections count.
+
+Usage:
+    python generators/check_links.py athletes/ --jobs 8
+
+Exits non-zero when a link is broken.
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import catalog, split_sections
+from .verify_site import list_files
+
+# Attribute patterns start with a literal and are case-sensitive (generated
+# pages use lowercase attribute names), which lets re skip ahead to
+# candidates; the character before each match is checked in Python
+ATTRIBUTE_PATTERNS = {
+    name: re.compile(name + r'\s*=\s*(?:"([^"]*)"|\'([^\']*)\')') for name in ('id', 'href', 'src')
+}
+ATTRIBUTE_BOUNDARY = frozenset(' \t\n\r\f"\'')
+
+# Markup whose text is never parsed as links or ids
+IGNORED_PATTERN = re.compile(r'<(?:(script|style)\b.*?</\1\s*>|!--.*?-->)', re.DOTALL)
+
+HTML_SUFFIXES = ('.html', '.htm')
+
+# Broken links listed per page before the rest are summarized
+MAX_LISTED = 10
+
+
+def scan_page(path):
+    """
+    Return (ids, links) for one HTML page: the set of its id values and its
+    href/src values. Runs inside a pool worker.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        page_html = f.read()
+    page_html = IGNORED_PATTERN.sub(' ', split_sections.join_page(page_html, Path(path).parent))
+    ids = set(attribute_values(page_html, 'id'))
+    links = sorted(attribute_values(page_html, 'href') + attribute_values(page_html, 'src'))
+    return ids, links
+
+
+def attribute_values(page_html, name):
+    """Values of every name="..." attribute in page_html"""
+    return [match.group(1) if match.group(1) is not None else match.group(2)
+            for match in ATTRIBUTE_PATTERNS[name].finditer(page_html)
+            if match.start() and page_html[match.start() - 1] in ATTRIBUTE_BOUNDARY]
+
+
+def is_external(url):
+    parts = urlsplit(url)
+    return bool(parts.scheme or parts.netloc)
+
+
+def resolve(page, url, files):
+    """
+    (target file, anchor) for a link on page (both site-relative posix
+    paths), or (None, anchor) when the target does not exist.
+    """
+    parts = urlsplit(url)
+    anchor = unquote(parts.fragment)
+    path = unquote(parts.path)
+    if not path:
+        return page, anchor
+    if path.startswith('/'):
+        target = posixpath.normpath(path.lstrip('/') or '.')
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+    if target in files:
+        return target, anchor
+    index = catalog.CATALOG_PAGE_NAME if target == '.' else f"{target}/{catalog.CATALOG_PAGE_NAME}"
+    if index in files:
+        return index, anchor
+    return None, anchor
+
+
+def catalog_links(site_dir):
+    """Guide URLs the catalog page builds from guides.json"""
+    path = Path(site_dir) / catalog.GUIDES_JSON_NAME
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    column = data.get('fields', catalog.GUIDE_FIELDS).index('url')
+    return [row[column] for row in data.get('guides', [])]
+
+
+def check_site(site_dir, jobs=None):
+    """
+    Index every file and anchor under site_dir and check every internal link.
+
+    Returns a summary dict with 'broken' ({page: [(url, reason), ...]}),
+    page, link and anchor counts, and timing.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    files = set(list_files(site_dir))
+    pages = sorted(path for path in files if path.endswith(HTML_SUFFIXES)
+                   and posixpath.basename(posixpath.dirname(path)) != split_sections.FRAGMENT_DIR_NAME)
+
+    paths = [os.path.join(site_dir, page) for page in pages]
+    if jobs == 1 or len(paths) <= 1:
+        scanned = [scan_page(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            scanned = list(pool.map(scan_page, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    anchors = {page: ids for page, (ids, _) in zip(pages, scanned)}
+    links = {page: page_links for page, (_, page_links) in zip(pages, scanned)}
+    if catalog.CATALOG_PAGE_NAME in links:
+        links[catalog.CATALOG_PAGE_NAME] = links[catalog.CATALOG_PAGE_NAME] + catalog_links(site_dir)
+
+    broken = {}
+    checked = 0
+    for page in pages:
+        for url in links[page]:
+            if not url or is_external(url):
+                continue
+            checked += 1
+            target, anchor = resolve(page, url, files)
+            if target is None:
+                broken.setdefault(page, []).append((url, 'missing file'))
+            elif anchor and target in anchors and anchor not in anchors[target]:
+                broken.setdefault(page, []).append((url, f"no id=\"{anchor}\" in {target}"))
+
+    return {
+        'files': len(files),
+        'pages': len(pages),
+        'anchors': sum(len(ids) for ids in anchors.values()),
+        'links': checked,
+        'broken': broken,
+        'broken_count': sum(len(page_broken) for page_broken in broken.values()),
+        'seconds': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+
+def print_summary(summary):
+    for page, page_broken in sorted(summary['broken'].items()):
+        print(f"  ✗ {page}: {len(page_broken)} broken")
+        for url, reason in page_broken[:MAX_LISTED]:
+            print(f"      {url} ({reason})")
+        if len(page_broken) > MAX_LISTED:
+            print(f"      … and {len(page_broken) - MAX_LISTED:,} more")
+    print(f"  → {summary['links']:,} internal links on {summary['pages']:,} pages checked against "
+          f"{summary['files']:,} files and {summary['anchors']:,} anchors in {summary['seconds']:.2f}s: "
+          f"{summary['broken_count']:,} broken on {len(summary['broken']):,} pages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check internal links and anchors in a built site')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+
+    summary = check_site(args.site, args.jobs)
+    print_summary(summary)
+    return 1 if summary['broken'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
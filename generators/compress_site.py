@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Precompressed Site Assets
+Writes index.html.gz (and index.html.br when the brotli module is installed)
+next to every generated page and shared asset, for static servers and CDN
+origins that serve precompressed files.
+
+Usage:
+    python generators/compress_site.py athletes/ --jobs 8
+
+Files are compressed in parallel. A state file (<root>/.compress-manifest.json)
+records the source hash of every compressed file; files whose hash is
+unchanged and whose siblings still exist are skipped. Siblings whose source
+file has been deleted are removed.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATE_NAME = '.compress-manifest.json'
+
+# Text formats worth precompressing; images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.json', '.svg', '.xml', '.txt')
+
+
+def encodings():
+    """Sibling suffixes this interpreter can produce"""
+    return ('.gz', '.br') if brotli is not None else ('.gz',)
+
+
+def find_sources(root):
+    """Return sorted paths of compressible files under root (skipping dot files)"""
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for filename in filenames:
+            if filename.startswith('.') or not filename.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            sources.append(Path(dirpath) / filename)
+    return sorted(sources)
+
+
+def _write_bytes_atomic(path, data):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def compress_file(task):
+    """
+    Write compressed siblings for one file. Runs inside a pool worker.
+
+    Returns a dict with the source hash and sizes, with 'skipped' set when
+    the source hash matched the previous run and every sibling exists.
+    """
+    path, previous_hash, suffixes, force = task
+    path = Path(path)
+    data = path.read_bytes()
+    source_hash = hashlib.sha256(data).hexdigest()
+    result = {'path': str(path), 'source_hash': source_hash, 'bytes': len(data), 'skipped': False}
+
+    siblings = {suffix: path.with_name(path.name + suffix) for suffix in suffixes}
+    if not force and source_hash == previous_hash and all(p.exists() for p in siblings.values()):
+        result['skipped'] = True
+        return result
+
+    for suffix, sibling in siblings.items():
+        if suffix == '.gz':
+            # mtime=0 keeps the output byte-identical across runs
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            compressed = brotli.compress(data, quality=11)
+        _write_bytes_atomic(sibling, compressed)
+        result[suffix] = len(compressed)
+    return result
+
+
+def load_state(root):
+    """Load the compression state file, or an empty one if missing/unreadable"""
+    try:
+        with open(Path(root) / STATE_NAME, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'files': {}}
+    state.setdefault('files', {})
+    return state
+
+
+def save_state(root, state):
+    """Write the compression state file atomically"""
+    data = json.dumps(state, indent=1, sort_keys=True) + '\n'
+    _write_bytes_atomic(Path(root) / STATE_NAME, data.encode('utf-8'))
+
+
+def remove_orphans(root, sources):
+    """Delete .gz/.br files whose source no longer exists; return how many"""
+    live = {str(path) for path in sources}
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            stem, suffix = os.path.splitext(filename)
+            if suffix in ('.gz', '.br') and stem.endswith(COMPRESSIBLE_SUFFIXES):
+                if os.path.join(dirpath, stem) not in live:
+                    os.remove(os.path.join(dirpath, filename))
+                    removed += 1
+    return removed
+
+
+def compress_tree(root, jobs=None, force=False):
+    """
+    Write precompressed siblings for every compressible file under root.
+
+    Args:
+        root: Site directory (e.g. athletes/)
+        jobs: Worker processes (defaults to CPU count; 1 runs in-process)
+        force: Recompress every file regardless of the state file
+
+    Returns:
+        Summary dict with per-file results, byte totals and timing
+    """
+    root = Path(root)
+    jobs = jobs or os.cpu_count() or 1
+    suffixes = encodings()
+    state = load_state(root)
+    sources = find_sources(root)
+
+    start = time.perf_counter()
+    tasks = []
+    for path in sources:
+        entry = state['files'].get(path.relative_to(root).as_posix(), {})
+        tasks.append((str(path), entry.get('source_hash'), suffixes, force))
+    if jobs == 1 or len(tasks) <= 1:
+        results = [compress_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(compress_file, tasks, chunksize=16))
+    removed = remove_orphans(root, sources)
+    elapsed = time.perf_counter() - start
+
+    files = {}
+    for result in results:
+        key = Path(result['path']).relative_to(root).as_posix()
+        if result['skipped']:
+            files[key] = state['files'][key]
+            continue
+        files[key] = {'source_hash': result['source_hash'], 'bytes': result['bytes']}
+        files[key].update({suffix: result[suffix] for suffix in suffixes})
+    state['files'] = files
+    save_state(root, state)
+
+    return {
+        'root': str(root),
+        'files': files,
+        'compressed': [Path(r['path']).relative_to(root).as_posix() for r in results if not r['skipped']],
+        'skipped': sum(1 for r in results if r['skipped']),
+        'removed': removed,
+        'suffixes': suffixes,
+        'seconds': elapsed,
+        'jobs': jobs,
+    }
+
+
+def print_summary(summary, per_file=True):
+    """Print per-file and aggregate compression ratios"""
+    files = summary['files']
+    suffixes = summary['suffixes']
+    if per_file:
+        for key in summary['compressed']:
+            entry = files[key]
+            ratios = '  '.join(f"{suffix} {entry[suffix] / entry['bytes']:.1%}" for suffix in suffixes
+                               if entry['bytes'])
+            print(f"  {key}: {entry['bytes'] / 1024:.1f} KB → {ratios}")
+
+    print(f"\n✓ Compressed {len(summary['compressed'])} files with {summary['jobs']} worker(s) "
+          f"in {summary['seconds']:.2f}s")
+    print(f"  → {summary['skipped']} unchanged files skipped, {summary['removed']} orphaned siblings removed")
+    if brotli is None:
+        print("  → brotli module not installed; wrote .gz only")
+    total = sum(entry['bytes'] for entry in files.values())
+    for suffix in suffixes:
+        packed = sum(entry.get(suffix, 0) for entry in files.values())
+        if total:
+            print(f"  → {suffix}: {total / (1024 * 1024):.1f} MB → {packed / (1024 * 1024):.1f} MB "
+                  f"({packed / total:.1%} of original)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write precompressed .gz/.br siblings for a generated site')
+    parser.add_argument('root', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Recompress every file, ignoring the state file')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print the aggregate summary')
+    args = parser.parse_args()
+
+    if not Path(args.root).is_dir():
+        print(f"Site directory not found: {args.root}")
+        return 1
+
+    summary = compress_tree(args.root, args.jobs, args.force)
+    print_summary(summary, per_file=not args.quiet)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
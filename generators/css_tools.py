@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+CSS Tools
+Small, dependency-free stylesheet helpers for the guide build:
+
+- parse_css() / serialize_css(): split a stylesheet into rules, grouping
+  at-rules (@media, @supports) and verbatim at-rules (@font-face, @keyframes)
+- html_tokens(): the tag names, classes and ids used by an HTML document
+- filter_css(): keep only the rules whose selectors can match those tokens
+- selector_tokens(): the tag names, classes and ids a stylesheet's selectors use
+- cached_prune_css(): the same, cached by (CSS hash, selector-set hash)
+
+Selector matching is deliberately conservative: a selector is kept unless
+one of its tag names, classes or ids is missing from the document.
+Pseudo-classes, pseudo-elements and attribute selectors are ignored, so
+states like :hover or [open] never cause a rule to be dropped.
+
+Usage:
+    python generators/css_tools.py neo_brutalist_css.txt output/guide.html -o output/guide.css
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+LINE_BREAK_PATTERN = re.compile(r'\s*\n\s*')
+
+# At-rules whose body is a list of rules to filter; any other block
+# at-rule (@font-face, @keyframes, @page) is kept verbatim
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document')
+
+# Always present in a rendered page
+DOCUMENT_TAGS = frozenset(('html', 'head', 'body'))
+
+HTML_TAG_PATTERN = re.compile(r'<([A-Za-z][A-Za-z0-9-]*)')
+# Attributes always follow whitespace; spelling out the case (instead of \b
+# and re.IGNORECASE) keeps these scans cheap on whole pages
+HTML_CLASS_PATTERN = re.compile(r'\s[cC][lL][aA][sS][sS]\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+HTML_ID_PATTERN = re.compile(r'\s[iI][dD]\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+# Parts of a compound selector that never decide a match
+PSEUDO_PATTERN = re.compile(r'::?[A-Za-z-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+ATTRIBUTE_PATTERN = re.compile(r'\[[^\]]*\]')
+SELECTOR_TOKEN_PATTERN = re.compile(r'([.#]?)(-?[A-Za-z_][\w-]*)')
+COMBINATOR_PATTERN = re.compile(r'\s*[>+~]\s*|\s+')
+
+# cached_prune_css() results for this process, keyed by (CSS hash, set hash)
+_PRUNED = {}
+
+
+class Rule:
+    """A style rule (selector list plus declarations)"""
+
+    __slots__ = ('selectors', 'body')
+
+    def __init__(self, selectors, body):
+        self.selectors = selectors
+        self.body = body
+
+
+class AtRule:
+    """
+    An at-rule. Grouping at-rules (@media, @supports) hold child nodes in
+    `children`; everything else keeps its body text verbatim (None for
+    statements like @import).
+    """
+
+    __slots__ = ('prelude', 'body', 'children')
+
+    def __init__(self, prelude, body=None, children=None):
+        self.prelude = prelude
+        self.body = body
+        self.children = children
+
+
+def _skip_string(css, index):
+    quote = css[index]
+    index += 1
+    while index < len(css) and css[index] != quote:
+        index += 2 if css[index] == '\\' else 1
+    return index + 1
+
+
+def _find(css, start, stops):
+    """Index of the first character in stops at start, skipping strings and brackets"""
+    depth = 0
+    index = start
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth <= 0 and char in stops:
+            return index
+        index += 1
+    return len(css)
+
+
+def _matching_brace(css, open_index):
+    depth = 0
+    index = open_index
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    return len(css)
+
+
+def split_selectors(selector_text):
+    """Split a selector list on top-level commas"""
+    selectors = []
+    start = 0
+    while start <= len(selector_text):
+        end = _find(selector_text, start, ',')
+        selector = selector_text[start:end].strip()
+        if selector:
+            selectors.append(selector)
+        start = end + 1
+    return selectors
+
+
+def _one_line(body):
+    return LINE_BREAK_PATTERN.sub(' ', body.strip())
+
+
+def parse_css(css):
+    """Parse a stylesheet into a list of Rule and AtRule nodes (comments are dropped)"""
+    return _parse_nodes(COMMENT_PATTERN.sub('', css))
+
+
+def _parse_nodes(css):
+    nodes = []
+    position = 0
+    while position < len(css):
+        stop = _find(css, position, '{;}')
+        prelude = css[position:stop].strip()
+        if stop >= len(css) or css[stop] != '{':
+            # Statement at-rule (@import, @charset), or stray text
+            if prelude.startswith('@'):
+                nodes.append(AtRule(prelude))
+            position = stop + 1
+            continue
+        close = _matching_brace(css, stop)
+        body = css[stop + 1:close]
+        position = close + 1
+        if prelude.startswith('@'):
+            if prelude.lower().startswith(GROUPING_AT_RULES):
+                nodes.append(AtRule(prelude, children=_parse_nodes(body)))
+            else:
+                nodes.append(AtRule(prelude, body=_one_line(body)))
+        elif prelude:
+            nodes.append(Rule(split_selectors(prelude), _one_line(body)))
+    return nodes
+
+
+def serialize_css(nodes, indent=''):
+    """Write nodes back out as CSS, one rule per line"""
+    lines = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            lines.append(f"{indent}{', '.join(node.selectors)} {{ {node.body} }}")
+        elif node.children is not None:
+            lines.append(f"{indent}{node.prelude} {{")
+            lines.append(serialize_css(node.children, indent + '  '))
+            lines.append(f"{indent}}}")
+        elif node.body is not None:
+            lines.append(f"{indent}{node.prelude} {{ {node.body} }}")
+        else:
+            lines.append(f"{indent}{node.prelude};")
+    return '\n'.join(line for line in lines if line)
+
+
+def html_tokens(html, tokens=None):
+    """
+    Collect the tag names, classes and ids used by html.
+
+    Returns a dict of sets {'tags', 'classes', 'ids'}; pass tokens to add to
+    an existing dict instead.
+    """
+    tokens = tokens if tokens is not None else {'tags': set(), 'classes': set(), 'ids': set()}
+    tokens['tags'].update(name.lower() for name in HTML_TAG_PATTERN.findall(html))
+    for double, single in HTML_CLASS_PATTERN.findall(html):
+        tokens['classes'].update((double or single).split())
+    for double, single in HTML_ID_PATTERN.findall(html):
+        value = (double or single).strip()
+        if value:
+            tokens['ids'].add(value)
+    return tokens
+
+
+def selector_may_match(selector, tokens):
+    """
+    True unless a tag, class or id in selector is absent from tokens.
+
+    :root, * and the html/head/body elements always match.
+    """
+    selector = PSEUDO_PATTERN.sub('', ATTRIBUTE_PATTERN.sub('', selector))
+    for compound in COMBINATOR_PATTERN.split(selector):
+        for prefix, name in SELECTOR_TOKEN_PATTERN.findall(compound):
+            if prefix == '.':
+                if name not in tokens['classes']:
+                    return False
+            elif prefix == '#':
+                if name not in tokens['ids']:
+                    return False
+            elif name.lower() not in tokens['tags'] and name.lower() not in DOCUMENT_TAGS:
+                return False
+    return True
+
+
+def selector_tokens(nodes, tokens=None):
+    """
+    Collect the tag names, classes and ids the selectors in nodes (see
+    parse_css()) refer to, in the same shape as html_tokens()
+    """
+    tokens = tokens if tokens is not None else {'tags': set(), 'classes': set(), 'ids': set()}
+    for node in nodes:
+        if isinstance(node, Rule):
+            for selector in node.selectors:
+                selector = PSEUDO_PATTERN.sub('', ATTRIBUTE_PATTERN.sub('', selector))
+                for prefix, name in SELECTOR_TOKEN_PATTERN.findall(selector):
+                    if prefix == '.':
+                        tokens['classes'].add(name)
+                    elif prefix == '#':
+                        tokens['ids'].add(name)
+                    else:
+                        tokens['tags'].add(name.lower())
+        elif node.children is not None:
+            selector_tokens(node.children, tokens)
+    return tokens
+
+
+def filter_css(nodes, tokens):
+    """
+    Return nodes with every selector that cannot match tokens removed.
+
+    Rules left without selectors and grouping at-rules left empty are
+    dropped; other at-rules are kept as they are.
+    """
+    kept = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selectors = [selector for selector in node.selectors if selector_may_match(selector, tokens)]
+            if selectors:
+                kept.append(Rule(selectors, node.body))
+        elif node.children is not None:
+            children = filter_css(node.children, tokens)
+            if children:
+                kept.append(AtRule(node.prelude, children=children))
+        else:
+            kept.append(node)
+    return kept
+
+
+def prune_css(css, tokens):
+    """Stylesheet text reduced to the rules that can match tokens"""
+    return serialize_css(filter_css(parse_css(css), tokens))
+
+
+def token_set_hash(tokens):
+    """Stable hash of a tokens dict (see html_tokens())"""
+    digest = hashlib.sha256()
+    for kind in ('tags', 'classes', 'ids'):
+        digest.update(f"{kind}\0{chr(0).join(sorted(tokens[kind]))}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cached_prune_css(css, tokens, cache_dir=None):
+    """
+    prune_css() memoized by (CSS hash, selector-set hash).
+
+    Entries live in memory for the process and, with cache_dir, on disk as
+    pruned.<css hash>.<set hash>.css so later builds skip the parse.
+    """
+    key = (hashlib.sha256(css.encode('utf-8')).hexdigest()[:16], token_set_hash(tokens)[:16])
+    if key in _PRUNED:
+        return _PRUNED[key]
+    cache_path = Path(cache_dir) / f"pruned.{key[0]}.{key[1]}.css" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        pruned = cache_path.read_text(encoding='utf-8')
+    else:
+        pruned = prune_css(css, tokens)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(pruned, encoding='utf-8')
+            os.replace(tmp_path, cache_path)
+    _PRUNED[key] = pruned
+    return pruned
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove CSS rules that match nothing in a set of HTML pages')
+    parser.add_argument('css', help='Stylesheet to prune (e.g. neo_brutalist_css.txt)')
+    parser.add_argument('pages', nargs='+', help='HTML pages (or directories of *.html) the CSS must still cover')
+    parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+    parser.add_argument('--cache-dir', help='Directory for cached pruned stylesheets')
+    args = parser.parse_args()
+
+    tokens = None
+    for path in map(Path, args.pages):
+        for page in sorted(path.rglob('*.html')) if path.is_dir() else [path]:
+            tokens = html_tokens(page.read_text(encoding='utf-8'), tokens)
+    if tokens is None:
+        parser.error('no HTML pages found')
+
+    css = Path(args.css).read_text(encoding='utf-8')
+    pruned = cached_prune_css(css, tokens, args.cache_dir)
+    if args.output:
+        Path(args.output).write_text(pruned + '\n', encoding='utf-8')
+    else:
+        sys.stdout.write(pruned + '\n')
+    print(f"  {args.css}: {len(css.encode('utf-8')):,} → {len(pruned.encode('utf-8')):,} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
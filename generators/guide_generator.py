@@ -10,58 +10,569 @@ For custom coaching clients, pass athlete_data dict containing:
 - fueling: Personalized fueling calculations
 """
 
+import base64
+import hashlib
 import json
+import os
+import posixpath
 import re
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Dict, Optional
 
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import css_tools
+from .minify_html import minify_html
+from .split_sections import FRAGMENT_DIR_NAME, split_page, write_fragments
+
+
+# Bump when a code change alters generated output, so incremental builds
+# (see build_guides.py) re-render every page
+GENERATOR_VERSION = '2.1'
+
+REPO_ROOT = Path(__file__).parent.parent
+TEMPLATE_PATH = REPO_ROOT / 'templates' / 'guide_template_full.html'
+BRAND_TOKENS_PATH = REPO_ROOT / 'brand' / 'tokens.css'
+GUIDE_CSS_PATH = REPO_ROOT / 'styles' / 'training-guide.css'
+FONTS_DIR = REPO_ROOT / 'brand' / 'fonts'
+FONTS_CSS_PATH = FONTS_DIR / 'fonts.css'
+BRAND_CSS_PATHS = (BRAND_TOKENS_PATH, GUIDE_CSS_PATH, FONTS_CSS_PATH)
+
+# font_href for single-file pages (embed_fonts): their regular latin faces
+# are embedded as data: URIs, so the page renders the same wherever the file
+# is moved. Italic faces are never embedded.
+EMBEDDED_FONTS = 'data:'
+
+# Pages load the fonts from <assets>/fonts/; a linked stylesheet sits in
+# <assets>/, an inline page without a shared assets dir gets assets/ next to it
+ASSETS_DIR_NAME = 'assets'
+FONT_ASSETS_DIR_NAME = 'fonts'
+
+# Faces used above the fold (editorial headings, mono nav/labels); their
+# latin files are preloaded
+PRELOAD_FACES = (('Source Serif 4', 'normal'), ('Sometype Mono', 'normal'))
+
+# url('./Name.woff2') references and @font-face blocks in fonts.css
+FONT_URL_PATTERN = re.compile(r"url\(['\"]?\./([^'\")]+)['\"]?\)")
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{([^}]*)\}')
+
+# Derived stylesheets (critical CSS) cached across builds, keyed by content hash
+CSS_CACHE_DIR = REPO_ROOT / '.cache' / 'css'
+
+# The header, sticky nav and the opening of section 1 are visible before the
+# first scroll; critical CSS covers the page body up to the first conditional
+# block of section 1 (or the start of section 2)
+CRITICAL_CSS_START = '<body'
+CRITICAL_CSS_SECTION = '<section id="section-1'
+CRITICAL_CSS_BOUNDARY = '<section id="section-2'
+
+# Reference inputs rendered once per page type (see reference_page()): a
+# race below and one above the altitude threshold, and an athlete that
+# fills every optional custom plan fragment
+REFERENCE_RACE_PATHS = (REPO_ROOT / 'race_data' / 'unbound_gravel_200.json',
+                        REPO_ROOT / 'race_data' / 'sbt_grvl_75.json')
+REFERENCE_ATHLETE_PATH = REPO_ROOT / 'templates' / 'reference_athlete.json'
+REFERENCE_TIER = 'COMPETE'
+REFERENCE_ABILITY_LEVELS = ('Intermediate', 'Masters')
+
+
+def _file_stamp(path):
+    """Return (path, mtime_ns, size) for cache validation; missing files stamp as None"""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return (str(path), None, None)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class FileCache:
+    """
+    Process-wide cache for values derived from files on disk.
+
+    Entries are keyed by name plus the paths they were built from, and are
+    rebuilt whenever any of those files changes mtime or size. Batch runs pay
+    the read/build cost once per process, while edits made during a dev
+    session are still picked up on the next render.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, paths, build):
+        """Return the cached value for name, calling build() if any path changed"""
+        key = (name, tuple(str(p) for p in paths))
+        stamp = tuple(_file_stamp(p) for p in paths)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = build()
+        self.entries[key] = (stamp, value)
+        return value
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
 
-def load_brand_css():
-    """Load and combine brand CSS files for inlining into guides."""
-    script_dir = Path(__file__).parent
-    repo_root = script_dir.parent
-    brand_dir = repo_root / 'brand'
-    styles_dir = repo_root / 'styles'
 
+TEMPLATE_CACHE = FileCache()
+
+
+def _brand_css_paths(fonts_css=None, font_href=None):
+    paths = (BRAND_TOKENS_PATH, GUIDE_CSS_PATH, Path(fonts_css or FONTS_CSS_PATH))
+    if font_href == EMBEDDED_FONTS:
+        # Embedded CSS carries the font bytes themselves
+        paths += font_paths(fonts_css)
+    return paths
+
+
+def load_brand_css(font_href=None, fonts_css=None):
+    """
+    Load and combine brand CSS files for inlining into guides.
+
+    With font_href, the @font-face rules from fonts_css (default:
+    brand/fonts/fonts.css) are prepended, with their font URLs pointing at
+    font_href.
+    """
+    return TEMPLATE_CACHE.get(('brand_css', font_href), _brand_css_paths(fonts_css, font_href),
+                              partial(_read_brand_css, font_href, fonts_css))
+
+
+def _read_brand_css(font_href=None, fonts_css=None):
     css_parts = []
 
+    # Load self-hosted font faces
+    fonts_css = Path(fonts_css or FONTS_CSS_PATH)
+    if font_href == EMBEDDED_FONTS and fonts_css.exists():
+        css_parts.append(f"/* === Brand Fonts === */\n{embedded_font_css(fonts_css)}")
+    elif font_href and fonts_css.exists():
+        with open(fonts_css, 'r', encoding='utf-8') as f:
+            font_css = FONT_URL_PATTERN.sub(lambda m: f"url('{font_href}/{m.group(1)}')", f.read())
+        css_parts.append(f"/* === Brand Fonts === */\n{font_css}")
+
     # Load design tokens
-    tokens_path = brand_dir / 'tokens.css'
-    if tokens_path.exists():
-        with open(tokens_path, 'r', encoding='utf-8') as f:
+    if BRAND_TOKENS_PATH.exists():
+        with open(BRAND_TOKENS_PATH, 'r', encoding='utf-8') as f:
             css_parts.append(f"/* === Brand Tokens === */\n{f.read()}")
 
     # Load training guide styles
-    guide_css_path = styles_dir / 'training-guide.css'
-    if guide_css_path.exists():
-        with open(guide_css_path, 'r', encoding='utf-8') as f:
+    if GUIDE_CSS_PATH.exists():
+        with open(GUIDE_CSS_PATH, 'r', encoding='utf-8') as f:
             css_parts.append(f"/* === Training Guide Styles === */\n{f.read()}")
 
     return '\n\n'.join(css_parts)
 
 
-def load_race_data(race_json_path):
-    """Load race data from JSON file"""
-    with open(race_json_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def parse_unicode_range(unicode_range):
+    """Parse 'U+0000-00FF, U+0131' into a list of (first, last) codepoint pairs"""
+    ranges = []
+    for part in unicode_range.split(','):
+        part = part.strip().upper()
+        if not part.startswith('U+'):
+            continue
+        first, _, last = part[2:].partition('-')
+        ranges.append((int(first, 16), int(last or first, 16)))
+    return ranges
+
+
+def covers_basic_latin(ranges):
+    """Whether a face with these unicode-range pairs (empty: all) renders basic latin text"""
+    return not ranges or any(first <= ord('A') <= last for first, last in ranges)
+
+
+def latin_font_faces(fonts_css=None):
+    """
+    The regular (non-italic) @font-face blocks of fonts_css (default:
+    brand/fonts/fonts.css) that cover basic latin, as (block body, font
+    path) pairs. These are the faces a page needs before its first paint:
+    italics are synthesized from the regular face, and characters outside
+    basic latin fall back to the next font in the stack.
+    """
+    fonts_css = Path(fonts_css or FONTS_CSS_PATH)
+    with open(fonts_css, 'r', encoding='utf-8') as f:
+        css = f.read()
+    faces = []
+    for block in FONT_FACE_PATTERN.findall(css):
+        source = FONT_URL_PATTERN.search(block)
+        unicode_range = re.search(r'unicode-range:\s*([^;]+)', block)
+        if not source or re.search(r'font-style:\s*italic', block):
+            continue
+        if not covers_basic_latin(parse_unicode_range(unicode_range.group(1)) if unicode_range else []):
+            continue
+        faces.append((block, fonts_css.parent / source.group(1)))
+    return faces
+
+
+def embedded_font_css(fonts_css=None):
+    """
+    The @font-face rules of latin_font_faces() with their files embedded as
+    data: URIs. Other faces are dropped.
+    """
+    rules = []
+    for block, font_path in latin_font_faces(fonts_css):
+        if not font_path.exists():
+            continue
+        data = base64.b64encode(font_path.read_bytes()).decode('ascii')
+        rules.append('@font-face {' + FONT_URL_PATTERN.sub(lambda m: f"url('data:font/woff2;base64,{data}')", block) + '}')
+    return '\n'.join(rules)
+
+
+def load_font_faces(fonts_css=None):
+    """
+    Parse the @font-face rules of fonts_css (default: brand/fonts/fonts.css).
+
+    Returns a list of dicts with family, style, weight, display, file
+    (relative to the CSS file) and ranges (list of codepoint pairs; empty
+    means all).
+    """
+    fonts_css = Path(fonts_css or FONTS_CSS_PATH)
+    return TEMPLATE_CACHE.get('font_faces', (fonts_css,), partial(_read_font_faces, fonts_css))
+
+
+def _read_font_faces(fonts_css):
+    if not fonts_css.exists():
+        return []
+    with open(fonts_css, 'r', encoding='utf-8') as f:
+        css = f.read()
+    faces = []
+    for block in FONT_FACE_PATTERN.findall(css):
+        family = re.search(r"font-family:\s*['\"]?([^;'\"]+)", block)
+        style = re.search(r'font-style:\s*([a-z]+)', block)
+        source = FONT_URL_PATTERN.search(block)
+        unicode_range = re.search(r'unicode-range:\s*([^;]+)', block)
+        if not (family and source):
+            continue
+        weight = re.search(r'font-weight:\s*([^;]+)', block)
+        display = re.search(r'font-display:\s*([a-z]+)', block)
+        faces.append({
+            'family': family.group(1).strip(),
+            'style': style.group(1) if style else 'normal',
+            'weight': weight.group(1).strip() if weight else '400',
+            'display': display.group(1) if display else 'swap',
+            'file': source.group(1),
+            'ranges': parse_unicode_range(unicode_range.group(1)) if unicode_range else [],
+        })
+    return faces
+
+
+def font_files(fonts_css=None):
+    """Font files referenced by fonts_css (default: brand/fonts/fonts.css)"""
+    return sorted({face['file'] for face in load_font_faces(fonts_css)})
+
+
+def font_paths(fonts_css=None):
+    """Paths of the font files referenced by fonts_css (default: brand/fonts/fonts.css)"""
+    source_dir = Path(fonts_css or FONTS_CSS_PATH).parent
+    return tuple(source_dir / name for name in font_files(fonts_css))
+
+
+def stylesheet_css(font_href, fonts_css=None, page_type=None):
+    """
+    The brand CSS with font URLs under font_href, pruned to the rules a
+    page type can use when page_type is given (see page_type_css())
+    """
+    if page_type is not None:
+        return page_type_css(page_type, font_href, fonts_css)
+    return load_brand_css(font_href, fonts_css)
+
+
+def stylesheet_name(fonts_css=None, page_type=None):
+    """Content-hashed file name for the shared brand stylesheet, e.g. guide.1a2b3c4d5e6f.css"""
+    css = stylesheet_css(FONT_ASSETS_DIR_NAME, fonts_css, page_type)
+    return f"guide.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]}.css"
+
+
+def write_stylesheet(assets_dir, fonts_css=None, page_type=None):
+    """
+    Write the brand CSS to <assets_dir>/guide.<hash>.css for linked builds,
+    and copy the fonts it references to <assets_dir>/fonts/.
+
+    fonts_css defaults to brand/fonts/fonts.css; a generated fonts.css that
+    already lives in <assets_dir>/fonts/ (see subset_fonts.py) needs no copy.
+    The name changes whenever the CSS does, so an existing file is already
+    up to date and is left alone. Returns the stylesheet path.
+
+    With page_type, the stylesheet is pruned for that page type; it shares
+    the fonts copied along with the full stylesheet.
+    """
+    css_path = Path(assets_dir) / stylesheet_name(fonts_css, page_type)
+    if not css_path.exists():
+        css_path.parent.mkdir(parents=True, exist_ok=True)
+        with open_atomic(css_path) as f:
+            f.write(stylesheet_css(FONT_ASSETS_DIR_NAME, fonts_css, page_type))
+    if page_type is None:
+        write_fonts(assets_dir, fonts_css)
+    return css_path
+
+
+def write_fonts(assets_dir, fonts_css=None):
+    """
+    Copy the fonts fonts_css (default: brand/fonts/fonts.css) references to
+    <assets_dir>/fonts/, skipping files that are already up to date. A
+    generated fonts.css that already lives there (see subset_fonts.py) needs
+    no copy. Returns the font directory.
+    """
+    font_dir = Path(assets_dir) / FONT_ASSETS_DIR_NAME
+    for source in font_paths(fonts_css):
+        target = font_dir / source.name
+        if source.exists() and (not target.exists() or target.read_bytes() != source.read_bytes()):
+            font_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, target)
+    return font_dir
+
+
+def font_preload_links(font_href, fonts_css=None):
+    """
+    <link rel="preload"> tags for the fonts used above the fold: for each
+    face in PRELOAD_FACES, the file whose unicode-range covers basic latin.
+    Embedded fonts (EMBEDDED_FONTS) arrive with the page and need none.
+    """
+    links = []
+    if not font_href or font_href == EMBEDDED_FONTS:
+        return ''
+    for family, style in PRELOAD_FACES:
+        for face in load_font_faces(fonts_css):
+            if (face['family'], face['style']) != (family, style):
+                continue
+            if covers_basic_latin(face['ranges']):
+                links.append(f'<link rel="preload" href="{font_href}/{face["file"]}" as="font" '
+                             f'type="font/woff2" crossorigin />')
+                break
+    return '\n  '.join(links)
+
+
+def critical_css(fonts_css=None):
+    """
+    The brand CSS rules the header, sticky nav and the opening of section 1
+    need.
+
+    Rules are selected by matching selectors against the tags, classes and
+    ids of above_the_fold() in every reference page (see reference_pages()
+    and css_tools.py). Of the @font-face rules only latin_font_faces() are
+    kept, with URLs pointing into FONT_ASSETS_DIR_NAME like the shared
+    stylesheet; the other faces arrive with it.
+
+    The result depends only on the template version, so it is cached in
+    memory per process and on disk in CSS_CACHE_DIR under a hash of the
+    template, brand CSS, generator and reference inputs: a batch build
+    computes it once.
+    """
+    paths = reference_input_paths() + _brand_css_paths(fonts_css)
+    return TEMPLATE_CACHE.get('critical_css', paths, partial(_read_critical_css, fonts_css))
+
+
+def _read_critical_css(fonts_css=None):
+    css = load_brand_css(None, fonts_css)
+    font_css = '\n'.join(
+        '@font-face {' + FONT_URL_PATTERN.sub(lambda m: f"url('{FONT_ASSETS_DIR_NAME}/{m.group(1)}')", block) + '}'
+        for block, _ in latin_font_faces(fonts_css))
+
+    digest = hashlib.sha256(GENERATOR_VERSION.encode('utf-8'))
+    digest.update(font_css.encode('utf-8'))
+    digest.update(css.encode('utf-8'))
+    for path in reference_input_paths():
+        digest.update(b'\0')
+        digest.update(path.read_bytes())
+    cache_path = CSS_CACHE_DIR / f"critical.{digest.hexdigest()[:16]}.css"
+    if cache_path.exists():
+        return cache_path.read_text(encoding='utf-8')
+
+    tokens = None
+    for _, page in reference_pages():
+        tokens = css_tools.html_tokens(above_the_fold(page), tokens)
+    critical = '\n'.join(part for part in (font_css, css_tools.prune_css(css, tokens)) if part)
+
+    CSS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open_atomic(cache_path) as f:
+        f.write(critical)
+    return critical
+
+
+def above_the_fold(page):
+    """
+    The markup of a rendered page visible before the first scroll: the
+    header, nav and section 1 up to its first conditional block (the part
+    every page type shares).
+    """
+    body = page[max(page.find(CRITICAL_CSS_START), 0):].split(CRITICAL_CSS_BOUNDARY, 1)[0]
+    top, marker, section = body.partition(CRITICAL_CSS_SECTION)
+    return top + marker + section.split('<!-- START ', 1)[0]
+
+
+def reference_input_paths():
+    """
+    The files reference_pages() depends on: the template, this module, the
+    reference athlete and races. Everything derived from the reference pages
+    (critical CSS, per page type stylesheets) is keyed on them.
+    """
+    return (TEMPLATE_PATH, Path(__file__), REFERENCE_ATHLETE_PATH) + REFERENCE_RACE_PATHS
+
+
+def reference_pages():
+    """
+    (page type, HTML) for every page type the reference inputs produce:
+    each reference race at each reference ability level, as a static and a
+    custom plan. Pages link their CSS instead of inlining it, and are
+    rendered once per process (until a reference input changes).
+    """
+    return TEMPLATE_CACHE.get('reference_pages', reference_input_paths(), _render_reference_pages)
+
+
+def _render_reference_pages():
+    with open(REFERENCE_ATHLETE_PATH, 'r', encoding='utf-8') as f:
+        athlete_data = json.load(f)
+    pages = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'index.html')
+        for race_path in REFERENCE_RACE_PATHS:
+            race = load_race_data(race_path)
+            for ability_level in REFERENCE_ABILITY_LEVELS:
+                for athlete in (None, athlete_data):
+                    conditions = {
+                        'race_elevation': race.race_elevation,
+                        'ability_level': ability_level,
+                        'is_custom_plan': athlete is not None,
+                    }
+                    generate_guide(race, REFERENCE_TIER, ability_level, output_path, athlete,
+                                   verbose=False, css_href='guide.css')
+                    with open(output_path, 'r', encoding='utf-8') as f:
+                        pages[page_type(conditions)] = f.read()
+    return tuple(pages.items())
+
+
+def page_type(conditions):
+    """
+    The page type for these render conditions: the sorted names of the
+    conditional blocks (see CONDITIONAL_BLOCKS) that survive rendering.
+    """
+    return tuple(sorted(name for name, predicate in CONDITIONAL_BLOCKS.items() if predicate(conditions)))
 
 
-def load_template():
+def page_type_tokens(page_type):
     """
-    Load the HTML template and inject brand CSS.
+    The tags, classes and ids (see css_tools.html_tokens()) of the reference
+    page for this type (see reference_pages()). A type without a reference
+    page has no tokens, so its pages always fall back to the full CSS.
+    """
+    return TEMPLATE_CACHE.get(('page_type_tokens', page_type), reference_input_paths(),
+                              partial(_read_page_type_tokens, page_type))
+
+
+def _read_page_type_tokens(page_type):
+    tokens = {'tags': set(), 'classes': set(), 'ids': set()}
+    for reference_type, page in reference_pages():
+        if reference_type == page_type:
+            css_tools.html_tokens(page, tokens)
+    return tokens
+
+
+def uncovered_tokens(values, page_type, fonts_css=None):
+    """
+    The tags, classes (.name) and ids (#name) the brand CSS styles that the
+    rendered slot values of a page (see CompiledTemplate.render()) use but
+    its type's reference page doesn't, sorted. Rules for these may be
+    missing from the pruned stylesheet, so such a page needs the full one.
+
+    The template markup around the slots is the reference page's own (no
+    slot sits inside a class or id attribute), so only values can add
+    tokens; fragments are shared by a race's pages and scanned once.
+    """
+    styled = TEMPLATE_CACHE.get('brand_selector_tokens', _brand_css_paths(fonts_css),
+                                partial(_read_brand_selector_tokens, fonts_css))
+    covered = page_type_tokens(page_type)
+    uncovered = set()
+    for value in values:
+        if '<' not in value:
+            continue
+        used = _value_tokens(value)
+        for kind, prefix in (('tags', ''), ('classes', '.'), ('ids', '#')):
+            uncovered.update(f"{prefix}{name}" for name in (used[kind] & styled[kind]) - covered[kind])
+    return sorted(uncovered)
+
+
+@lru_cache(maxsize=1024)
+def _value_tokens(value):
+    return css_tools.html_tokens(value)
+
+
+def _read_brand_selector_tokens(fonts_css=None):
+    return css_tools.selector_tokens(css_tools.parse_css(load_brand_css(None, fonts_css)))
+
+
+def page_type_css(page_type, font_href, fonts_css=None):
+    """
+    Brand CSS (fonts under font_href) without the rules no page of this type
+    can match, e.g. Masters or custom plan styles on a static plan page.
+    Cached by (CSS hash, selector-set hash) in memory and in CSS_CACHE_DIR.
+    """
+    return css_tools.cached_prune_css(load_brand_css(font_href, fonts_css), page_type_tokens(page_type),
+                                      CSS_CACHE_DIR)
+
+
+def load_template(css_href=None, font_href=None, fonts_css=None, critical=False, page_type=None):
+    """
+    Load the HTML template and inject brand fonts and CSS.
 
     The template has a placeholder <!-- BRAND_CSS --> that gets replaced
-    with the inlined brand tokens and guide styles.
+    with the inlined fonts, brand tokens and guide styles, or with a <link>
+    to css_href when given (see write_stylesheet()). <!-- BRAND_FONTS -->
+    becomes preload links for the above-the-fold fonts.
+
+    With css_href and critical, only critical_css() is inlined and the full
+    stylesheet is loaded asynchronously (with a <noscript> fallback). With
+    page_type, inlined CSS is pruned to that page type (see page_type_css()).
+
+    font_href is the URL of the font directory relative to the page (see
+    page_font_href()), EMBEDDED_FONTS to embed the regular latin fonts in
+    the inlined CSS, or None for no @font-face rules; fonts_css is the
+    @font-face stylesheet to use (default: brand/fonts/fonts.css). The
+    result is cached until the template, a stylesheet or fonts_css (or, for
+    embedded fonts, a font file) changes on disk.
     """
-    # Get path relative to this script's location
-    script_dir = Path(__file__).parent
-    repo_root = script_dir.parent
-    template_path = repo_root / 'templates' / 'guide_template_full.html'
-    with open(template_path, 'r', encoding='utf-8') as f:
+    return TEMPLATE_CACHE.get(('template', css_href, font_href, critical, page_type),
+                              (TEMPLATE_PATH,) + _brand_css_paths(fonts_css, font_href),
+                              partial(_read_template, css_href, font_href, fonts_css, critical, page_type))
+
+
+def _read_template(css_href=None, font_href=None, fonts_css=None, critical=False, page_type=None):
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
         template = f.read()
 
+    template = template.replace('<!-- BRAND_FONTS -->', font_preload_links(font_href, fonts_css))
+
+    if css_href and critical:
+        # Above-the-fold rules inline; the full stylesheet doesn't block first paint
+        css = critical_css(fonts_css).replace(f"url('{FONT_ASSETS_DIR_NAME}/", f"url('{font_href}/")
+        template = template.replace('<!-- BRAND_CSS -->', (
+            f'<style>\n{css}\n</style>\n'
+            f'  <link rel="preload" href="{css_href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'" />\n'
+            f'  <noscript><link rel="stylesheet" href="{css_href}" /></noscript>'))
+        return template
+
+    if css_href:
+        # Shared stylesheet: pages link to one cacheable file
+        template = template.replace('<!-- BRAND_CSS -->', f'<link rel="stylesheet" href="{css_href}" />')
+        return template
+
     # Load and inject brand CSS
-    brand_css = load_brand_css()
+    brand_css = stylesheet_css(font_href, fonts_css, page_type)
     if brand_css:
         # Replace the placeholder with brand CSS
         if '<!-- BRAND_CSS -->' in template:
@@ -70,44 +581,498 @@ def load_template():
     return template
 
 
-def extract_non_negotiables(race_data, index):
-    """Extract non-negotiable data, handling both dict and string formats"""
+def page_font_href(css_href=None):
+    """
+    URL of the font directory for a page: linked pages use the fonts copied
+    next to their stylesheet; inline pages use assets/fonts/ next to the
+    page (see write_fonts()).
+    """
+    if css_href:
+        return posixpath.join(posixpath.dirname(css_href), FONT_ASSETS_DIR_NAME)
+    return posixpath.join(ASSETS_DIR_NAME, FONT_ASSETS_DIR_NAME)
+
+
+# Placeholders look like {{RACE_NAME}} or {{plan_weeks}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}')
+
+
+def substitute_placeholders(text, values, unknown=None):
+    """
+    Replace every {{NAME}} in text in a single regex pass.
+
+    Args:
+        text: Template text
+        values: Dict mapping placeholder names (without braces) to values;
+            callable values are called once, on first use
+        unknown: Optional list; names with no entry in values are appended
+            to it (in document order) and left in the text as {{NAME}}
+
+    Returns:
+        The substituted text
+    """
+    resolved = {}
+
+    def lookup(match):
+        name = match.group(1)
+        if name in resolved:
+            return resolved[name]
+        if name not in values:
+            if unknown is not None:
+                unknown.append(name)
+            return match.group(0)
+        value = values[name]
+        if callable(value):
+            value = value()
+        value = resolved[name] = str(value)
+        return value
+
+    return PLACEHOLDER_PATTERN.sub(lookup, text)
+
+# Placeholders plus <!-- START X --> / <!-- END X --> block markers
+TEMPLATE_TOKEN_PATTERN = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}|<!-- (START|END) ([^>]*?)\s*-->')
+
+# Conditional template regions, keyed by the name in their END marker.
+# Each predicate takes the render conditions dict built in generate_guide().
+CONDITIONAL_BLOCKS = {
+    'ALTITUDE SECTION': lambda c: c['race_elevation'] >= 3000,
+    'MASTERS SECTION TOC': lambda c: c['ability_level'] == 'Masters',
+    'MASTERS SECTION': lambda c: c['ability_level'] == 'Masters',
+    'CUSTOM METHODOLOGY SECTION': lambda c: c['is_custom_plan'],
+    'CUSTOM FUELING SECTION': lambda c: c['is_custom_plan'],
+    'CUSTOM PLAN CALENDAR SECTION': lambda c: c['is_custom_plan'],
+    'STATIC PLAN TIER SECTION': lambda c: not c['is_custom_plan'],
+    'STATIC PLAN TESTING SECTION': lambda c: not c['is_custom_plan'],
+    'STATIC PLAN TIER NOTE': lambda c: not c['is_custom_plan'],
+}
+
+
+class TemplateBlock:
+    """A <!-- START X -->...<!-- END X --> region of a compiled template."""
+
+    __slots__ = ('name', 'predicate', 'segments')
+
+    def __init__(self, name, predicate, segments):
+        self.name = name
+        self.predicate = predicate
+        # Same (literal, item) layout as CompiledTemplate.segments; the
+        # START and END marker comments are part of the literals.
+        self.segments = segments
+
+
+class CompiledTemplate:
+    """
+    HTML template parsed once into literal segments, named slots and blocks.
+
+    Rendering walks the segment list and joins literals with slot values,
+    so the document is built in a single pass instead of one full copy per
+    placeholder. Slots without a value are emitted as their original
+    {{NAME}} text, exactly like an unmatched str.replace() would leave them.
+
+    START/END marker pairs become TemplateBlock nodes. Blocks with a
+    predicate in `predicates` are only rendered when the predicate accepts
+    the render conditions; excluded blocks are skipped without touching
+    their slots. Unbalanced markers are kept as plain literal text.
+    """
+
+    def __init__(self, source, predicates=None):
+        self.source = source
+        predicates = predicates or {}
+
+        # Each frame: [block name, start marker, segments, pending literals]
+        stack = [[None, None, [], []]]
+        position = 0
+        for match in TEMPLATE_TOKEN_PATTERN.finditer(source):
+            frame = stack[-1]
+            frame[3].append(source[position:match.start()])
+            position = match.end()
+            slot_name, marker, marker_name = match.groups()
+            if slot_name is not None:
+                frame[2].append((''.join(frame[3]), slot_name))
+                frame[3] = []
+            elif marker == 'START':
+                stack.append([marker_name, match.group(0), [], [match.group(0)]])
+            elif len(stack) > 1 and (frame[0] == marker_name or frame[0].startswith(marker_name + ' ')):
+                # END closes the innermost open block; the START marker may
+                # carry extra text (e.g. "ALTITUDE SECTION (3000+ ft)")
+                stack.pop()
+                frame[3].append(match.group(0))
+                frame[2].append((''.join(frame[3]), None))
+                block = TemplateBlock(marker_name, predicates.get(marker_name), frame[2])
+                parent = stack[-1]
+                parent[2].append((''.join(parent[3]), block))
+                parent[3] = []
+            else:
+                frame[3].append(match.group(0))
+        stack[-1][3].append(source[position:])
+
+        # Splice never-closed blocks back into their parent as plain content
+        while len(stack) > 1:
+            frame = stack.pop()
+            parent = stack[-1]
+            parent[2].append((''.join(parent[3]), None))
+            parent[2].extend(frame[2])
+            parent[3] = frame[3]
+
+        root = stack[0]
+        root[2].append((''.join(root[3]), None))
+        self.segments = root[2]
+
+        self.slot_names = set()
+        self.blocks = []
+        self._index(self.segments)
+
+    def _index(self, segments):
+        for _, item in segments:
+            if isinstance(item, TemplateBlock):
+                self.blocks.append(item)
+                self._index(item.segments)
+            elif item is not None:
+                self.slot_names.add(item)
+
+    def render(self, context, conditions=None, evaluated=None, unknown=None, resolved=None):
+        """
+        Render the template.
+
+        Args:
+            context: Dict mapping slot names (without braces) to values.
+                Callable values are lazy thunks: they are called at most
+                once, and only if a rendered slot references them.
+            conditions: Dict passed to block predicates; when None, every
+                block is rendered
+            evaluated: Optional list; names of the thunks that ran are
+                appended to it
+            unknown: Optional list; rendered slots with no context entry
+                are appended to it
+            resolved: Optional dict; filled with the string value of every
+                rendered slot
+        """
+        parts = []
+        resolved = resolved if resolved is not None else {}
+        self._render_segments(self.segments, context, conditions, parts.append, resolved, evaluated, unknown)
+        return ''.join(parts)
+
+    def render_to(self, fh, context, conditions=None, evaluated=None, unknown=None, batch_size=65536):
+        """
+        Stream the rendered template to an open text file.
+
+        Segments and slot values are written in batches of roughly
+        batch_size characters, so the full document is never held in memory.
+        Arguments are the same as render().
+        """
+        writer = _BatchWriter(fh, batch_size)
+        self._render_segments(self.segments, context, conditions, writer.append, {}, evaluated, unknown)
+        writer.flush()
+
+    def _render_segments(self, segments, context, conditions, append, resolved, evaluated, unknown):
+        for literal, item in segments:
+            append(literal)
+            if item is None:
+                continue
+            if type(item) is str:
+                if item in resolved:
+                    append(resolved[item])
+                elif item in context:
+                    value = context[item]
+                    if callable(value):
+                        value = value()
+                        if evaluated is not None:
+                            evaluated.append(thunk_name(context[item]))
+                    value = resolved[item] = str(value)
+                    append(value)
+                else:
+                    append(f'{{{{{item}}}}}')
+                    if unknown is not None:
+                        unknown.append(item)
+            elif conditions is None or item.predicate is None or item.predicate(conditions):
+                self._render_segments(item.segments, context, conditions, append, resolved, evaluated, unknown)
+
+
+class _BatchWriter:
+    __slots__ = ('fh', 'batch_size', 'parts', 'size')
+
+    def __init__(self, fh, batch_size):
+        self.fh = fh
+        self.batch_size = batch_size
+        self.parts = []
+        self.size = 0
+
+    def append(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.fh.write(''.join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+@contextmanager
+def open_atomic(output_path):
+    """
+    Open a temp file next to output_path for writing text.
+
+    On success the temp file is renamed over output_path, so readers never
+    see a partially written page; on error it is removed.
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def thunk_name(thunk):
+    """Return the generator name behind a lazy substitution value"""
+    return getattr(getattr(thunk, 'func', thunk), '__name__', repr(thunk))
+
+
+def race_content_hash(race_data):
+    """Stable content hash of a race data dict"""
+    canonical = json.dumps(race_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class FragmentCache:
+    """
+    Process-wide memo of race-level HTML fragments.
+
+    Every race is rendered once per plan variant, but fragments such as the
+    course description or rating hex depend only on race data. Entries are
+    keyed by (fragment name, race content hash), so each is built once per
+    race per build and reused by the remaining variants.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, generator, race_hash, *args):
+        """Return generator(*args), built at most once per race"""
+        key = (generator.__name__, race_hash)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        value = self.entries[key] = generator(*args)
+        return value
+
+    def thunk(self, race_hash, generator, *args):
+        """Lazy substitution value backed by this cache (args must derive from race data only)"""
+        return _CachedFragment(self, generator, race_hash, args)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class _CachedFragment:
+    __slots__ = ('cache', 'func', 'race_hash', 'args')
+
+    def __init__(self, cache, func, race_hash, args):
+        self.cache = cache
+        self.func = func
+        self.race_hash = race_hash
+        self.args = args
+
+    def __call__(self):
+        return self.cache.get(self.func, self.race_hash, *self.args)
+
+
+FRAGMENT_CACHE = FragmentCache()
+
+
+def load_compiled_template(css_href=None, font_href=None, fonts_css=None, critical=False, page_type=None):
+    """Load the HTML template (with fonts and brand CSS, see load_template()) and compile it for rendering"""
+    return TEMPLATE_CACHE.get(('compiled_template', css_href, font_href, critical, page_type),
+                              (TEMPLATE_PATH,) + _brand_css_paths(fonts_css, font_href),
+                              lambda: CompiledTemplate(load_template(css_href, font_href, fonts_css, critical,
+                                                                     page_type),
+                                                       CONDITIONAL_BLOCKS))
+
+
+def _first(*values):
+    """Return the first truthy value, or None"""
+    for value in values:
+        if value:
+            return value
+    return None
+
+
+def _to_int(value):
+    """Convert value to int, or None if it is missing or not numeric"""
+    try:
+        return int(value) if value else None
+    except (ValueError, TypeError):
+        return None
+
+
+DEFAULT_NON_NEGOTIABLES = [
+    {'requirement': 'Power meter or heart rate monitor', 'by_when': 'Week 1', 'why': 'Precise power data ensures correct training zones and optimal adaptation'},
+    {'requirement': 'Heart rate monitor', 'by_when': 'Week 1', 'why': 'Heart rate provides backup data and helps gauge recovery status'},
+    {'requirement': 'Professional bike fit', 'by_when': 'Week 2-3', 'why': 'Proper position prevents injury and maximizes power transfer'},
+    {'requirement': 'Consistent training', 'by_when': 'Ongoing', 'why': 'Consistency is the foundation of adaptation - skip weeks, lose gains'},
+    {'requirement': 'Follow the plan', 'by_when': 'Ongoing', 'why': 'The plan works if you work it - modifications undermine the system'}
+]
+
+
+class RaceModel:
+    """
+    Race data normalized once at load time.
+
+    Race JSON files come in several shapes (top-level fields, race_metadata,
+    race_characteristics, guide_variables). Every fallback chain is resolved
+    here, so generators read plain attributes instead of re-walking dicts
+    on every page. Missing values are None; each generator applies its own
+    display default.
+
+    Every generator sees the same value for a field, using generate_guide()'s
+    precedence (e.g. name: top-level, then race_metadata, then
+    guide_variables). Some fragments used to read a single source instead
+    (see GENERATOR_VERSION 2.1).
+    """
+
+    __slots__ = (
+        'content_hash', 'name', 'location', 'distance_miles', 'elevation_gain_feet', 'race_elevation',
+        'start_elevation_feet', 'terrain', 'terrain_description', 'technical_difficulty', 'technical_rating',
+        'climate', 'weather', 'weather_strategy', 'description', 'hook_punchy', 'hook_detail', 'overall_score',
+        'tier_rating', 'key_challenges', 'race_challenges', 'duration_estimate', 'skill_notes', 'tactics',
+        'aid_station_strategy', 'aid_stations', 'altitude_power_loss', 'recommended_tire_width', 'website',
+        'adventure_factor', 'time_cutoff', 'significance', 'non_negotiables',
+    )
+
+    def __init__(self, race_data):
+        metadata = race_data.get('race_metadata') or {}
+        chars = race_data.get('race_characteristics') or {}
+        guide_vars = race_data.get('guide_variables') or {}
+        hooks = race_data.get('race_hooks') or {}
+        significance = race_data.get('race_significance') or {}
+
+        self.content_hash = race_content_hash(race_data)
+        self.name = _first(race_data.get('name'), metadata.get('name'), guide_vars.get('race_name'))
+        self.location = metadata.get('location') or None
+        self.distance_miles = _first(race_data.get('distance_miles'), metadata.get('distance_miles'))
+        self.elevation_gain_feet = _to_int(_first(race_data.get('elevation_gain_feet'),
+                                                  metadata.get('elevation_feet'),
+                                                  race_data.get('elevation_feet')))
+        # Typical race altitude, used for the altitude section and rating
+        self.race_elevation = _to_int(_first(metadata.get('avg_elevation_feet'),
+                                             chars.get('altitude_feet'),
+                                             race_data.get('elevation_feet'),
+                                             race_data.get('avg_elevation_feet'),
+                                             race_data.get('altitude_feet'))) or 0
+        self.start_elevation_feet = _first(metadata.get('start_elevation_feet'), chars.get('altitude_feet'))
+        self.terrain = _first(chars.get('terrain'), race_data.get('terrain'))
+        self.terrain_description = _first(race_data.get('terrain_description'), guide_vars.get('race_terrain'))
+        self.technical_difficulty = chars.get('technical_difficulty') or None
+        self.technical_rating = race_data.get('technical_rating') or None
+        self.climate = chars.get('climate') or None
+        self.weather = _first(chars.get('typical_weather'), guide_vars.get('race_weather'))
+        self.weather_strategy = _first(chars.get('typical_weather'), race_data.get('weather_strategy'))
+        self.description = _first(race_data.get('description'), hooks.get('detail'))
+        self.hook_punchy = hooks.get('punchy') or ''
+        self.hook_detail = hooks.get('detail') or ''
+        self.overall_score = race_data.get('overall_score') or ''
+        self.tier_rating = race_data.get('tier_rating') or ''
+        self.race_challenges = tuple(guide_vars.get('race_challenges') or ())
+        self.key_challenges = _first(race_data.get('key_challenges'), ', '.join(self.race_challenges))
+        self.duration_estimate = race_data.get('duration_estimate', '10-15 hours')
+        self.skill_notes = race_data.get('specific_skill_notes') or None
+        self.tactics = race_data.get('specific_tactics') or None
+        self.aid_station_strategy = race_data.get('aid_station_strategy') or None
+        self.aid_stations = race_data.get('aid_stations', 'well-supported')
+        self.altitude_power_loss = race_data.get('altitude_power_loss') or None
+        self.recommended_tire_width = race_data.get('recommended_tire_width') or None
+        self.website = race_data.get('website') or None
+        self.adventure_factor = race_data.get('adventure_factor', 'moderate')
+        self.time_cutoff = race_data.get('time_cutoff', 'None')
+        self.significance = {
+            'iconic_status': _first(significance.get('iconic_status'),
+                                    race_data.get('iconic_status'),
+                                    (race_data.get('marketplace_variables') or {}).get('iconic_status')) or '',
+            'organization_quality': significance.get('organization_quality', ''),
+            'energy': significance.get('energy', ''),
+            'community': significance.get('community', ''),
+            'field_depth': significance.get('field_depth', ''),
+            'entry_fee': significance.get('entry_fee', ''),
+            'travel_lodging': significance.get('travel_lodging', ''),
+        } if significance else None
+        self.non_negotiables = _resolve_non_negotiables(race_data)
+
+    @classmethod
+    def coerce(cls, race_data):
+        """Return race_data as a RaceModel, building one from a dict if needed"""
+        return race_data if isinstance(race_data, cls) else cls(race_data)
+
+
+def _resolve_non_negotiables(race_data):
+    """Resolve the five non-negotiables, handling dict and string formats"""
     # Check multiple possible locations for non_negotiables
-    non_negs = (race_data.get('non_negotiables', []) or
-                race_data.get('race_metadata', {}).get('non_negotiables', []) or
-                race_data.get('guide_variables', {}).get('non_negotiables', []))
-    if index < len(non_negs):
-        nn = non_negs[index]
-        if isinstance(nn, dict):
-            return {
-                'requirement': nn.get('requirement', ''),
-                'by_when': nn.get('by_when', ''),
-                'why': nn.get('why', '')
-            }
+    non_negs = (race_data.get('non_negotiables') or
+                (race_data.get('race_metadata') or {}).get('non_negotiables') or
+                (race_data.get('guide_variables') or {}).get('non_negotiables') or [])
+    resolved = []
+    for index in range(max(len(non_negs), len(DEFAULT_NON_NEGOTIABLES))):
+        if index < len(non_negs):
+            nn = non_negs[index]
+            if isinstance(nn, dict):
+                resolved.append({
+                    'requirement': nn.get('requirement', ''),
+                    'by_when': nn.get('by_when', ''),
+                    'why': nn.get('why', '')
+                })
+            else:
+                # String format - use as requirement
+                resolved.append({'requirement': str(nn), 'by_when': '', 'why': ''})
         else:
-            # String format - use as requirement
-            return {
-                'requirement': str(nn),
-                'by_when': '',
-                'why': ''
-            }
-    # Defaults
-    defaults = [
-        {'requirement': 'Power meter or heart rate monitor', 'by_when': 'Week 1', 'why': 'Precise power data ensures correct training zones and optimal adaptation'},
-        {'requirement': 'Heart rate monitor', 'by_when': 'Week 1', 'why': 'Heart rate provides backup data and helps gauge recovery status'},
-        {'requirement': 'Professional bike fit', 'by_when': 'Week 2-3', 'why': 'Proper position prevents injury and maximizes power transfer'},
-        {'requirement': 'Consistent training', 'by_when': 'Ongoing', 'why': 'Consistency is the foundation of adaptation - skip weeks, lose gains'},
-        {'requirement': 'Follow the plan', 'by_when': 'Ongoing', 'why': 'The plan works if you work it - modifications undermine the system'}
-    ]
-    return defaults[index] if index < len(defaults) else {'requirement': '', 'by_when': '', 'why': ''}
+            resolved.append(DEFAULT_NON_NEGOTIABLES[index])
+    return tuple(resolved)
+
+
+def load_race_data(race_json_path):
+    """Load race data from JSON file and normalize it into a RaceModel"""
+    with open(race_json_path, 'r', encoding='utf-8') as f:
+        return RaceModel(json.load(f))
+
+
+def extract_non_negotiables(race_data, index):
+    """Extract non-negotiable data from a RaceModel or raw race dict"""
+    if isinstance(race_data, RaceModel):
+        resolved = race_data.non_negotiables
+    else:
+        resolved = _resolve_non_negotiables(race_data)
+    return resolved[index] if index < len(resolved) else {'requirement': '', 'by_when': '', 'why': ''}
 
 
-def generate_guide(race_data, tier_name, ability_level, output_path, athlete_data: Optional[Dict] = None):
+def generate_guide(race_data, tier_name, ability_level, output_path, athlete_data: Optional[Dict] = None,
+                   report: Optional[Dict] = None, plan_weeks: Optional[int] = None, verbose: bool = True,
+                   stream: bool = False, css_href: Optional[str] = None, minify: bool = False,
+                   fonts_css: Optional[str] = None, critical_css: bool = False, prune_css: bool = False,
+                   split_sections: bool = False, font_href: Optional[str] = None, embed_fonts: bool = False):
     """
     Generate a training guide for a specific race, tier, and ability level.
 
     Args:
-        race_data: Dict containing race information
+        race_data: RaceModel (from load_race_data) or dict of race information
         tier_name: str - "AYAHUASCA", "FINISHER", "COMPETE", or "PODIUM"
         ability_level: str - "Beginner", "Intermediate", or "Advanced"
         output_path: str - Where to save the generated HTML
@@ -116,7 +1081,45 @@ def generate_guide(race_data, tier_name, ability_level, output_path, athlete_dat
             - derived: Derived classifications
             - methodology: Selected training methodology
             - fueling: Personalized fueling calculations
+        report: Optional dict filled with per-render details:
+            - generators_run: fragment generators that were evaluated
+            - generators_skipped: fragment generators never referenced
+            - fragment_cache: race-level fragment cache counters and hit rate
+        plan_weeks: Optional plan length for static plans (defaults to 12)
+        verbose: Print progress lines (batch builds turn this off)
+        stream: Write the page straight to a temp file while rendering and
+            rename it into place, instead of building it as one string
+        css_href: Link the brand CSS from this URL (see write_stylesheet())
+            instead of inlining it into the page
+        minify: Run the page through minify_html() before writing it; the
+            byte counts are added to report as 'minify'. The page is built
+            in memory, so this takes precedence over stream.
+        fonts_css: @font-face stylesheet to use instead of
+            brand/fonts/fonts.css, e.g. one generated by subset_fonts.py
+        critical_css: With css_href, inline only the above-the-fold rules
+            and load the stylesheet asynchronously (see critical_css())
+        prune_css: Drop the brand CSS rules this page's type can never
+            use (see page_type_css()). Linked pages get a per-type
+            stylesheet written next to css_href; its path is added to
+            report as 'stylesheet'. A page that styles tokens its type's
+            reference page lacks (see uncovered_tokens()) is re-rendered
+            with the full CSS and the tokens are added to report as
+            'prune_css_uncovered'. The page is built in memory, so this
+            takes precedence over stream.
+        split_sections: Write a shell page holding only the first section
+            and move the others to sections/<id>.html next to it, loaded on
+            demand (see split_sections.py); the counts are added to report
+            as 'split_sections'. Like minify, this takes precedence over
+            stream.
+        font_href: For inline pages, the URL of a font directory that
+            already holds the fonts (see write_fonts()), e.g. one shared by
+            a batch build. By default the fonts are copied to assets/fonts/
+            next to the page. Linked pages use the fonts next to css_href.
+        embed_fonts: Inline pages only: embed the regular latin fonts as
+            data: URIs for a single-file page instead of linking them (see
+            embedded_font_css())
     """
+    log = print if verbose else _quiet
 
     # Extract athlete-specific data if provided (custom coaching)
     is_custom_plan = athlete_data is not None
@@ -125,66 +1128,22 @@ def generate_guide(race_data, tier_name, ability_level, output_path, athlete_dat
     methodology = athlete_data.get('methodology', {}) if athlete_data else {}
     fueling = athlete_data.get('fueling', {}) if athlete_data else {}
     
-    # Load template
-    template = load_template()
-    
-    # Helper function to safely extract nested data
-    def get_nested(data, *keys, default=None):
-        """Safely extract nested dictionary values"""
-        for key in keys:
-            if isinstance(data, dict):
-                data = data.get(key)
-            else:
-                return default
-            if data is None:
-                return default
-        return data if data is not None else default
-    
-    # Extract race data from nested structure
-    race_metadata = race_data.get('race_metadata', {})
-    guide_vars = race_data.get('guide_variables', {})
-    race_chars = race_data.get('race_characteristics', {})
-    
-    # Extract elevation gain - check multiple possible locations
-    elevation_gain = (race_data.get('elevation_gain_feet') or 
-                     race_metadata.get('elevation_feet') or
-                     race_data.get('elevation_feet') or 0)
-    try:
-        elevation_gain = int(elevation_gain) if elevation_gain else 0
-        elevation_gain_str = f"~{elevation_gain:,} ft" if elevation_gain else "~11,000 ft"
-    except (ValueError, TypeError):
-        elevation_gain_str = "~11,000 ft"
-    
-    # Extract race name
-    race_name = (race_data.get('name') or 
-                race_metadata.get('name') or 
-                guide_vars.get('race_name') or 
-                'Race Name')
-    
-    # Extract distance
-    distance = (race_data.get('distance_miles') or 
-               race_metadata.get('distance_miles') or 
-               'XXX')
-    
-    # Extract terrain description
-    terrain_desc = (race_data.get('terrain_description') or 
-                   guide_vars.get('race_terrain') or 
-                   'varied terrain')
-    
-    # Extract description
-    description = (race_data.get('description') or 
-                  race_data.get('race_hooks', {}).get('detail') or 
-                  'Race description here')
-    
-    # Extract key challenges
-    challenges = (race_data.get('key_challenges') or 
-                 ', '.join(guide_vars.get('race_challenges', [])) or 
-                 'technical terrain, elevation, and endurance')
-    
-    # Extract duration estimate
-    duration = race_data.get('duration_estimate', '10-15 hours')
-    
-    # Build substitution dictionary
+    # Race fields are resolved once in RaceModel; accept raw dicts too
+    race = RaceModel.coerce(race_data)
+
+    elevation_gain = race.elevation_gain_feet or 0
+    elevation_gain_str = f"~{elevation_gain:,} ft" if elevation_gain else "~11,000 ft"
+    race_name = race.name or 'Race Name'
+    distance = race.distance_miles or 'XXX'
+    terrain_desc = race.terrain_description or 'varied terrain'
+    description = race.description or 'Race description here'
+    challenges = race.key_challenges or 'technical terrain, elevation, and endurance'
+    duration = race.duration_estimate
+    
+    # Build substitution dictionary. Fragment generators are wrapped in
+    # lazy thunks so they only run if a rendered slot actually uses them;
+    # fragments that depend only on race data are shared across variants.
+    race_fragment = partial(FRAGMENT_CACHE.thunk, race.content_hash)
     substitutions = {
         '{{RACE_NAME}}': race_name,
         '{{DISTANCE}}': str(distance),
@@ -196,66 +1155,65 @@ def generate_guide(race_data, tier_name, ability_level, output_path, athlete_dat
         '{{TIER_NAME}}': tier_name,
         '{{PAGE_TITLE}}': f"{race_name} – {tier_name} · {ability_level} Guide",  # Default for static plans
         '{{WEEKLY_HOURS}}': get_weekly_hours(tier_name),
-        '{{plan_weeks}}': '12',  # Default to 12 weeks, can be made dynamic
+        '{{plan_weeks}}': str(plan_weeks or 12),
         '{{RACE_KEY_CHALLENGES}}': challenges,
         '{{WEEKLY_STRUCTURE_DESCRIPTION}}': get_weekly_structure(tier_name),
         '{{RACE_ELEVATION}}': str(elevation_gain),
-        '{{RACE_SPECIFIC_SKILL_NOTES}}': (race_data.get('specific_skill_notes') or 
+        '{{RACE_SPECIFIC_SKILL_NOTES}}': (race.skill_notes or 
                                           'Practice descending, cornering, and rough terrain handling.'),
-        '{{RACE_SPECIFIC_TACTICS}}': (race_data.get('specific_tactics') or 
+        '{{RACE_SPECIFIC_TACTICS}}': (race.tactics or 
                                       'Start conservatively. Fuel early and often. Be patient on climbs.'),
-        '{{WEATHER_STRATEGY}}': (race_chars.get('typical_weather') or 
-                                race_data.get('weather_strategy') or 
+        '{{WEATHER_STRATEGY}}': (race.weather_strategy or 
                                 'Check forecast week of. Pack layers.'),
-        '{{AID_STATION_STRATEGY}}': (race_data.get('aid_station_strategy') or 
+        '{{AID_STATION_STRATEGY}}': (race.aid_station_strategy or 
                                     'Use aid stations for quick refills. Don\'t linger.'),
-        '{{ALTITUDE_POWER_LOSS}}': (race_data.get('altitude_power_loss') or 
+        '{{ALTITUDE_POWER_LOSS}}': (race.altitude_power_loss or 
                                     'Minimal - race is at low elevation'),
-        '{{RECOMMENDED_TIRE_WIDTH}}': (race_data.get('recommended_tire_width') or 
+        '{{RECOMMENDED_TIRE_WIDTH}}': (race.recommended_tire_width or 
                                       '38-42mm'),
-        '{{EQUIPMENT_CHECKLIST}}': generate_equipment_checklist(race_data),
-        '{{RACE_SUPPORT_URL}}': (race_data.get('website') or 
+        '{{EQUIPMENT_CHECKLIST}}': race_fragment(generate_equipment_checklist, race),
+        '{{RACE_SUPPORT_URL}}': (race.website or 
                                  'https://unboundgravel.com'),
         
         # New placeholders for improved Section 1
         '{{PLAN_TITLE}}': get_plan_title(tier_name, ability_level, race_name),
-        '{{RACE_INTRO_PARAGRAPH}}': generate_race_intro_paragraph(race_data),
-        '{{COURSE_DESCRIPTION_PARAGRAPH}}': generate_course_description_paragraph(race_data),
-        '{{RACE_SIGNIFICANCE_PARAGRAPH}}': generate_race_significance_paragraph(race_data),
-        '{{WHAT_IT_TAKES_TO_FINISH}}': generate_what_it_takes_to_finish(race_data),
-        '{{PLAN_PREPARATION_SUMMARY}}': generate_plan_preparation_summary(race_data, race_name),
-        '{{RACE_LOCATION_REFERENCE}}': (f" in {race_metadata.get('location', '')}" if race_metadata.get('location') else ""),
+        '{{RACE_INTRO_PARAGRAPH}}': race_fragment(generate_race_intro_paragraph, race),
+        '{{COURSE_DESCRIPTION_PARAGRAPH}}': race_fragment(generate_course_description_paragraph, race),
+        '{{RACE_SIGNIFICANCE_PARAGRAPH}}': race_fragment(generate_race_significance_paragraph, race),
+        '{{WHAT_IT_TAKES_TO_FINISH}}': race_fragment(generate_what_it_takes_to_finish, race),
+        '{{PLAN_PREPARATION_SUMMARY}}': race_fragment(generate_plan_preparation_summary, race, race_name),
+        '{{RACE_LOCATION_REFERENCE}}': (f" in {race.location}" if race.location else ""),
         '{{ABILITY_LEVEL_EXPLANATION}}': get_ability_level_explanation(ability_level),
         '{{TIER_VOLUME_EXPLANATION}}': get_tier_volume_explanation(tier_name),
         '{{PERFORMANCE_EXPECTATIONS}}': get_performance_expectations(tier_name, ability_level),
         
         # Infographic placeholders (now all generated as HTML tables/diagrams)
         '{{INFOGRAPHIC_PHASE_BARS}}': '[Phase progression infographic]',  # Could be enhanced later
-        '{{INFOGRAPHIC_RATING_HEX}}': generate_rating_hex(race_data),
-        '{{INFOGRAPHIC_DIFFICULTY_TABLE}}': generate_difficulty_table(race_data),
-        '{{INFOGRAPHIC_FUELING_TABLE}}': generate_fueling_table(race_data),
-        '{{INFOGRAPHIC_MENTAL_MAP}}': generate_mental_map(race_data),
-        '{{INFOGRAPHIC_THREE_ACTS}}': generate_three_acts(race_data),
-        '{{INFOGRAPHIC_INDOOR_OUTDOOR_DECISION}}': generate_indoor_outdoor_decision(race_data),
-        '{{INFOGRAPHIC_TIRE_DECISION}}': generate_tire_decision(race_data),
-        '{{INFOGRAPHIC_KEY_WORKOUT_SUMMARY}}': generate_key_workout_summary(race_data),
+        '{{INFOGRAPHIC_RATING_HEX}}': race_fragment(generate_rating_hex, race),
+        '{{INFOGRAPHIC_DIFFICULTY_TABLE}}': race_fragment(generate_difficulty_table, race),
+        '{{INFOGRAPHIC_FUELING_TABLE}}': race_fragment(generate_fueling_table, race),
+        '{{INFOGRAPHIC_MENTAL_MAP}}': race_fragment(generate_mental_map, race),
+        '{{INFOGRAPHIC_THREE_ACTS}}': race_fragment(generate_three_acts, race),
+        '{{INFOGRAPHIC_INDOOR_OUTDOOR_DECISION}}': race_fragment(generate_indoor_outdoor_decision, race),
+        '{{INFOGRAPHIC_TIRE_DECISION}}': race_fragment(generate_tire_decision, race),
+        '{{INFOGRAPHIC_KEY_WORKOUT_SUMMARY}}': race_fragment(generate_key_workout_summary, race),
         
-        # Non-negotiables (extract from race_data)
-        '{{NON_NEG_1_REQUIREMENT}}': extract_non_negotiables(race_data, 0)['requirement'],
-        '{{NON_NEG_1_BY_WHEN}}': extract_non_negotiables(race_data, 0)['by_when'],
-        '{{NON_NEG_1_WHY}}': extract_non_negotiables(race_data, 0)['why'],
-        '{{NON_NEG_2_REQUIREMENT}}': extract_non_negotiables(race_data, 1)['requirement'],
-        '{{NON_NEG_2_BY_WHEN}}': extract_non_negotiables(race_data, 1)['by_when'],
-        '{{NON_NEG_2_WHY}}': extract_non_negotiables(race_data, 1)['why'],
-        '{{NON_NEG_3_REQUIREMENT}}': extract_non_negotiables(race_data, 2)['requirement'],
-        '{{NON_NEG_3_BY_WHEN}}': extract_non_negotiables(race_data, 2)['by_when'],
-        '{{NON_NEG_3_WHY}}': extract_non_negotiables(race_data, 2)['why'],
-        '{{NON_NEG_4_REQUIREMENT}}': extract_non_negotiables(race_data, 3)['requirement'],
-        '{{NON_NEG_4_BY_WHEN}}': extract_non_negotiables(race_data, 3)['by_when'],
-        '{{NON_NEG_4_WHY}}': extract_non_negotiables(race_data, 3)['why'],
-        '{{NON_NEG_5_REQUIREMENT}}': extract_non_negotiables(race_data, 4)['requirement'],
-        '{{NON_NEG_5_BY_WHEN}}': extract_non_negotiables(race_data, 4)['by_when'],
-        '{{NON_NEG_5_WHY}}': extract_non_negotiables(race_data, 4)['why'],
+        # Non-negotiables (resolved once in RaceModel)
+        '{{NON_NEG_1_REQUIREMENT}}': race.non_negotiables[0]['requirement'],
+        '{{NON_NEG_1_BY_WHEN}}': race.non_negotiables[0]['by_when'],
+        '{{NON_NEG_1_WHY}}': race.non_negotiables[0]['why'],
+        '{{NON_NEG_2_REQUIREMENT}}': race.non_negotiables[1]['requirement'],
+        '{{NON_NEG_2_BY_WHEN}}': race.non_negotiables[1]['by_when'],
+        '{{NON_NEG_2_WHY}}': race.non_negotiables[1]['why'],
+        '{{NON_NEG_3_REQUIREMENT}}': race.non_negotiables[2]['requirement'],
+        '{{NON_NEG_3_BY_WHEN}}': race.non_negotiables[2]['by_when'],
+        '{{NON_NEG_3_WHY}}': race.non_negotiables[2]['why'],
+        '{{NON_NEG_4_REQUIREMENT}}': race.non_negotiables[3]['requirement'],
+        '{{NON_NEG_4_BY_WHEN}}': race.non_negotiables[3]['by_when'],
+        '{{NON_NEG_4_WHY}}': race.non_negotiables[3]['why'],
+        '{{NON_NEG_5_REQUIREMENT}}': race.non_negotiables[4]['requirement'],
+        '{{NON_NEG_5_BY_WHEN}}': race.non_negotiables[4]['by_when'],
+        '{{NON_NEG_5_WHY}}': race.non_negotiables[4]['why'],
         
         # Skill placeholder examples (would be race-specific)
         '{{SKILL_5_NAME}}': 'Emergency Repairs',
@@ -444,8 +1402,8 @@ def generate_guide(race_data, tier_name, ability_level, output_path, athlete_dat
                 substitutions['{{GUT_TRAINING_PHASES}}'] = ''
 
             # Personalized fueling table (overrides generic one)
-            substitutions['{{INFOGRAPHIC_FUELING_TABLE}}'] = generate_personalized_fueling_table(
-                fueling, race_data, profile
+            substitutions['{{INFOGRAPHIC_FUELING_TABLE}}'] = partial(
+                generate_personalized_fueling_table, fueling, race, profile
             )
 
             # Pre-race nutrition
@@ -550,81 +1508,118 @@ def generate_guide(race_data, tier_name, ability_level, output_path, athlete_dat
         substitutions['{{IS_CUSTOM_PLAN}}'] = 'false'
         substitutions['{{ATHLETE_FIRST_NAME}}'] = ''
 
-    # Perform all substitutions
-    output = template
-    for placeholder, value in substitutions.items():
-        output = output.replace(placeholder, str(value))
-    
-    # Conditionally remove altitude section if elevation < 3000 feet
-    # Check multiple possible field names for elevation
-    race_elevation = 0
-    if isinstance(race_data, dict):
-        race_elevation = (race_data.get('race_metadata', {}).get('avg_elevation_feet', 0) or
-                         race_data.get('race_characteristics', {}).get('altitude_feet', 0) or
-                         race_data.get('elevation_feet', 0) or
-                         race_data.get('avg_elevation_feet', 0) or
-                         race_data.get('altitude_feet', 0))
-    
-    try:
-        race_elevation = int(race_elevation) if race_elevation else 0
-    except (ValueError, TypeError):
-        race_elevation = 0
-    
+    # Altitude section is only kept for races at 3000+ feet
+    race_elevation = race.race_elevation
+
+    # Conditional blocks (see CONDITIONAL_BLOCKS) are resolved while
+    # rendering, so excluded sections are never substituted or scanned
+    conditions = {
+        'race_elevation': race_elevation,
+        'ability_level': ability_level,
+        'is_custom_plan': is_custom_plan,
+    }
+
+    # Load and compile template
+    if css_href:
+        font_href = page_font_href(css_href)
+    elif embed_fonts:
+        font_href = EMBEDDED_FONTS
+    elif font_href is None:
+        write_fonts(Path(output_path).parent / ASSETS_DIR_NAME, fonts_css)
+        font_href = page_font_href()
+    pruned_type = page_type(conditions) if prune_css else None
+    pruned_href = css_href
+    if pruned_type is not None and css_href:
+        # Per-type stylesheet next to the shared one
+        pruned_href = posixpath.join(posixpath.dirname(css_href), stylesheet_name(fonts_css, pruned_type))
+    template = load_compiled_template(pruned_href, font_href, fonts_css, critical_css, pruned_type)
+
+    generators_run = []
+    unknown = []
+    context = {placeholder[2:-2]: value for placeholder, value in substitutions.items()}
+    slot_values = {}
+    in_memory = not stream or minify or split_sections or prune_css
+    if not in_memory:
+        with open_atomic(output_path) as f:
+            template.render_to(f, context, conditions, generators_run, unknown)
+    else:
+        output = template.render(context, conditions, generators_run, unknown, slot_values)
+
+    if pruned_type is not None:
+        uncovered = uncovered_tokens(slot_values.values(), pruned_type, fonts_css)
+        if uncovered:
+            # The pruned CSS may lack rules this page needs: re-render it
+            # against the full stylesheet
+            log(f"  ⚠ Pruned CSS does not cover {', '.join(uncovered)}; using the full stylesheet")
+            if report is not None:
+                report['prune_css_uncovered'] = uncovered
+            generators_run = []
+            unknown = []
+            template = load_compiled_template(css_href, font_href, fonts_css, critical_css)
+            output = template.render(context, conditions, generators_run, unknown)
+        elif css_href:
+            assets_dir = (Path(output_path).parent / posixpath.dirname(css_href)).resolve()
+            stylesheet = write_stylesheet(assets_dir, fonts_css, pruned_type)
+            if report is not None:
+                report['stylesheet'] = str(stylesheet)
+    thunks = [thunk_name(value) for value in substitutions.values() if callable(value)]
+    generators_skipped = [name for name in thunks if name not in generators_run]
+    if report is not None:
+        report['generators_run'] = generators_run
+        report['generators_skipped'] = generators_skipped
+        report['fragment_cache'] = FRAGMENT_CACHE.stats()
+        report['unknown_placeholders'] = sorted(set(unknown))
+
+    if minify:
+        bytes_before = len(output.encode('utf-8'))
+        output = minify_html(output)
+        bytes_after = len(output.encode('utf-8'))
+        if report is not None:
+            report['minify'] = {'bytes_before': bytes_before, 'bytes_after': bytes_after}
+        log(f"  → Minified: {bytes_before:,} → {bytes_after:,} bytes (saved {bytes_before - bytes_after:,})")
+
+    if split_sections:
+        output, fragments = split_page(output)
+        fragment_bytes = write_fragments(Path(output_path).parent, output, fragments)
+        if report is not None:
+            report['split_sections'] = {'sections': len(fragments), 'fragment_bytes': fragment_bytes}
+        log(f"  → Split: {len(fragments)} sections ({fragment_bytes:,} bytes) moved to {FRAGMENT_DIR_NAME}/")
+
     if race_elevation < 3000:
-        # Remove altitude section (between START and END comments)
-        altitude_pattern = r'<!-- START ALTITUDE SECTION[^>]*-->.*?<!-- END ALTITUDE SECTION -->'
-        output = re.sub(altitude_pattern, '', output, flags=re.DOTALL)
-        print(f"  → Removed altitude section (race elevation: {race_elevation} feet < 3000)")
+        log(f"  → Removed altitude section (race elevation: {race_elevation} feet < 3000)")
     else:
-        print(f"  → Included altitude section (race elevation: {race_elevation} feet >= 3000)")
+        log(f"  → Included altitude section (race elevation: {race_elevation} feet >= 3000)")
     
-    # Conditionally remove Masters section if not a Masters plan
     if ability_level != 'Masters':
-        # Remove Masters section from TOC
-        masters_toc_pattern = r'<!-- START MASTERS SECTION TOC -->.*?<!-- END MASTERS SECTION TOC -->'
-        output = re.sub(masters_toc_pattern, '', output, flags=re.DOTALL)
-        # Remove Masters section content
-        masters_section_pattern = r'<!-- START MASTERS SECTION -->.*?<!-- END MASTERS SECTION -->'
-        output = re.sub(masters_section_pattern, '', output, flags=re.DOTALL)
-        print(f"  → Removed Masters section (not a Masters plan)")
+        log(f"  → Removed Masters section (not a Masters plan)")
     else:
-        print(f"  → Included Masters section (Masters plan)")
+        log(f"  → Included Masters section (Masters plan)")
 
-    # Conditionally remove custom plan sections if not a custom plan
     if not is_custom_plan:
-        # Remove custom methodology section
-        custom_methodology_pattern = r'<!-- START CUSTOM METHODOLOGY SECTION -->.*?<!-- END CUSTOM METHODOLOGY SECTION -->'
-        output = re.sub(custom_methodology_pattern, '', output, flags=re.DOTALL)
-        # Remove custom fueling section
-        custom_fueling_pattern = r'<!-- START CUSTOM FUELING SECTION -->.*?<!-- END CUSTOM FUELING SECTION -->'
-        output = re.sub(custom_fueling_pattern, '', output, flags=re.DOTALL)
-        # Remove custom plan calendar section
-        custom_calendar_pattern = r'<!-- START CUSTOM PLAN CALENDAR SECTION -->.*?<!-- END CUSTOM PLAN CALENDAR SECTION -->'
-        output = re.sub(custom_calendar_pattern, '', output, flags=re.DOTALL)
-        print(f"  → Removed custom plan sections (not a custom plan)")
+        log(f"  → Removed custom plan sections (not a custom plan)")
     else:
-        # For custom plans, remove the static tier/ability sections (AYAHUASCA, etc.)
-        static_tier_pattern = r'<!-- START STATIC PLAN TIER SECTION -->.*?<!-- END STATIC PLAN TIER SECTION -->'
-        output = re.sub(static_tier_pattern, '', output, flags=re.DOTALL)
-        # Remove testing requirements section for custom plans (coach handles this)
-        static_testing_pattern = r'<!-- START STATIC PLAN TESTING SECTION -->.*?<!-- END STATIC PLAN TESTING SECTION -->'
-        output = re.sub(static_testing_pattern, '', output, flags=re.DOTALL)
-        # Remove tier note mentioning Ayahuasca/Finisher/etc
-        static_tier_note_pattern = r'<!-- START STATIC PLAN TIER NOTE -->.*?<!-- END STATIC PLAN TIER NOTE -->'
-        output = re.sub(static_tier_note_pattern, '', output, flags=re.DOTALL)
         name_field = profile.get('name', 'Athlete')
         display_name = name_field.get('first', 'Athlete') if isinstance(name_field, dict) else str(name_field).split()[0]
-        print(f"  → Included custom plan sections (custom coaching plan for {display_name})")
-        print(f"  → Removed static tier/testing sections (not needed for custom plans)")
+        log(f"  → Included custom plan sections (custom coaching plan for {display_name})")
+        log(f"  → Removed static tier/testing sections (not needed for custom plans)")
+
+    log(f"  → Ran {len(generators_run)} of {len(thunks)} fragment generators")
+    if unknown:
+        log(f"  ⚠ Unknown placeholders left in page: {', '.join(sorted(set(unknown)))}")
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(output)
+    # Write output (streaming mode has already written it)
+    if in_memory:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(output)
     
-    print(f"✓ Generated: {output_path}")
+    log(f"✓ Generated: {output_path}")
     return output_path
 
 
+def _quiet(*args, **kwargs):
+    pass
+
+
 def get_weekly_hours(tier_name):
     """Return weekly hours for each tier"""
     hours = {
@@ -732,17 +1727,13 @@ def get_performance_expectations(tier_name, ability_level):
     return base_expectation
 
 
-def generate_race_intro_paragraph(race_data):
+def generate_race_intro_paragraph(race):
     """Generate race introduction paragraph"""
-    race_hooks = race_data.get('race_hooks', {})
-    punchy = race_hooks.get('punchy', '')
-    detail = race_hooks.get('detail', '')
-    
-    # Try to get overall score/rating if available
-    overall_score = race_data.get('overall_score', '')
-    tier_rating = race_data.get('tier_rating', '')
+    # Overall score/rating are appended if available
+    overall_score = race.overall_score
+    tier_rating = race.tier_rating
     
-    intro = f"{punchy} {detail}".strip()
+    intro = f"{race.hook_punchy} {race.hook_detail}".strip()
     
     if overall_score and tier_rating:
         intro += f" Overall Score: {overall_score} ({tier_rating})."
@@ -750,24 +1741,20 @@ def generate_race_intro_paragraph(race_data):
     return intro if intro else "This is a challenging gravel race that requires specific preparation."
 
 
-def generate_course_description_paragraph(race_data):
+def generate_course_description_paragraph(race):
     """Generate 'What the Course Is Like' paragraph from 7 variables"""
-    race_metadata = race_data.get('race_metadata', {})
-    race_chars = race_data.get('race_characteristics', {})
-    guide_vars = race_data.get('guide_variables', {})
-    
-    distance = race_metadata.get('distance_miles', race_data.get('distance_miles', 200))
-    elevation = race_metadata.get('elevation_feet', race_data.get('elevation_feet', 0))
-    terrain = race_chars.get('terrain', 'varied')
-    technical = race_chars.get('technical_difficulty', 'moderate')
-    climate = race_chars.get('climate', 'temperate')
-    weather = race_chars.get('typical_weather', guide_vars.get('race_weather', 'Variable conditions'))
-    altitude = race_metadata.get('start_elevation_feet', race_chars.get('altitude_feet', 0))
-    support = race_data.get('aid_stations', 'well-supported')
-    adventure = race_data.get('adventure_factor', 'moderate')
+    distance = race.distance_miles or 200
+    elevation = race.elevation_gain_feet or 0
+    terrain = race.terrain or 'varied'
+    technical = race.technical_difficulty or 'moderate'
+    climate = race.climate or 'temperate'
+    weather = race.weather or 'Variable conditions'
+    altitude = race.start_elevation_feet or 0
+    support = race.aid_stations
+    adventure = race.adventure_factor
     
     # Build paragraph
-    desc = f"The {race_metadata.get('name', 'race')} covers {distance} miles"
+    desc = f"The {race.name or 'race'} covers {distance} miles"
     
     if elevation > 0:
         desc += f" with {elevation:,} feet of cumulative elevation gain"
@@ -798,30 +1785,25 @@ def generate_course_description_paragraph(race_data):
     return desc
 
 
-def generate_race_significance_paragraph(race_data):
+def generate_race_significance_paragraph(race):
     """Generate 'Why This Race Matters' paragraph from 7 variables"""
-    race_name = race_data.get('race_metadata', {}).get('name', 'This race')
-    significance = race_data.get('race_significance', {})
-    race_hooks = race_data.get('race_hooks', {})
-    
-    # Extract significance variables (try multiple sources)
-    iconic = (significance.get('iconic_status') or 
-             race_data.get('iconic_status') or
-             race_data.get('marketplace_variables', {}).get('iconic_status', ''))
-    
-    organization = significance.get('organization_quality', '')
-    energy = significance.get('energy', '')
-    community = significance.get('community', '')
-    field_depth = significance.get('field_depth', '')
-    entry_fee = significance.get('entry_fee', '')
-    travel = significance.get('travel_lodging', '')
+    race_name = race.name or 'This race'
+    significance = race.significance
     
     # Special handling for known iconic races
     if 'unbound' in race_name.lower():
-        return f"{race_name} is the most iconic gravel race in the world—Unbound is gravel cycling. The organization is flawless, the course is legendary, and the event execution sets the industry standard. The energy, the field, the community—this is what gravel racing aspires to be. Thousands of riders create incredible camaraderie, and the volunteers make it unforgettable. The field depth is unmatched—the pros, the weekend warriors, and everyone in between. Entry fees are premium, but you get what you pay for. Travel and lodging in {race_data.get('race_metadata', {}).get('location', 'Emporia')} aren't cheap, but manageable with planning."
+        return f"{race_name} is the most iconic gravel race in the world—Unbound is gravel cycling. The organization is flawless, the course is legendary, and the event execution sets the industry standard. The energy, the field, the community—this is what gravel racing aspires to be. Thousands of riders create incredible camaraderie, and the volunteers make it unforgettable. The field depth is unmatched—the pros, the weekend warriors, and everyone in between. Entry fees are premium, but you get what you pay for. Travel and lodging in {race.location or 'Emporia'} aren't cheap, but manageable with planning."
     
     # Build from significance data if available
     if significance:
+        iconic = significance['iconic_status']
+        organization = significance['organization_quality']
+        energy = significance['energy']
+        community = significance['community']
+        field_depth = significance['field_depth']
+        entry_fee = significance['entry_fee']
+        travel = significance['travel_lodging']
+
         desc_parts = []
         
         if iconic:
@@ -851,18 +1833,16 @@ def generate_race_significance_paragraph(race_data):
             return " ".join(desc_parts)
     
     # Fallback: use race hooks detail if available
-    if race_hooks.get('detail'):
-        detail = race_hooks.get('detail', '')
-        return f"{race_name} is a significant event in the gravel racing calendar. {detail}"
+    if race.hook_detail:
+        return f"{race_name} is a significant event in the gravel racing calendar. {race.hook_detail}"
     
     return f"{race_name} is a significant event in the gravel racing calendar."
 
 
-def generate_what_it_takes_to_finish(race_data):
+def generate_what_it_takes_to_finish(race):
     """Generate 'What It Takes to Finish' section"""
-    duration = race_data.get('duration_estimate', '10-15 hours')
-    challenges = race_data.get('guide_variables', {}).get('race_challenges', [])
-    key_challenges = race_data.get('key_challenges', '')
+    duration = race.duration_estimate
+    challenges = race.race_challenges
     
     requirements = []
     
@@ -889,23 +1869,22 @@ def generate_what_it_takes_to_finish(race_data):
     return " ".join(requirements)
 
 
-def generate_plan_preparation_summary(race_data, race_name):
+def generate_plan_preparation_summary(race, race_name):
     """Generate 'This Plan Prepares You for All of It' summary"""
-    race_chars = race_data.get('race_characteristics', {})
-    challenges = race_data.get('guide_variables', {}).get('race_challenges', [])
+    challenges = ' '.join(race.race_challenges).lower()
     
     prep_items = []
     
-    if 'heat' in str(challenges).lower() or race_chars.get('climate') == 'hot':
+    if 'heat' in challenges or race.climate == 'hot':
         prep_items.append("Heat adaptation protocols.")
     
-    if race_data.get('distance_miles', 0) >= 200:
+    if (race.distance_miles or 0) >= 200:
         prep_items.append("Endurance pacing for ultra-distance.")
     else:
         prep_items.append("Endurance pacing for race distance.")
     
-    if 'technical' in str(challenges).lower() or race_chars.get('technical_difficulty'):
-        terrain = race_chars.get('terrain', '').replace('_', ' ')
+    if 'technical' in challenges or race.technical_difficulty:
+        terrain = (race.terrain or '').replace('_', ' ')
         prep_items.append(f"Technical handling for {terrain if terrain else 'gravel'} terrain.")
     
     prep_items.append("Mental training for when it all falls apart.")
@@ -916,13 +1895,13 @@ def generate_plan_preparation_summary(race_data, race_name):
     return summary
 
 
-def generate_equipment_checklist(race_data):
+def generate_equipment_checklist(race):
     """Generate race-specific equipment checklist with checkboxes"""
     items = [
         'Power meter (calibrated)',
         'Heart rate monitor',
         'GPS bike computer',
-        f'Tires: {race_data.get("recommended_tire_width", "38-42mm")}',
+        f'Tires: {race.recommended_tire_width or "38-42mm"}',
         'Spare tubes/plugs',
         'Multi-tool',
         'Pump/CO2',
@@ -933,10 +1912,10 @@ def generate_equipment_checklist(race_data):
     ]
     
     # Add race-specific items
-    if race_data.get('elevation_gain_feet', 0) > 5000:
+    if (race.elevation_gain_feet or 0) > 5000:
         items.append('Gear range for climbing')
     
-    if 'hot' in str(race_data.get('weather_strategy', '')).lower():
+    if 'hot' in str(race.weather_strategy or '').lower():
         items.append('Extra electrolytes')
         items.append('Sun protection')
     
@@ -953,9 +1932,9 @@ def generate_equipment_checklist(race_data):
     return checklist_html
 
 
-def generate_fueling_table(race_data):
+def generate_fueling_table(race):
     """Generate fueling and hydration calculator table"""
-    distance = race_data.get('distance_miles', 200)
+    distance = race.distance_miles or 200
     duration_hours = distance / 15  # Rough estimate: 15 mph average
     
     # Base scenarios
@@ -1024,7 +2003,7 @@ def generate_fueling_table(race_data):
     return html
 
 
-def generate_personalized_fueling_table(fueling_data, race_data, profile):
+def generate_personalized_fueling_table(fueling_data, race, profile):
     """Generate personalized fueling table based on athlete's calculated needs"""
     # Extract from nested structure
     race_info = fueling_data.get('race', {})
@@ -1033,7 +2012,7 @@ def generate_personalized_fueling_table(fueling_data, race_data, profile):
     hydration = recommendations.get('hydration', {})
     athlete_info = fueling_data.get('athlete', {})
 
-    distance = race_data.get('distance_miles', race_info.get('distance_miles', 200))
+    distance = race.distance_miles or race_info.get('distance_miles', 200)
     duration_hours = race_info.get('duration_hours', distance / 15)
     hourly_carb = carbs_data.get('hourly_target', 60)
     total_carbs = carbs_data.get('total_grams', hourly_carb * duration_hours)
@@ -1111,30 +2090,13 @@ def generate_personalized_fueling_table(fueling_data, race_data, profile):
     return html
 
 
-def generate_difficulty_table(race_data):
+def generate_difficulty_table(race):
     """Generate difficulty rating table"""
-    # Extract distance
-    distance = (race_data.get('distance_miles') or 
-               race_data.get('race_metadata', {}).get('distance_miles') or 
-               'N/A')
-    
-    # Extract elevation gain
-    elevation = (race_data.get('elevation_gain_feet') or 
-                race_data.get('race_metadata', {}).get('elevation_feet') or 
-                0)
-    try:
-        elevation = int(elevation) if elevation else 0
-        elevation_str = f"{elevation:,} feet" if elevation else "N/A"
-    except (ValueError, TypeError):
-        elevation_str = "N/A"
-    
-    # Extract technical rating
-    tech_rating = (race_data.get('technical_rating') or 
-                  race_data.get('race_characteristics', {}).get('technical_difficulty', 'Moderate') or
-                  'Moderate')
-    
-    # Extract time cutoff
-    time_cutoff = race_data.get('time_cutoff', 'None')
+    distance = race.distance_miles or 'N/A'
+    elevation = race.elevation_gain_feet
+    elevation_str = f"{elevation:,} feet" if elevation else "N/A"
+    tech_rating = race.technical_rating or race.technical_difficulty or 'Moderate'
+    time_cutoff = race.time_cutoff
     
     return f'''
     <table class="difficulty-table">
@@ -1166,13 +2128,13 @@ def generate_difficulty_table(race_data):
     '''
 
 
-def generate_rating_hex(race_data):
+def generate_rating_hex(race):
     """Generate race difficulty rating hex (radar chart as HTML table)"""
     # Calculate ratings (1-5 scale) based on race characteristics
-    distance = race_data.get('distance_miles', 200)
-    elevation = race_data.get('elevation_gain_feet', 0)
-    terrain = race_data.get('terrain', 'rolling')
-    altitude = race_data.get('altitude_feet', 0)
+    distance = race.distance_miles or 200
+    elevation = race.elevation_gain_feet or 0
+    terrain = race.terrain or 'rolling'
+    altitude = race.race_elevation
     
     # Distance rating (1-5)
     if distance >= 200:
@@ -1260,7 +2222,7 @@ def generate_rating_hex(race_data):
     return html
 
 
-def generate_indoor_outdoor_decision(race_data):
+def generate_indoor_outdoor_decision(race):
     """Generate indoor vs outdoor decision tree/table"""
     html = '<table class="decision-table">\n'
     html += '  <thead>\n'
@@ -1323,7 +2285,7 @@ def generate_indoor_outdoor_decision(race_data):
     return html
 
 
-def generate_mental_map(race_data):
+def generate_mental_map(race):
     """Generate mental framework diagram as structured content"""
     html = '<div class="mental-map">\n'
     html += '  <div class="mental-framework">\n'
@@ -1359,9 +2321,9 @@ def generate_mental_map(race_data):
     return html
 
 
-def generate_three_acts(race_data):
+def generate_three_acts(race):
     """Generate three-act race structure table"""
-    distance = race_data.get('distance_miles', 200)
+    distance = race.distance_miles or 200
     duration_hours = distance / 15
     
     html = '<table class="three-acts-table">\n'
@@ -1410,10 +2372,8 @@ def generate_three_acts(race_data):
     return html
 
 
-def generate_tire_decision(race_data):
+def generate_tire_decision(race):
     """Generate tire selection decision tree/table"""
-    terrain = race_data.get('terrain', 'rolling')
-    distance = race_data.get('distance_miles', 200)
     
     html = '<div class="tire-decision">\n'
     html += '  <table class="tire-table">\n'
@@ -1483,7 +2443,7 @@ def generate_tire_decision(race_data):
     return html
 
 
-def generate_key_workout_summary(race_data):
+def generate_key_workout_summary(race):
     """Generate key workout types overview table"""
     html = '<table class="workout-summary-table">\n'
     html += '  <thead>\n'
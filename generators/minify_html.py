@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+HTML Minifier
+Conservative minifier for generated guides.
+
+- Collapses whitespace in text outside <pre>, <textarea>, <script> and <style>
+- Drops whitespace between block-level tags entirely
+- Strips comments (build markers like <!-- START X --> and authoring notes),
+  keeping IE conditional comments
+- Minifies inline <style> CSS and <script> JS/JSON
+
+Usage:
+    python generators/minify_html.py athletes/ --in-place
+    python generators/minify_html.py unbound200_guide.html -o unbound200_guide.min.html
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+# Rest of a tag after its name; quoted attribute values may contain '>'
+TAG_REST = r'''[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>'''
+
+# Raw text elements, comments, tags, and text between them
+HTML_TOKEN_PATTERN = re.compile(
+    r'(?P<raw>(?P<raw_open><(?P<raw_tag>pre|textarea|script|style)\b' + TAG_REST + r').*?</(?P=raw_tag)\s*>)'
+    r'|(?P<comment><!--.*?-->)'
+    r'|(?P<tag><[^<>"\'\s]' + TAG_REST + r')'
+    r'|(?P<text>[^<]+|<)',
+    re.DOTALL | re.IGNORECASE,
+)
+
+TAG_NAME_PATTERN = re.compile(r'</?([A-Za-z][A-Za-z0-9-]*)')
+
+# Whitespace next to these tags is never rendered
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'base', 'blockquote', 'body', 'br', 'caption', 'col', 'colgroup',
+    'dd', 'details', 'dialog', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hr', 'html', 'li', 'link',
+    'main', 'meta', 'nav', 'noscript', 'ol', 'option', 'p', 'script', 'section', 'style', 'summary',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul', '!doctype',
+))
+
+# ASCII whitespace only: a literal U+00A0 (&nbsp;) is significant
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\r\f]+')
+
+# CSS strings and comments must be matched before whitespace is touched
+CSS_TOKEN_PATTERN = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.DOTALL)
+CSS_PUNCTUATION_PATTERN = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON_PATTERN = re.compile(r':\s+')
+
+
+def _tag_name(tag):
+    if tag.startswith('<!'):
+        return '!doctype' if tag[2:9].lower() == 'doctype' else None
+    match = TAG_NAME_PATTERN.match(tag)
+    return match.group(1).lower() if match else None
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    parts = []
+    code = []
+    position = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        # Comments are dropped; the code around them is minified as one run
+        code.append(css[position:match.start()])
+        if match.group(1):
+            parts.append(_minify_css_code(''.join(code)))
+            parts.append(match.group(1))
+            code = []
+        position = match.end()
+    code.append(css[position:])
+    parts.append(_minify_css_code(''.join(code)))
+    return ''.join(parts).strip()
+
+
+def _minify_css_code(code):
+    code = WHITESPACE_PATTERN.sub(' ', code)
+    code = CSS_PUNCTUATION_PATTERN.sub(r'\1', code)
+    code = CSS_COLON_PATTERN.sub(':', code)
+    return code.replace(';}', '}')
+
+
+def minify_js(js):
+    """
+    Trim indentation, blank lines and whole-line // comments from a script.
+
+    Line structure is kept so automatic semicolon insertion still works.
+    Scripts containing template literals are returned unchanged, since
+    their lines may be part of a string.
+    """
+    if '`' in js:
+        return js.strip()
+    lines = []
+    for line in js.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def _minify_raw(element, tag, open_end):
+    close_start = element.rindex('</')
+    opening, body, closing = element[:open_end], element[open_end:close_start], element[close_start:]
+    if tag == 'style':
+        body = minify_css(body)
+    elif tag == 'script':
+        script_type = re.search(r'\btype\s*=\s*["\']?([^"\'\s>]+)', opening, re.IGNORECASE)
+        script_type = script_type.group(1).lower() if script_type else 'text/javascript'
+        if script_type.endswith('json'):
+            try:
+                body = json.dumps(json.loads(body), separators=(',', ':'), ensure_ascii=False)
+            except ValueError:
+                pass
+        elif 'javascript' in script_type or script_type == 'module':
+            body = minify_js(body)
+    return opening + body + closing
+
+
+def minify_html(html):
+    """
+    Minify an HTML document.
+
+    Returns the minified HTML. Content of <pre> and <textarea> is kept
+    verbatim; <style> and <script> bodies are minified but never merged
+    with surrounding text.
+    """
+    tokens = []
+    for match in HTML_TOKEN_PATTERN.finditer(html):
+        raw, comment, tag = match.group('raw', 'comment', 'tag')
+        if raw:
+            name = match.group('raw_tag').lower()
+            value = raw if name in ('pre', 'textarea') else _minify_raw(raw, name, len(match.group('raw_open')))
+            tokens.append(('tag', value, name))
+        elif comment:
+            if comment.startswith('<!--[if') or comment.startswith('<!--<!'):
+                tokens.append(('tag', comment, None))
+        elif tag:
+            tokens.append(('tag', tag, _tag_name(tag)))
+        else:
+            text = match.group('text')
+            if tokens and tokens[-1][0] == 'text':
+                tokens[-1] = ('text', tokens[-1][1] + text, None)
+            else:
+                tokens.append(('text', text, None))
+
+    parts = []
+    for index, (kind, value, name) in enumerate(tokens):
+        if kind == 'tag':
+            parts.append(value)
+            continue
+        collapsed = WHITESPACE_PATTERN.sub(' ', value)
+        if collapsed == ' ':
+            before = tokens[index - 1][2] if index > 0 else '!doctype'
+            after = tokens[index + 1][2] if index + 1 < len(tokens) else '!doctype'
+            if before in BLOCK_TAGS or after in BLOCK_TAGS:
+                continue
+        else:
+            if index > 0 and tokens[index - 1][2] in BLOCK_TAGS:
+                collapsed = collapsed.lstrip()
+            if index + 1 < len(tokens) and tokens[index + 1][2] in BLOCK_TAGS:
+                collapsed = collapsed.rstrip()
+        parts.append(collapsed)
+    return ''.join(parts)
+
+
+def minify_file(path, output_path=None):
+    """
+    Minify one HTML file, writing to output_path (or over path).
+
+    Returns (bytes_before, bytes_after).
+    """
+    path = Path(path)
+    html = path.read_text(encoding='utf-8')
+    minified = minify_html(html)
+    target = Path(output_path) if output_path else path
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    tmp_path.write_text(minified, encoding='utf-8')
+    tmp_path.replace(target)
+    return len(html.encode('utf-8')), len(minified.encode('utf-8'))
+
+
+def print_savings(label, before, after):
+    saved = before - after
+    percent = saved / before if before else 0.0
+    print(f"  {label}: {before / 1024:.1f} KB → {after / 1024:.1f} KB (saved {saved:,} bytes, {percent:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify generated guide HTML')
+    parser.add_argument('paths', nargs='+', help='HTML files, or directories to search for *.html')
+    parser.add_argument('--output', '-o', help='Output file (single input only)')
+    parser.add_argument('--in-place', action='store_true', help='Overwrite each input file')
+    args = parser.parse_args()
+
+    files = []
+    for path in map(Path, args.paths):
+        files.extend(sorted(path.rglob('*.html')) if path.is_dir() else [path])
+    if args.output and len(files) != 1:
+        parser.error('--output takes exactly one input file')
+    if not args.output and not args.in_place:
+        parser.error('pass --in-place or --output')
+
+    total_before = total_after = 0
+    for path in files:
+        before, after = minify_file(path, args.output)
+        total_before += before
+        total_after += after
+        print_savings(str(path), before, after)
+    if len(files) > 1:
+        print_savings(f"{len(files)} files", total_before, total_after)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Page Weight Report
+Attributes every guide's bytes to what they are spent on and checks them
+against budgets.
+
+Each page (split pages together with their sections, see split_sections.py)
+is divided into:
+
+    css            inline <style> blocks
+    js             inline <script> blocks
+    infographics   <svg> and <table> elements (outermost only)
+    sections       each top-level <section id="...">, excluding any of the above
+    other          everything else (head, header, nav, footer)
+
+so the parts add up to the page size in UTF-8 bytes. Totals are then
+aggregated by variant and by race.
+
+Budgets (page_budgets.json) cap the page, any one section, and the css,
+js and infographics bytes of a page; 'sections' sets per-section-id caps:
+
+    {"page": 180000, "section": 40000, "css": 40000, "js": 20000,
+     "infographics": 30000, "sections": {"section-9": 16000}}
+
+Usage:
+    python generators/page_weight.py athletes/ --jobs 8
+    python generators/page_weight.py athletes/ --budgets my_budgets.json --report weight.json
+
+Exits non-zero when a page or section is over budget.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import catalog, split_sections
+
+DEFAULT_BUDGETS_PATH = Path(__file__).resolve().parent / 'page_budgets.json'
+
+CATEGORIES = ('css', 'js', 'infographics')
+BUDGET_KEYS = frozenset(('page', 'section') + CATEGORIES + ('sections',))
+
+RAW_PATTERN = re.compile(rb'<(style|script)\b([^>]*)>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+INFOGRAPHIC_TAG_PATTERN = re.compile(rb'<(/?)(svg|table)\b[^>]*>', re.IGNORECASE)
+SECTION_TAG_PATTERN = re.compile(rb'<(/?)section\b([^>]*)>', re.IGNORECASE)
+ID_PATTERN = re.compile(rb'\bid\s*=\s*"([^"]+)"', re.IGNORECASE)
+SRC_PATTERN = re.compile(rb'\bsrc\s*=', re.IGNORECASE)
+
+# Rows shown in each summary table
+TOP_ROWS = 10
+
+
+def _top_level(pattern, content, skip=()):
+    """(start, end, opening match) of outermost elements matched by an open/close tag pattern"""
+    spans = []
+    depth = 0
+    for match in pattern.finditer(content):
+        if any(start <= match.start() < end for start, end in skip):
+            continue
+        if not match.group(1):
+            if depth == 0:
+                opening = match
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                spans.append((opening.start(), match.end(), opening))
+    return spans
+
+
+def page_weight(page_html):
+    """
+    Byte attribution for one page: {'bytes', 'css', 'js', 'infographics',
+    'other', 'sections': {id: bytes}}.
+    """
+    content = page_html.encode('utf-8')
+    raw = []
+    weights = {'bytes': len(content), 'css': 0, 'js': 0, 'infographics': 0, 'sections': {}}
+    for match in RAW_PATTERN.finditer(content):
+        kind = 'css' if match.group(1).lower() == b'style' else 'js'
+        if kind == 'js' and SRC_PATTERN.search(match.group(2)):
+            continue
+        weights[kind] += match.end() - match.start()
+        raw.append((match.start(), match.end()))
+    # Markup inside <style>/<script> is text, not elements
+    infographics = [(start, end) for start, end, _ in _top_level(INFOGRAPHIC_TAG_PATTERN, content, raw)]
+    weights['infographics'] = sum(end - start for start, end in infographics)
+
+    carved = sorted(raw + infographics)
+    for start, end, opening in _top_level(SECTION_TAG_PATTERN, content, raw):
+        section_id = ID_PATTERN.search(opening.group(2))
+        if not section_id:
+            continue
+        inner = sum(min(end, c_end) - max(start, c_start) for c_start, c_end in carved
+                    if c_start < end and c_end > start)
+        name = section_id.group(1).decode('utf-8')
+        weights['sections'][name] = weights['sections'].get(name, 0) + end - start - inner
+    weights['other'] = (weights['bytes'] - weights['css'] - weights['js'] - weights['infographics']
+                        - sum(weights['sections'].values()))
+    return weights
+
+
+def weigh_file(path):
+    """page_weight() for one file. Runs inside a pool worker."""
+    with open(path, 'r', encoding='utf-8') as f:
+        page_html = f.read()
+    return page_weight(split_sections.join_page(page_html, Path(path).parent))
+
+
+def load_budgets(budgets_path=None):
+    """Load the budget file; raises ValueError on unknown keys or non-integer limits"""
+    with open(budgets_path or DEFAULT_BUDGETS_PATH, 'r', encoding='utf-8') as f:
+        budgets = json.load(f)
+    unknown = set(budgets) - BUDGET_KEYS
+    if unknown:
+        raise ValueError(f"unknown budget keys {', '.join(sorted(unknown))}")
+    limits = [value for key, value in budgets.items() if key != 'sections'] + list(budgets.get('sections', {}).values())
+    if not all(isinstance(value, int) for value in limits):
+        raise ValueError('budgets must be integers (bytes)')
+    return budgets
+
+
+def over_budget(weights, budgets):
+    """Messages for every budget a page's weights exceed"""
+    problems = []
+    if 'page' in budgets and weights['bytes'] > budgets['page']:
+        problems.append(f"page {weights['bytes']:,} > {budgets['page']:,} bytes")
+    for kind in CATEGORIES:
+        if kind in budgets and weights[kind] > budgets[kind]:
+            problems.append(f"{kind} {weights[kind]:,} > {budgets[kind]:,} bytes")
+    for section_id, size in weights['sections'].items():
+        limit = budgets.get('sections', {}).get(section_id, budgets.get('section'))
+        if limit is not None and size > limit:
+            problems.append(f"#{section_id} {size:,} > {limit:,} bytes")
+    return problems
+
+
+def _add(totals, weights):
+    totals['pages'] += 1
+    totals['max'] = max(totals['max'], weights['bytes'])
+    for key in ('bytes', 'other') + CATEGORIES:
+        totals[key] += weights[key]
+    totals['sections'] += sum(weights['sections'].values())
+
+
+def weigh_site(site_dir, variants, budgets=None, jobs=None):
+    """
+    Weigh every guide page under site_dir (<dir>/index.html).
+
+    Args:
+        site_dir: Site directory (e.g. athletes/)
+        variants: Variant slugs used to split <race>-<variant> directory names
+        budgets: Budget dict (see load_budgets()), or None to skip checks
+        jobs: Worker processes
+
+    Returns:
+        Summary dict with per-page weights ('pages'), totals by 'variant'
+        and by 'race', the largest sections by id ('sections'), budget
+        failures ('over_budget': {page: [message, ...]}) and timing
+    """
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    keys = sorted(path.relative_to(site_dir).as_posix() for path in Path(site_dir).glob('*/index.html'))
+    files = [os.path.join(site_dir, key) for key in keys]
+    if jobs == 1 or len(files) <= 1:
+        results = [weigh_file(path) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(weigh_file, files, chunksize=max(1, len(files) // (jobs * 4))))
+
+    pages = {}
+    by_variant = {}
+    by_race = {}
+    sections = {}
+    failures = {}
+    for key, weights in zip(keys, results):
+        race, variant = catalog.split_page_dir(key.split('/')[0], variants)
+        weights.update(race=race, variant=variant)
+        pages[key] = weights
+        for group, name in ((by_variant, variant), (by_race, race)):
+            totals = group.setdefault(name, dict.fromkeys(('pages', 'bytes', 'max', 'sections', 'other') + CATEGORIES, 0))
+            _add(totals, weights)
+        for section_id, size in weights['sections'].items():
+            entry = sections.setdefault(section_id, {'pages': 0, 'bytes': 0, 'max': 0})
+            entry['pages'] += 1
+            entry['bytes'] += size
+            entry['max'] = max(entry['max'], size)
+        problems = over_budget(weights, budgets) if budgets else []
+        if problems:
+            failures[key] = problems
+
+    return {
+        'pages': pages,
+        'variant': by_variant,
+        'race': by_race,
+        'sections': sections,
+        'over_budget': failures,
+        'bytes': sum(weights['bytes'] for weights in pages.values()),
+        'seconds': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+
+def _kb(size):
+    return f"{size / 1024:.1f}"
+
+
+def print_summary(summary, rows=TOP_ROWS):
+    pages = summary['pages']
+    print(f"  → Weighed {len(pages):,} pages ({summary['bytes'] / (1024 * 1024):.1f} MB) in {summary['seconds']:.2f}s")
+    if not pages:
+        return
+    header = f"{'avg KB':>8} {'max KB':>8} {'sections':>9} {'css':>7} {'js':>7} {'infogr.':>8} {'other':>7}"
+    for group in ('variant', 'race'):
+        totals = summary[group]
+        print(f"\n  By {group} (average KB per page{'' if group == 'variant' else f', heaviest {rows}'}):")
+        print(f"    {group:<34} {'pages':>5} {header}")
+        ordered = sorted(totals.items(), key=lambda item: -item[1]['bytes'] / item[1]['pages'])
+        for name, entry in ordered if group == 'variant' else ordered[:rows]:
+            count = entry['pages']
+            print(f"    {(name or '(none)')[:34]:<34} {count:>5} {_kb(entry['bytes'] / count):>8} {_kb(entry['max']):>8} "
+                  f"{_kb(entry['sections'] / count):>9} {_kb(entry['css'] / count):>7} {_kb(entry['js'] / count):>7} "
+                  f"{_kb(entry['infographics'] / count):>8} {_kb(entry['other'] / count):>7}")
+
+    print(f"\n  Sections by total bytes across the site (heaviest {rows}):")
+    ordered = sorted(summary['sections'].items(), key=lambda item: -item[1]['bytes'])
+    for section_id, entry in ordered[:rows]:
+        print(f"    #{section_id[:50]:<50} {entry['pages']:>5} pages {entry['bytes'] / (1024 * 1024):>6.1f} MB "
+              f"{_kb(entry['bytes'] / entry['pages']):>7} KB avg {_kb(entry['max']):>7} KB max")
+
+    print(f"\n  Heaviest pages (KB, heaviest {rows}):")
+    for key, weights in sorted(pages.items(), key=lambda item: -item[1]['bytes'])[:rows]:
+        largest = max(weights['sections'].items(), key=lambda item: item[1], default=('', 0))
+        print(f"    {key[:50]:<50} {_kb(weights['bytes']):>7} (css {_kb(weights['css'])}, js {_kb(weights['js'])}, "
+              f"infographics {_kb(weights['infographics'])}, largest #{largest[0]} {_kb(largest[1])})")
+
+    if summary['over_budget']:
+        print()
+        for key, problems in sorted(summary['over_budget'].items()):
+            print(f"  ✗ {key}: {'; '.join(problems)}")
+    print(f"\n  → {len(summary['over_budget']):,} pages over budget")
+
+
+def main():
+    from . import build_guides
+
+    parser = argparse.ArgumentParser(description='Report where guide bytes go and check them against budgets')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--budgets', help=f"Budget JSON (default: {DEFAULT_BUDGETS_PATH.name} next to this script)")
+    parser.add_argument('--no-budgets', action='store_true', help='Only report; never fail')
+    parser.add_argument('--report', help='Also write the full per-page report as JSON to this path')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--variants', help='Variant matrix JSON used to split <race>-<variant> directory names')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+    try:
+        budgets = None if args.no_budgets else load_budgets(args.budgets)
+    except (OSError, ValueError) as e:
+        print(f"Could not load budgets: {e}")
+        return 1
+
+    summary = weigh_site(args.site, build_guides.load_variant_matrix(args.variants), budgets, args.jobs)
+    print_summary(summary)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({key: value for key, value in summary.items() if key != 'seconds'}, f, indent=1, sort_keys=True)
+            f.write('\n')
+    return 1 if summary['over_budget'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Leftover Scanner
+Finds template leftovers in generated pages:
+
+- unresolved {{PLACEHOLDER}} tokens (e.g. the root guide_generator.py
+  leaves {{KEY_WORKOUT_n_NAME}} in place when workout data is missing),
+  and upper-case {PLACEHOLDER_NAME} tokens that lost a brace
+- stray <!-- START X --> / <!-- END X --> build markers: a START without
+  its END, an END without its START, or pairs closed out of order
+- empty required sections: top-level <section id="section-N-..."> elements
+  with nothing but a heading in them
+
+Each page is read once and tokenized with one compiled pattern; pages are
+scanned in a process pool. Results are grouped by placeholder and by race.
+Split pages (see split_sections.py) are scanned with their sections.
+
+Usage:
+    python generators/scan_leftovers.py athletes/ --jobs 8
+    python generators/scan_leftovers.py output/
+
+Exits non-zero when anything is found, so it can gate a build.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import catalog, split_sections
+
+# The tag alternatives share their '<' so the scan only branches at tags.
+# Single-brace tokens must be upper case with an underscore (case-sensitive,
+# unlike the rest), so CSS and script braces never match.
+LEFTOVER_PATTERN = re.compile(
+    r'\{\{\s*(?P<placeholder>[A-Za-z_][A-Za-z0-9_]*)\s*\}\}'
+    r'|\{(?-i:(?P<single>[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)+))\}'
+    r'|<(?:!--\s*(?P<marker>START|END)\s+(?P<block>[^<>]*?)\s*-->'
+    r'|section\b(?P<section>[^>]*)>'
+    r'|(?P<section_end>/section\s*)>)',
+    re.IGNORECASE,
+)
+
+ID_PATTERN = re.compile(r'\bid\s*=\s*"([^"]*)"', re.IGNORECASE)
+
+# Top-level sections that must have content beyond their heading
+REQUIRED_SECTION_PATTERN = re.compile(r'section-\d+\b')
+
+HEADING_PATTERN = re.compile(r'<h[1-6]\b.*?</h[1-6]\s*>', re.IGNORECASE | re.DOTALL)
+# Visible text: a non-space character between tags
+TEXT_PATTERN = re.compile(r'>[^<]*?[^<\s]')
+
+# Pages listed per placeholder before the rest are summarized
+MAX_LISTED = 5
+
+
+def scan_page(page_html):
+    """
+    Return {'placeholders': {name: count}, 'markers': [problem, ...],
+    'empty_sections': [section id, ...]} for one page.
+    """
+    placeholders = {}
+    markers = []
+    open_blocks = []
+    empty_sections = []
+    depth = 0
+    section = None
+    for match in LEFTOVER_PATTERN.finditer(page_html):
+        if match.group('placeholder') or match.group('single'):
+            name = match.group('placeholder') or match.group('single')
+            placeholders[name] = placeholders.get(name, 0) + 1
+        elif match.group('marker'):
+            block = ' '.join(match.group('block').split())
+            if match.group('marker').upper() == 'START':
+                open_blocks.append(block)
+            elif block in open_blocks:
+                while open_blocks[-1] != block:
+                    markers.append(f"START {open_blocks.pop()} closed by END {block}")
+                open_blocks.pop()
+            else:
+                markers.append(f"END {block} without START")
+        elif match.group('section_end') is not None:
+            depth = max(depth - 1, 0)
+            if depth == 0 and section is not None:
+                # Only text after the section heading counts
+                content = '>' + page_html[section[1]:match.start()]
+                heading = HEADING_PATTERN.search(content)
+                if not TEXT_PATTERN.search(content, heading.end() - 1 if heading else 0):
+                    empty_sections.append(section[0])
+                section = None
+        else:
+            if depth == 0:
+                section_id = ID_PATTERN.search(match.group('section'))
+                if section_id and REQUIRED_SECTION_PATTERN.match(section_id.group(1)):
+                    section = (section_id.group(1), match.end())
+            depth += 1
+    markers.extend(f"START {block} without END" for block in open_blocks)
+    return {'placeholders': placeholders, 'markers': markers, 'empty_sections': empty_sections}
+
+
+def scan_file(path):
+    """scan_page() for one file. Runs inside a pool worker."""
+    with open(path, 'r', encoding='utf-8') as f:
+        page_html = f.read()
+    return scan_page(split_sections.join_page(page_html, Path(path).parent))
+
+
+def page_files(site_dir):
+    """Every generated page under site_dir (fragments are scanned through their shell page)"""
+    return sorted(path.relative_to(site_dir).as_posix() for path in Path(site_dir).rglob('*.html')
+                  if path.parent.name != split_sections.FRAGMENT_DIR_NAME)
+
+
+def scan_site(site_dir, variants, jobs=None):
+    """
+    Scan every page under site_dir.
+
+    Args:
+        site_dir: Site directory (e.g. athletes/)
+        variants: Variant slugs used to find each page's race from its
+            <race>-<variant>/ directory name
+        jobs: Worker processes
+
+    Returns:
+        Summary dict with per-page findings ('pages': {path: findings}),
+        findings grouped by placeholder ('placeholders': {name: [path, ...]})
+        and by race ('races': {race: counts}), totals and timing
+    """
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    paths = page_files(site_dir)
+    files = [os.path.join(site_dir, path) for path in paths]
+    if jobs == 1 or len(files) <= 1:
+        results = [scan_file(path) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(scan_file, files, chunksize=max(1, len(files) // (jobs * 4))))
+
+    pages = {}
+    by_placeholder = {}
+    by_race = {}
+    for path, findings in zip(paths, results):
+        if not any(findings.values()):
+            continue
+        pages[path] = findings
+        race = catalog.split_page_dir(path.split('/')[0], variants)[0] if '/' in path else ''
+        counts = by_race.setdefault(race, {'pages': 0, 'placeholders': 0, 'markers': 0, 'empty_sections': 0})
+        counts['pages'] += 1
+        counts['placeholders'] += sum(findings['placeholders'].values())
+        counts['markers'] += len(findings['markers'])
+        counts['empty_sections'] += len(findings['empty_sections'])
+        for name in findings['placeholders']:
+            by_placeholder.setdefault(name, []).append(path)
+
+    return {
+        'scanned': len(paths),
+        'pages': pages,
+        'placeholders': by_placeholder,
+        'races': by_race,
+        'placeholder_count': sum(counts['placeholders'] for counts in by_race.values()),
+        'marker_count': sum(counts['markers'] for counts in by_race.values()),
+        'empty_section_count': sum(counts['empty_sections'] for counts in by_race.values()),
+        'seconds': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+
+def print_summary(summary, per_page=False):
+    print(f"  → Scanned {summary['scanned']:,} pages in {summary['seconds']:.2f}s: "
+          f"{summary['placeholder_count']:,} placeholders, {summary['marker_count']:,} stray markers, "
+          f"{summary['empty_section_count']:,} empty sections")
+    if summary['placeholders']:
+        print("  Placeholders:")
+        for name, paths in sorted(summary['placeholders'].items(), key=lambda item: (-len(item[1]), item[0])):
+            listed = ', '.join(paths[:MAX_LISTED]) + (f", … {len(paths) - MAX_LISTED:,} more" if len(paths) > MAX_LISTED else '')
+            print(f"    {{{{{name}}}}}: {len(paths):,} pages ({listed})")
+    if summary['races']:
+        print("  By race:")
+        for race, counts in sorted(summary['races'].items()):
+            print(f"    {race or '(site root)'}: {counts['pages']} pages, {counts['placeholders']} placeholders, "
+                  f"{counts['markers']} stray markers, {counts['empty_sections']} empty sections")
+    for path, findings in sorted(summary['pages'].items()):
+        if per_page or findings['markers'] or findings['empty_sections']:
+            for problem in findings['markers']:
+                print(f"  ⚠ {path}: {problem}")
+            for section_id in findings['empty_sections']:
+                print(f"  ⚠ {path}: empty section #{section_id}")
+            if per_page and findings['placeholders']:
+                print(f"  ⚠ {path}: {', '.join(sorted(findings['placeholders']))}")
+
+
+def main():
+    from . import build_guides
+
+    parser = argparse.ArgumentParser(description='Find unresolved placeholders, stray markers and empty sections')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--variants', help='Variant matrix JSON used to split <race>-<variant> directory names')
+    parser.add_argument('--per-page', action='store_true', help='List every affected page')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+
+    summary = scan_site(args.site, build_guides.load_variant_matrix(args.variants), args.jobs)
+    print_summary(summary, args.per_page)
+    return 1 if summary['pages'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
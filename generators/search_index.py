@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Guide Search Index
+Builds a static, sharded inverted index over every generated guide so the
+catalog page can search all guides without downloading them.
+
+Output (under <site>/search/):
+    docs.json       [url, title] per guide, the section ids postings
+                    refer to, the split prefixes, the stopwords and the
+                    index version
+    <prefix>.json   terms starting with <prefix> (first PREFIX_LENGTH
+                    characters), each as its postings; a posting is
+                    [doc, weight, section index]. A shard over
+                    MAX_SHARD_BYTES is split by the next character of its
+                    terms (recorded under 'split' in docs.json) and only
+                    keeps the terms equal to its prefix
+    search.js       client that fetches docs.json and only the shards a
+                    query needs
+
+Usage:
+    python generators/search_index.py athletes/ --jobs 8
+
+Terms are extracted per page from section headings (weighted by
+HEADING_WEIGHT) and body text. Extractions are cached in .cache/search/ by
+page output hash, so a rebuild only re-reads pages whose hash changed in
+the build manifest; shards are only rewritten when their content changes.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import catalog, guide_generator, split_sections
+
+SEARCH_DIR_NAME = 'search'
+DOCS_NAME = 'docs.json'
+SCRIPT_NAME = 'search.js'
+SCRIPT_SOURCE_PATH = guide_generator.REPO_ROOT / 'templates' / 'search.js'
+CACHE_DIR = guide_generator.REPO_ROOT / '.cache' / 'search'
+
+PREFIX_LENGTH = 3
+MAX_SHARD_BYTES = 32 * 1024
+HEADING_WEIGHT = 5
+
+# Bump when extraction changes, so cached page terms are rebuilt
+EXTRACTOR_VERSION = '2'
+
+# Markup that never holds searchable guide text (the nav repeats headings)
+NOISE_PATTERN = re.compile(r'<(style|script|nav|noscript)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+SECTION_PATTERN = re.compile(r'<section\b[^>]*?\bid="([^"]+)"[^>]*>', re.IGNORECASE)
+HEADING_PATTERN = re.compile(r'<h[1-4]\b[^>]*>(.*?)</h[1-4]\s*>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+TERM_PATTERN = re.compile(r'[^\W_]+')
+
+STOPWORDS = frozenset('''
+    a an and are as at be but by can do for from has have if in into is it its not of on or so than that the
+    their them then there these they this to up was we were what when which while who will with you your
+'''.split())
+
+
+def tokenize(text):
+    """Lowercase search terms in text (2-30 characters, stopwords removed)"""
+    return [term for term in TERM_PATTERN.findall(text.lower())
+            if 1 < len(term) <= 30 and term not in STOPWORDS]
+
+
+def _text(markup):
+    return html.unescape(TAG_PATTERN.sub(' ', markup))
+
+
+def extract_terms(page_html):
+    """
+    Return {term: [weight, section id]} for one page: weight counts every
+    occurrence, with heading occurrences counting HEADING_WEIGHT times;
+    the section id is the <section> where the term weighs most ('' for
+    text before the first section).
+    """
+    page_html = NOISE_PATTERN.sub(' ', page_html)
+    parts = SECTION_PATTERN.split(page_html)
+    sections = [('', parts[0])] + list(zip(parts[1::2], parts[2::2]))
+
+    totals = {}
+    best = {}
+    for section_id, markup in sections:
+        weights = {}
+        for term in tokenize(_text(markup)):
+            weights[term] = weights.get(term, 0) + 1
+        for heading in HEADING_PATTERN.findall(markup):
+            for term in tokenize(_text(heading)):
+                weights[term] = weights.get(term, 0) + HEADING_WEIGHT - 1
+        for term, weight in weights.items():
+            totals[term] = totals.get(term, 0) + weight
+            if weight > best.get(term, ('', 0))[1]:
+                best[term] = (section_id, weight)
+    return {term: [weight, best[term][0]] for term, weight in totals.items()}
+
+
+def _cache_path(output_hash):
+    return CACHE_DIR / f"{EXTRACTOR_VERSION}.{output_hash[:24]}.json"
+
+
+def extract_page(task):
+    """
+    Extract and cache one page's terms. Runs inside a pool worker.
+
+    Returns (terms, weights, sections): parallel lists, which load from the
+    cache much faster than a dict of pairs.
+    """
+    page_path, output_hash = task
+    with open(page_path, 'r', encoding='utf-8') as f:
+        # Split pages (see split_sections.py) are indexed with their sections
+        terms = extract_terms(split_sections.join_page(f.read(), Path(page_path).parent))
+    columns = (list(terms), [weight for weight, _ in terms.values()], [section for _, section in terms.values()])
+    cache_path = _cache_path(output_hash)
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(columns, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, cache_path)
+    return columns
+
+
+def shard_name(prefix):
+    """File stem for a term prefix; non-alphanumeric ASCII prefixes are hex-encoded"""
+    if re.fullmatch(r'[a-z0-9]+', prefix):
+        return prefix
+    return '_' + prefix.encode('utf-8').hex()
+
+
+def shard_terms(postings):
+    """
+    Group {term: postings} into shards by term prefix.
+
+    Terms are grouped by their first PREFIX_LENGTH characters; a group whose
+    JSON exceeds MAX_SHARD_BYTES is split by one more character until it
+    fits or only terms equal to the prefix are left (one term's postings
+    are never split). Returns (shards, split): {prefix: {term: postings}}
+    and {split prefix: sorted next characters of its child shards}.
+    """
+    pending = {}
+    for term, term_postings in postings.items():
+        pending.setdefault(term[:PREFIX_LENGTH], {})[term] = term_postings
+    shards = {}
+    split = {}
+    while pending:
+        prefix, terms = pending.popitem()
+        if len(json.dumps(terms, ensure_ascii=False, separators=(',', ':'))) <= MAX_SHARD_BYTES \
+                or all(len(term) <= len(prefix) for term in terms):
+            shards[prefix] = terms
+            continue
+        children = {}
+        for term, term_postings in terms.items():
+            children.setdefault(term[:len(prefix) + 1], {})[term] = term_postings
+        if prefix in children:
+            shards[prefix] = children.pop(prefix)
+        split[prefix] = ''.join(sorted(child[-1] for child in children))
+        pending.update(children)
+    return shards, dict(sorted(split.items()))
+
+
+def _write_if_changed(path, text):
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def build_index(site_dir, pages, jobs=None):
+    """
+    Build <site_dir>/search/ from manifest page entries (key -> entry with
+    'race', 'variant', 'output_hash' and optionally 'name').
+
+    Args:
+        site_dir: Site directory (e.g. athletes/)
+        pages: Build manifest 'pages' dict, or catalog.scan_pages() output
+        jobs: Worker processes for pages that need extracting
+
+    Returns:
+        Summary dict with page, term and shard counts and timing
+    """
+    site_dir = Path(site_dir)
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    keys = sorted(key for key in pages if (site_dir / key).exists())
+    page_terms = {}
+    tasks = []
+    for key in keys:
+        cache_path = _cache_path(pages[key]['output_hash'])
+        if cache_path.exists():
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                page_terms[key] = json.load(f)
+        else:
+            tasks.append((str(site_dir / key), pages[key]['output_hash']))
+    if jobs == 1 or len(tasks) <= 1:
+        extracted = [extract_page(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            extracted = list(pool.map(extract_page, tasks, chunksize=8))
+    for (page_path, _), terms in zip(tasks, extracted):
+        page_terms[Path(page_path).relative_to(site_dir).as_posix()] = terms
+
+    docs = []
+    sections = sorted({section for key in keys for section in page_terms[key][2]})
+    section_index = {section: i for i, section in enumerate(sections)}
+    postings = {}
+    for doc, key in enumerate(keys):
+        entry = pages[key]
+        title = ' · '.join(part for part in (entry.get('name') or entry['race'],
+                                             entry.get('variant', '').replace('-', ' ')) if part)
+        docs.append([catalog.page_url(key), title])
+        for term, weight, section in zip(*page_terms[key]):
+            if term in postings:
+                postings[term].append((doc, weight, section_index[section]))
+            else:
+                postings[term] = [(doc, weight, section_index[section])]
+    # Every posting is kept, so multi-term queries see every matching guide;
+    # hot prefixes are split instead to keep shards small
+    shards, split = shard_terms(postings)
+
+    search_dir = site_dir / SEARCH_DIR_NAME
+    search_dir.mkdir(parents=True, exist_ok=True)
+    # Postings point into docs and sections, so the version covers all three
+    version = hashlib.sha256(json.dumps([docs, sections], ensure_ascii=False).encode('utf-8'))
+    written = 0
+    shard_bytes = 0
+    largest_shard = 0
+    live = {DOCS_NAME, SCRIPT_NAME}
+    for prefix in sorted(shards):
+        name = f"{shard_name(prefix)}.json"
+        payload = json.dumps(shards[prefix], ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        version.update(name.encode('utf-8') + b'\0' + payload.encode('utf-8'))
+        written += _write_if_changed(search_dir / name, payload)
+        shard_bytes += len(payload.encode('utf-8'))
+        largest_shard = max(largest_shard, len(payload.encode('utf-8')))
+        live.add(name)
+    removed = 0
+    for path in search_dir.glob('*.json'):
+        if path.name not in live:
+            path.unlink()
+            removed += 1
+
+    docs_payload = json.dumps({
+        'version': version.hexdigest()[:12],
+        'prefix_length': PREFIX_LENGTH,
+        'split': split,
+        # The client drops the same terms from queries
+        'stopwords': sorted(STOPWORDS),
+        'sections': sections,
+        'docs': docs,
+    }, ensure_ascii=False, separators=(',', ':'))
+    _write_if_changed(search_dir / DOCS_NAME, docs_payload)
+    script = search_dir / SCRIPT_NAME
+    if not script.exists() or script.read_bytes() != SCRIPT_SOURCE_PATH.read_bytes():
+        shutil.copyfile(SCRIPT_SOURCE_PATH, script)
+
+    return {
+        'pages': len(keys),
+        'extracted': len(tasks),
+        'terms': len(postings),
+        'shards': len(shards),
+        'shards_written': written,
+        'shards_removed': removed,
+        'shard_bytes': shard_bytes,
+        'largest_shard': largest_shard,
+        'seconds': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+
+def print_summary(summary):
+    print(f"  → Search index: {summary['pages']:,} pages ({summary['extracted']:,} re-read), "
+          f"{summary['terms']:,} terms in {summary['shards']} shards "
+          f"({summary['shard_bytes'] / (1024 * 1024):.1f} MB, largest {summary['largest_shard'] / 1024:.0f} KB) "
+          f"in {summary['seconds']:.2f}s")
+    print(f"  → {summary['shards_written']} shards written, {summary['shards_removed']} removed")
+
+
+def main():
+    from . import build_guides
+
+    parser = argparse.ArgumentParser(description='Build the sharded search index for a generated site')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--variants', help='Variant matrix JSON used to split <race>-<variant> directory names')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+
+    pages = build_guides.load_manifest(args.site)['pages']
+    if not pages:
+        pages = catalog.scan_pages(args.site, build_guides.load_variant_matrix(args.variants))
+    print_summary(build_index(args.site, pages, args.jobs))
+    # The catalog page shows a search box once the index exists
+    catalog.print_summary(catalog.write_catalog(args.site, pages))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
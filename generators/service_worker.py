@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Offline Service Worker
+Writes <site>/sw.js and <site>/precache-manifest.json so riders can open
+their guides without coverage.
+
+precache-manifest.json lists a content hash for every guide and shared
+file, taken from the build manifest (page output hashes and assets) and
+hashed from disk for the rest (fonts, the catalog page, guides.json):
+
+    {"version": "1a2b3c4d5e6f",
+     "shared": [["assets/guide.0f1e2d3c.css", "9a8b7c6d5e4f"], ["", "..."], ...],
+     "guides": [["unbound-gravel-200-finisher-12wk/", "3c2b1a0f9e8d"], ...]}
+
+sw.js (from templates/service_worker.js) embeds the version, so browsers
+pick up a new worker whenever any hash changes. The worker precaches the
+shared files, caches each guide (and its split-out sections) the first
+time it is opened, and on update re-fetches only the cached guides and
+shared files whose hash changed.
+
+Usage:
+    python generators/service_worker.py athletes/ --register
+
+--register adds the worker registration script to every guide page in
+place (build_guides.py --offline renders it in) and rewrites the
+catalog page with it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import catalog, guide_generator
+
+SW_NAME = catalog.SERVICE_WORKER_NAME
+MANIFEST_NAME = 'precache-manifest.json'
+SW_TEMPLATE_PATH = guide_generator.REPO_ROOT / 'templates' / 'service_worker.js'
+ASSETS_DIR_NAME = 'assets'
+
+# Precompressed siblings are served by the web server, never fetched directly
+SKIPPED_SUFFIXES = ('.gz', '.br', '.tmp')
+
+REGISTERED_PATTERN = re.compile(r'navigator\.serviceWorker\.register\(')
+BODY_END_PATTERN = re.compile(r'</body\s*>', re.IGNORECASE)
+
+
+def register_script(href):
+    """Inline script registering the worker at href (relative to the page)"""
+    return catalog.SERVICE_WORKER_SCRIPT.format(src=href)
+
+
+def add_registration(page_html, href):
+    """page_html with the registration script before </body>; pages that already register are unchanged"""
+    if REGISTERED_PATTERN.search(page_html):
+        return page_html
+    body_end = None
+    for body_end in BODY_END_PATTERN.finditer(page_html):
+        pass
+    if body_end is None:
+        return page_html + register_script(href)
+    return page_html[:body_end.start()] + register_script(href) + page_html[body_end.start():]
+
+
+def _file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def precache_manifest(site_dir, manifest):
+    """
+    The precache manifest for a site and its build manifest (a dict with
+    'pages' and optionally 'assets', see build_guides.load_manifest()).
+    """
+    site_dir = Path(site_dir)
+    shared = {}
+    for name, entry in manifest.get('assets', {}).items():
+        if (site_dir / name).is_file():
+            shared[name] = entry['output_hash'][:12]
+    assets_dir = site_dir / ASSETS_DIR_NAME
+    if assets_dir.is_dir():
+        for path in sorted(assets_dir.rglob('*')):
+            name = path.relative_to(site_dir).as_posix()
+            if path.is_file() and name not in shared and not path.name.startswith('.') \
+                    and not path.name.endswith(SKIPPED_SUFFIXES):
+                shared[name] = _file_hash(path)[:12]
+    for name in (catalog.CATALOG_PAGE_NAME, catalog.GUIDES_JSON_NAME, catalog.SEARCH_SCRIPT_PATH):
+        if (site_dir / name).is_file():
+            # The catalog is requested as the site root
+            shared['' if name == catalog.CATALOG_PAGE_NAME else name] = _file_hash(site_dir / name)[:12]
+
+    guides = [[catalog.page_url(key), entry['output_hash'][:12]]
+              for key, entry in sorted(manifest['pages'].items()) if (site_dir / key).is_file()]
+    shared = [[name, shared[name]] for name in sorted(shared)]
+    version = hashlib.sha256(json.dumps([shared, guides]).encode('utf-8')).hexdigest()[:12]
+    return {'version': version, 'shared': shared, 'guides': guides}
+
+
+def _write_if_changed(path, text):
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_service_worker(site_dir, manifest):
+    """
+    Write <site_dir>/precache-manifest.json and <site_dir>/sw.js.
+
+    Returns a summary dict with guide/shared counts and how many of each
+    changed since the previous precache manifest (what returning visitors
+    re-fetch).
+    """
+    site_dir = Path(site_dir)
+    manifest_path = site_dir / MANIFEST_NAME
+    previous = {'shared': [], 'guides': []}
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    precache = precache_manifest(site_dir, manifest)
+
+    with open(SW_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    worker = guide_generator.substitute_placeholders(template, {
+        'VERSION': precache['version'],
+        'MANIFEST_URL': f"{MANIFEST_NAME}?v={precache['version']}",
+    })
+    payload = json.dumps(precache, separators=(',', ':')) + '\n'
+    written = _write_if_changed(manifest_path, payload)
+    written = _write_if_changed(site_dir / SW_NAME, worker) or written
+
+    def changed(kind):
+        before = dict(map(tuple, previous.get(kind, [])))
+        return sum(1 for url, digest in precache[kind] if before.get(url) != digest)
+
+    return {
+        'version': precache['version'],
+        'guides': len(precache['guides']),
+        'shared': len(precache['shared']),
+        'guides_changed': changed('guides'),
+        'shared_changed': changed('shared'),
+        'manifest_bytes': len(payload.encode('utf-8')),
+        'written': written,
+    }
+
+
+def print_summary(summary):
+    print(f"  → Service worker {summary['version']}: {summary['guides']:,} guides, {summary['shared']} shared files "
+          f"({MANIFEST_NAME} {summary['manifest_bytes'] / 1024:.1f} KB"
+          f"{'' if summary['written'] else ', unchanged'})")
+    print(f"  → Changed since last build: {summary['guides_changed']:,} guides, {summary['shared_changed']} shared files")
+
+
+def register_pages(site_dir, pages):
+    """Add the registration script to every guide page in place; returns the pages changed"""
+    site_dir = Path(site_dir)
+    changed = 0
+    for key in sorted(pages):
+        path = site_dir / key
+        if not path.is_file():
+            continue
+        href = posixpath.relpath(SW_NAME, posixpath.dirname(key) or '.')
+        page_html = path.read_text(encoding='utf-8')
+        registered = add_registration(page_html, href)
+        if registered != page_html:
+            path.write_text(registered, encoding='utf-8')
+            changed += 1
+    return changed
+
+
+def main():
+    from . import build_guides
+
+    parser = argparse.ArgumentParser(description='Write the offline service worker and precache manifest for a site')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--register', action='store_true', help='Add the registration script to every page in place')
+    parser.add_argument('--variants', help='Variant matrix JSON used to split <race>-<variant> directory names')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+
+    manifest = build_guides.load_manifest(args.site)
+    if not manifest['pages']:
+        manifest['pages'] = catalog.scan_pages(args.site, build_guides.load_variant_matrix(args.variants))
+    if args.register:
+        changed = register_pages(args.site, manifest['pages'])
+        print(f"  → Registration added to {changed:,} pages")
+        # Registering changed the page hashes
+        for key, entry in manifest['pages'].items():
+            content = (Path(args.site) / key).read_bytes()
+            entry.update(output_hash=hashlib.sha256(content).hexdigest(), bytes=len(content))
+        catalog.print_summary(catalog.write_catalog(args.site, manifest['pages'], service_worker=True))
+    print_summary(write_service_worker(args.site, manifest))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Section Splitter
+Turns a generated guide into a light shell page plus one fragment file per
+deferred section.
+
+The shell keeps everything around the guide sections (head, header, nav,
+footer) and the first top-level <section> in full. Every later top-level
+<section id="..."> keeps its opening tag and heading but its content moves
+to <page dir>/sections/<id>.html:
+
+    <section id="section-5-training-zones" class="gg-section"
+             data-fragment="sections/section-5-training-zones.html?v=1a2b3c4d">
+      <h2>Training Zones</h2>
+      <p class="gg-section-fallback"><a href="sections/...">Read this section</a></p>
+    </section>
+
+A small inline loader fetches a fragment when its placeholder comes within
+LOAD_MARGIN of the viewport, or straight away when a #link (the nav, a deep
+link, back/forward) points into it. Without JavaScript, or when the fetch
+fails, the fallback link still reaches the content.
+
+The ?v= query is the fragment's content hash, so fragments can be cached
+for good and the shell's own hash changes whenever any fragment does.
+
+Usage:
+    python generators/split_sections.py athletes/
+    python generators/split_sections.py output/guide.html
+"""
+
+import argparse
+import hashlib
+import html
+import os
+import re
+import sys
+from pathlib import Path
+
+FRAGMENT_DIR_NAME = 'sections'
+
+# How far below (or above) the viewport a section starts loading
+LOAD_MARGIN = '1200px'
+
+SECTION_TAG_PATTERN = re.compile(r'<section\b[^>]*>|</section\s*>', re.IGNORECASE)
+ID_PATTERN = re.compile(r'\bid\s*=\s*"([^"]+)"', re.IGNORECASE)
+HEADING_PATTERN = re.compile(r'<h[1-6]\b[^>]*>.*?</h[1-6]\s*>', re.IGNORECASE | re.DOTALL)
+FRAGMENT_PATTERN = re.compile(r'\bdata-fragment="([^"?]+)', re.IGNORECASE)
+BODY_END_PATTERN = re.compile(r'</body\s*>', re.IGNORECASE)
+
+PLACEHOLDER_FALLBACK = '<p class="gg-section-fallback"><a href="{href}">Read this section</a></p>'
+
+SECTION_LOADER = '''<script>
+(function () {
+  var deferred = document.querySelectorAll('section[data-fragment]');
+  if (!deferred.length || !window.fetch) return;
+
+  function load(section) {
+    if (!section.loading) {
+      section.loading = fetch(section.getAttribute('data-fragment')).then(function (response) {
+        if (!response.ok) throw new Error(response.status);
+        return response.text();
+      }).then(function (markup) {
+        section.innerHTML = markup;
+        section.removeAttribute('data-fragment');
+      }, function () {
+        // Leave the fallback link in place and allow a retry
+        section.loading = null;
+      });
+    }
+    return section.loading;
+  }
+
+  function loadAll() {
+    return Promise.all(Array.prototype.map.call(deferred, load));
+  }
+
+  // Load whatever holds #id (every section if it is not in the page yet),
+  // then scroll to it. Returns null when id is already on the page.
+  function reveal(id) {
+    var target = document.getElementById(id);
+    var owner = null;
+    Array.prototype.forEach.call(deferred, function (section) {
+      if (target && section.hasAttribute('data-fragment') && section.contains(target)) owner = section;
+    });
+    if (target && !owner) return null;
+    return (owner ? load(owner) : loadAll()).then(function () {
+      var loaded = document.getElementById(id);
+      if (loaded) loaded.scrollIntoView();
+    });
+  }
+
+  function hashId(hash) {
+    return hash.length > 1 ? decodeURIComponent(hash.slice(1)) : '';
+  }
+
+  document.addEventListener('click', function (event) {
+    var link = event.target.closest ? event.target.closest('a[href^="#"]') : null;
+    if (!link || !hashId(link.hash) || !reveal(hashId(link.hash))) return;
+    event.preventDefault();
+    history.pushState(null, '', link.hash);
+  });
+  window.addEventListener('hashchange', function () { if (hashId(location.hash)) reveal(hashId(location.hash)); });
+  window.addEventListener('beforeprint', loadAll);
+
+  if ('IntersectionObserver' in window) {
+    var observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          load(entry.target);
+        }
+      });
+    }, {rootMargin: 'LOAD_MARGIN 0px'});
+    Array.prototype.forEach.call(deferred, function (section) { observer.observe(section); });
+  } else {
+    loadAll();
+  }
+  if (hashId(location.hash)) reveal(hashId(location.hash));
+})();
+</script>
+'''.replace('LOAD_MARGIN', LOAD_MARGIN)
+
+
+def top_level_sections(page_html):
+    """
+    (start, content_start, content_end, end) spans of every top-level
+    <section> element, in document order; nested sections stay inside
+    their parent.
+    """
+    spans = []
+    depth = 0
+    for match in SECTION_TAG_PATTERN.finditer(page_html):
+        if match.group(0)[1] != '/':
+            if depth == 0:
+                start, content_start = match.start(), match.end()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                spans.append((start, content_start, match.start(), match.end()))
+    return spans
+
+
+def split_page(page_html, fragment_dir=FRAGMENT_DIR_NAME):
+    """
+    Split a rendered guide into (shell_html, {section id: fragment html}).
+
+    The first top-level section stays in the shell. Sections without an id
+    (nothing could link to them) and placeholders from an earlier split
+    are left as they are. Pages with nothing to defer come back unchanged
+    with an empty dict.
+    """
+    fragments = {}
+    parts = []
+    position = 0
+    for index, (start, content_start, content_end, end) in enumerate(top_level_sections(page_html)):
+        opening = page_html[start:content_start]
+        section_id = ID_PATTERN.search(opening)
+        if index == 0 or not section_id or FRAGMENT_PATTERN.search(opening):
+            continue
+        section_id = section_id.group(1)
+        content = page_html[content_start:content_end]
+        href = f"{fragment_dir}/{section_id}.html"
+        version = hashlib.sha256(content.encode('utf-8')).hexdigest()[:8]
+        heading = HEADING_PATTERN.search(content)
+        fragments[section_id] = content
+        parts.append(page_html[position:start])
+        parts.append(f'{opening[:-1]} data-fragment="{html.escape(href)}?v={version}">')
+        parts.append(heading.group(0) if heading else '')
+        parts.append(PLACEHOLDER_FALLBACK.format(href=html.escape(href)))
+        parts.append('</section>')
+        position = end
+    if not fragments:
+        return page_html, fragments
+    parts.append(page_html[position:])
+    shell = ''.join(parts)
+
+    body_end = None
+    for body_end in BODY_END_PATTERN.finditer(shell):
+        pass
+    if body_end is None:
+        return shell + SECTION_LOADER, fragments
+    return shell[:body_end.start()] + SECTION_LOADER + shell[body_end.start():], fragments
+
+
+def write_fragments(page_dir, shell_html, fragments, fragment_dir=FRAGMENT_DIR_NAME):
+    """
+    Write fragments to <page_dir>/<fragment_dir>/<id>.html and remove
+    fragment files the shell no longer references.
+
+    Returns the total fragment bytes.
+    """
+    directory = Path(page_dir) / fragment_dir
+    referenced = {Path(href).name for href in FRAGMENT_PATTERN.findall(shell_html)}
+    if referenced:
+        directory.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for section_id, content in fragments.items():
+        path = directory / f"{section_id}.html"
+        data = content.encode('utf-8')
+        total += len(data)
+        if path.exists() and path.read_bytes() == data:
+            continue
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    if directory.is_dir():
+        for path in directory.glob('*.html'):
+            if path.name not in referenced:
+                path.unlink()
+    return total
+
+
+def join_page(shell_html, page_dir):
+    """
+    The full page for a split shell: every placeholder's content replaced
+    by its fragment file (placeholders whose fragment is missing are kept).
+    Unsplit pages come back unchanged.
+    """
+    if 'data-fragment="' not in shell_html:
+        return shell_html
+    parts = []
+    position = 0
+    for start, content_start, content_end, end in top_level_sections(shell_html):
+        href = FRAGMENT_PATTERN.search(shell_html[start:content_start])
+        fragment_path = Path(page_dir) / html.unescape(href.group(1)) if href else None
+        if fragment_path is None or not fragment_path.is_file():
+            continue
+        parts.append(shell_html[position:content_start])
+        parts.append(fragment_path.read_text(encoding='utf-8'))
+        position = content_end
+    parts.append(shell_html[position:])
+    return ''.join(parts)
+
+
+def split_file(path):
+    """Split one page in place; returns (bytes before, shell bytes, fragment bytes)"""
+    path = Path(path)
+    page_html = path.read_text(encoding='utf-8')
+    shell, fragments = split_page(page_html)
+    fragment_bytes = write_fragments(path.parent, shell, fragments)
+    if shell != page_html:
+        path.write_text(shell, encoding='utf-8')
+    return len(page_html.encode('utf-8')), len(shell.encode('utf-8')), fragment_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split generated guides into a shell page plus lazily loaded sections')
+    parser.add_argument('paths', nargs='+', help='Guide pages, or directories to search for */index.html')
+    args = parser.parse_args()
+
+    files = []
+    for path in map(Path, args.paths):
+        files.extend(sorted(path.rglob('index.html')) if path.is_dir() else [path])
+
+    total_before = total_shell = split = 0
+    for path in files:
+        before, shell, fragment_bytes = split_file(path)
+        total_before += before
+        total_shell += shell
+        if fragment_bytes:
+            split += 1
+            print(f"  {path}: {before:,} → {shell:,} byte shell + {fragment_bytes:,} bytes of sections")
+    if len(files) > 1:
+        print(f"  {split} of {len(files)} pages split: {total_before:,} → {total_shell:,} bytes of shells")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Build-Time Font Subsetting
+Scans every generated guide for the codepoints each font style renders, then
+writes subset woff2 files and a matching fonts.css (with narrowed
+unicode-range declarations) to <site>/assets/fonts/.
+
+Usage:
+    python generators/subset_fonts.py athletes/ --jobs 8
+
+Both families can render any text, so each gets every visible codepoint;
+italic faces only get text inside italic elements (em, blockquote, ...
+plus selectors the brand CSS sets to font-style: italic). Printable ASCII
+is always kept for script-generated text.
+
+The step is incremental: pages whose content hash is unchanged are not
+re-parsed, and fonts are only re-subset when the codepoint set (or a
+source font) changes. Subsets the new fonts.css no longer references are
+deleted. Requires fontTools (pip install fonttools brotli).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import guide_generator
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+STATE_NAME = '.subset-state.json'
+GENERATED_CSS_NAME = 'fonts.css'
+
+# Always kept: text inserted by scripts is not visible to the scan
+BASELINE_CODEPOINTS = frozenset(range(0x20, 0x7F))
+
+# Elements browsers render in italic by default
+ITALIC_TAGS = frozenset(('em', 'i', 'cite', 'var', 'dfn', 'address'))
+
+# Text in these is never drawn with the page fonts
+SKIPPED_TAGS = frozenset(('head', 'title', 'script', 'style', 'noscript', 'template'))
+
+VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                       'source', 'track', 'wbr'))
+
+# Subset files are named <source stem>.<content hash>.woff2
+SUBSET_NAME_PATTERN = re.compile(r'\.[0-9a-f]{10}\.woff2$')
+
+STYLE_BLOCK_PATTERN = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+CSS_RULE_PATTERN = re.compile(r'([^{}]+)\{([^{}]*)\}')
+CSS_CONTENT_PATTERN = re.compile(r'content:\s*(["\'])(.*?)\1')
+CSS_ESCAPE_PATTERN = re.compile(r'\\([0-9A-Fa-f]{1,6})\s?')
+
+
+def italic_selectors(css):
+    """
+    Tags and classes that CSS rules set to font-style: italic.
+
+    Only the last compound of each selector is used (".footer .tagline"
+    yields the class "tagline"), which over-approximates, never under.
+    """
+    tags = set(ITALIC_TAGS)
+    classes = set()
+    for selectors, body in CSS_RULE_PATTERN.findall(re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)):
+        if not re.search(r'font-style:\s*italic', body):
+            continue
+        for selector in selectors.split(','):
+            compound = re.split(r'[\s>+~]+', selector.strip())[-1]
+            compound = re.split(r'::?', compound)[0]
+            tag = re.match(r'[a-zA-Z][a-zA-Z0-9-]*', compound)
+            if tag:
+                tags.add(tag.group(0).lower())
+            classes.update(re.findall(r'\.([A-Za-z0-9_-]+)', compound))
+    return frozenset(tags), frozenset(classes)
+
+
+def css_content_codepoints(css):
+    """Codepoints of CSS content: "..." strings (generated bullets, arrows, ...)"""
+    codepoints = set()
+    for _, text in CSS_CONTENT_PATTERN.findall(css):
+        text = CSS_ESCAPE_PATTERN.sub(lambda m: chr(int(m.group(1), 16)), text)
+        codepoints.update(map(ord, text))
+    return codepoints
+
+
+class PageTextScanner(HTMLParser):
+    """Collect the codepoints of visible text, split into normal and italic"""
+
+    def __init__(self, italic_tags, italic_classes):
+        super().__init__(convert_charrefs=True)
+        self.italic_tags = italic_tags
+        self.italic_classes = italic_classes
+        self.stack = []
+        self.normal = set()
+        self.italic = set()
+        self.css = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        parent_italic, parent_skipped = self.stack[-1][1:] if self.stack else (False, False)
+        classes = (attrs.get('class') or '').split()
+        italic = (parent_italic or tag in self.italic_tags
+                  or any(name in self.italic_classes for name in classes))
+        skipped = parent_skipped or tag in SKIPPED_TAGS
+        if not skipped:
+            for name in ('value', 'placeholder'):
+                if attrs.get(name):
+                    self._add(attrs[name], italic)
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, italic, skipped))
+
+    def handle_endtag(self, tag):
+        # Pop to the matching element; stray end tags are ignored
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                break
+
+    def handle_data(self, data):
+        tag, italic, skipped = self.stack[-1] if self.stack else (None, False, False)
+        if tag == 'style':
+            self.css.append(data)
+        elif not skipped:
+            self._add(data, italic)
+
+    def _add(self, text, italic):
+        # Control characters (newlines, tabs) are never drawn
+        codepoints = {codepoint for codepoint in map(ord, text) if codepoint >= 0x20}
+        self.normal |= codepoints
+        if italic:
+            self.italic |= codepoints
+
+
+def scan_page(task):
+    """
+    Scan one page. Runs inside a pool worker.
+
+    Returns (path, content hash, normal codepoints, italic codepoints); the
+    codepoints are None when the hash matches previous_hash.
+    """
+    path, previous_hash, italic_tags, italic_classes = task
+    data = Path(path).read_bytes()
+    content_hash = hashlib.sha256(data).hexdigest()
+    if content_hash == previous_hash:
+        return path, content_hash, None, None
+    scanner = PageTextScanner(italic_tags, italic_classes)
+    scanner.feed(data.decode('utf-8'))
+    scanner.close()
+    content = css_content_codepoints(''.join(scanner.css))
+    return path, content_hash, sorted(scanner.normal | content), sorted(scanner.italic)
+
+
+def format_unicode_range(codepoints):
+    """Format sorted codepoints as a CSS unicode-range ('U+0020-007E, U+00E9')"""
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and codepoint == ranges[-1][1] + 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ', '.join(f"U+{first:04X}" if first == last else f"U+{first:04X}-{last:04X}" for first, last in ranges)
+
+
+def _in_ranges(codepoint, ranges):
+    return not ranges or any(first <= codepoint <= last for first, last in ranges)
+
+
+def _write_atomic(path, data):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def subset_face(source_path, codepoints):
+    """Return woff2 bytes of source_path reduced to codepoints"""
+    options = font_subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.notdef_outline = True
+    font = font_subset.load_font(str(source_path), options)
+    subsetter = font_subset.Subsetter(options=options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    out_path = source_path.with_name(f".{source_path.stem}.{os.getpid()}.subset")
+    try:
+        font_subset.save_font(font, str(out_path), options)
+        return out_path.read_bytes()
+    finally:
+        out_path.unlink(missing_ok=True)
+
+
+def remove_stale_subsets(font_dir, referenced):
+    """Delete subset files in font_dir that are not in referenced; return how many"""
+    removed = 0
+    for path in Path(font_dir).glob('*.woff2'):
+        if SUBSET_NAME_PATTERN.search(path.name) and path.name not in referenced:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def load_state(font_dir):
+    """Load the subsetting state file, or an empty one if missing/unreadable"""
+    try:
+        with open(font_dir / STATE_NAME, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault('pages', {})
+    state.setdefault('faces', {})
+    return state
+
+
+def subset_site(site_dir, jobs=None, force=False):
+    """
+    Subset the brand fonts to the codepoints used by the pages under site_dir.
+
+    Writes <site_dir>/assets/fonts/fonts.css and the subset files it
+    references. Returns a summary dict; 'changed' is True when fonts.css
+    was (re)written, i.e. pages must be re-rendered against it.
+    """
+    site_dir = Path(site_dir)
+    font_dir = site_dir / 'assets' / guide_generator.FONT_ASSETS_DIR_NAME
+    css_path = font_dir / GENERATED_CSS_NAME
+    jobs = jobs or os.cpu_count() or 1
+    state = load_state(font_dir)
+    start = time.perf_counter()
+
+    # The template's <style> blocks carry the brand CSS and its legacy styles
+    template_css = '\n'.join(STYLE_BLOCK_PATTERN.findall(guide_generator.load_template()))
+    italic_tags, italic_classes = italic_selectors(template_css)
+    base_codepoints = set(BASELINE_CODEPOINTS) | css_content_codepoints(template_css)
+
+    # Scan pages; unchanged ones reuse their recorded codepoints
+    pages = [path for path in sorted(site_dir.rglob('*.html')) if font_dir not in path.parents]
+    tasks = []
+    for path in pages:
+        entry = state['pages'].get(path.relative_to(site_dir).as_posix(), {})
+        tasks.append((str(path), None if force else entry.get('hash'), italic_tags, italic_classes))
+    if jobs == 1 or len(tasks) <= 1:
+        results = [scan_page(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(scan_page, tasks, chunksize=8))
+
+    page_state = {}
+    normal = set(base_codepoints)
+    italic = set(base_codepoints)
+    rescanned = 0
+    for path, content_hash, page_normal, page_italic in results:
+        key = Path(path).relative_to(site_dir).as_posix()
+        if page_normal is None:
+            page_normal = state['pages'][key]['normal']
+            page_italic = state['pages'][key]['italic']
+        else:
+            rescanned += 1
+        page_state[key] = {'hash': content_hash, 'normal': page_normal, 'italic': page_italic}
+        normal.update(page_normal)
+        italic.update(page_italic)
+
+    summary = {
+        'fonts_css': str(css_path),
+        'pages': len(pages),
+        'rescanned': rescanned,
+        'normal_codepoints': len(normal),
+        'italic_codepoints': len(italic),
+        'faces': [],
+        'changed': False,
+    }
+
+    # Same codepoints and same source fonts: nothing to re-subset
+    digest = hashlib.sha256(guide_generator.FONTS_CSS_PATH.read_bytes())
+    for name in guide_generator.font_files():
+        digest.update((guide_generator.FONTS_DIR / name).read_bytes())
+    source_hash = digest.hexdigest()
+    codepoint_hash = hashlib.sha256(json.dumps([sorted(normal), sorted(italic)]).encode('utf-8')).hexdigest()
+    up_to_date = (not force and css_path.exists() and state.get('codepoint_hash') == codepoint_hash
+                  and state.get('source_hash') == source_hash)
+
+    if not up_to_date:
+        if font_subset is None:
+            raise RuntimeError('fontTools is required for font subsetting (pip install fonttools brotli)')
+        font_dir.mkdir(parents=True, exist_ok=True)
+        blocks = []
+        face_state = {}
+        for face in guide_generator.load_font_faces():
+            wanted = italic if face['style'] == 'italic' else normal
+            codepoints = sorted(c for c in wanted if _in_ranges(c, face['ranges']))
+            if not codepoints:
+                summary['faces'].append({'file': face['file'], 'dropped': True})
+                continue
+            source = guide_generator.FONTS_DIR / face['file']
+            data = subset_face(source, codepoints)
+            name = f"{Path(face['file']).stem}.{hashlib.sha256(data).hexdigest()[:10]}.woff2"
+            if not (font_dir / name).exists():
+                _write_atomic(font_dir / name, data)
+            face_state[face['file']] = {'file': name, 'codepoints': len(codepoints)}
+            summary['faces'].append({'file': face['file'], 'subset': name, 'codepoints': len(codepoints),
+                                     'bytes_before': source.stat().st_size, 'bytes_after': len(data)})
+            blocks.append(
+                f"/* {face['family']} — {face['style'].title()} — subset of {face['file']} */\n"
+                f"@font-face {{\n"
+                f"  font-family: '{face['family']}';\n"
+                f"  font-style: {face['style']};\n"
+                f"  font-weight: {face['weight']};\n"
+                f"  font-display: {face['display']};\n"
+                f"  src: url('./{name}') format('woff2');\n"
+                f"  unicode-range: {format_unicode_range(codepoints)};\n"
+                f"}}\n"
+            )
+
+        css = ('/* Generated by generators/subset_fonts.py from brand/fonts/fonts.css; do not edit. */\n\n'
+               + '\n'.join(blocks))
+        if not css_path.exists() or css_path.read_text(encoding='utf-8') != css:
+            _write_atomic(css_path, css.encode('utf-8'))
+            summary['changed'] = True
+        state['faces'] = face_state
+        state['codepoint_hash'] = codepoint_hash
+        state['source_hash'] = source_hash
+
+    # Older subsets would otherwise pile up (and be precached by the service worker)
+    summary['removed'] = remove_stale_subsets(font_dir, {face['file'] for face in state['faces'].values()})
+    state['pages'] = page_state
+    _write_atomic(font_dir / STATE_NAME, (json.dumps(state, sort_keys=True) + '\n').encode('utf-8'))
+    summary['seconds'] = time.perf_counter() - start
+    summary['up_to_date'] = up_to_date
+    return summary
+
+
+def print_summary(summary):
+    """Print codepoint counts and per-face size savings"""
+    print(f"\n✓ Scanned {summary['rescanned']} of {summary['pages']} pages in {summary['seconds']:.2f}s")
+    print(f"  → {summary['normal_codepoints']} normal / {summary['italic_codepoints']} italic codepoints")
+    if summary['removed']:
+        print(f"  → Removed {summary['removed']} stale subsets")
+    if summary['up_to_date']:
+        print("  → Codepoint set unchanged; font subsets are up to date")
+        return
+    before = after = 0
+    for face in summary['faces']:
+        if face.get('dropped'):
+            print(f"  → {face['file']}: unused, dropped")
+            continue
+        before += face['bytes_before']
+        after += face['bytes_after']
+        print(f"  → {face['file']}: {face['bytes_before'] / 1024:.1f} KB → {face['bytes_after'] / 1024:.1f} KB "
+              f"({face['codepoints']} codepoints)")
+    print(f"  → Fonts: {before / 1024:.1f} KB → {after / 1024:.1f} KB; wrote {summary['fonts_css']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Subset brand fonts to the glyphs used by generated guides')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rescan every page and re-subset every font')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+    try:
+        summary = subset_site(args.site, args.jobs, args.force)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    print_summary(summary)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Site Verifier
+Checks a built site against a declarative list of assertions, reading
+every file at most once.
+
+Assertions are JSON objects (see site_checks.json):
+
+    {"name": "Reliance guide correction",
+     "glob": "reliance-deep-woods-*/index.html",
+     "count": 7,
+     "must_contain": ["Reliance Tennessee Gravel"],
+     "must_not_contain": ["Reliance Deep Woods"]}
+
+- glob: fnmatch pattern for paths relative to the site ('*' also matches '/')
+- count: exact number of files the glob must match (optional)
+- must_contain: strings every matched file must contain (optional)
+- must_not_contain: strings no matched file may contain (optional)
+
+The site is listed once, and every file an assertion reads is read once
+(in a process pool) and searched for all of its needles together. Split
+pages (see split_sections.py) are checked with their sections.
+
+Usage:
+    python generators/verify_site.py _site/athletes
+    python generators/verify_site.py athletes/ --checks my_checks.json --jobs 8
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: import the siblings through the package (see __init__.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'generators'
+
+from . import split_sections
+
+DEFAULT_CHECKS_PATH = Path(__file__).resolve().parent / 'site_checks.json'
+
+ASSERTION_KEYS = frozenset(('name', 'glob', 'count', 'must_contain', 'must_not_contain'))
+
+# Failing files listed per assertion before the rest are summarized
+MAX_LISTED = 10
+
+
+def load_checks(checks_path=None):
+    """Load and validate the assertion list; raises ValueError on a malformed entry"""
+    with open(checks_path or DEFAULT_CHECKS_PATH, 'r', encoding='utf-8') as f:
+        checks = json.load(f)
+    if not isinstance(checks, list):
+        raise ValueError('checks must be a JSON list of assertions')
+    for index, check in enumerate(checks):
+        label = check.get('name', f"assertion {index + 1}") if isinstance(check, dict) else f"assertion {index + 1}"
+        if not isinstance(check, dict) or not isinstance(check.get('glob'), str):
+            raise ValueError(f"{label}: needs a 'glob'")
+        unknown = set(check) - ASSERTION_KEYS
+        if unknown:
+            raise ValueError(f"{label}: unknown keys {', '.join(sorted(unknown))}")
+        for key in ('must_contain', 'must_not_contain'):
+            if not all(isinstance(needle, str) and needle for needle in check.get(key, [])):
+                raise ValueError(f"{label}: '{key}' must be a list of non-empty strings")
+        if 'count' in check and not isinstance(check['count'], int):
+            raise ValueError(f"{label}: 'count' must be an integer")
+    return checks
+
+
+def list_files(site_dir):
+    """Every file under site_dir as a sorted list of posix paths relative to it"""
+    files = []
+    stack = ['']
+    while stack:
+        prefix = stack.pop()
+        with os.scandir(os.path.join(site_dir, prefix)) as entries:
+            for entry in entries:
+                name = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name + '/')
+                elif entry.is_file():
+                    files.append(name)
+    return sorted(files)
+
+
+def scan_file(task):
+    """Return the set of needles found in one file. Runs inside a pool worker."""
+    path, needles = task
+    with open(path, 'rb') as f:
+        content = f.read()
+    if b'data-fragment="' in content:
+        content = split_sections.join_page(content.decode('utf-8'), Path(path).parent).encode('utf-8')
+    return {needle for needle in needles if needle.encode('utf-8') in content}
+
+
+def verify_site(site_dir, checks, jobs=None):
+    """
+    Evaluate every assertion against site_dir in one pass.
+
+    Returns a summary dict: 'results' holds one entry per assertion with
+    'name', 'matched' (file count), 'passed' and 'failures' (messages),
+    plus file counts and timing.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    files = list_files(site_dir)
+
+    matched = []
+    needles_by_file = {}
+    for check in checks:
+        pattern = re.compile(fnmatch.translate(check['glob']))
+        paths = [path for path in files if pattern.match(path)]
+        matched.append(paths)
+        needles = set(check.get('must_contain', [])) | set(check.get('must_not_contain', []))
+        if needles:
+            for path in paths:
+                needles_by_file.setdefault(path, set()).update(needles)
+
+    tasks = [(os.path.join(site_dir, path), sorted(needles)) for path, needles in sorted(needles_by_file.items())]
+    if jobs == 1 or len(tasks) <= 1:
+        found = [scan_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            found = list(pool.map(scan_file, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    found = dict(zip(sorted(needles_by_file), found))
+
+    results = []
+    for check, paths in zip(checks, matched):
+        failures = []
+        if 'count' in check and len(paths) != check['count']:
+            failures.append(f"expected {check['count']} files matching {check['glob']}, found {len(paths)}")
+        for path in paths:
+            for needle in check.get('must_contain', []):
+                if needle not in found[path]:
+                    failures.append(f"{path}: missing {needle!r}")
+            for needle in check.get('must_not_contain', []):
+                if needle in found[path]:
+                    failures.append(f"{path}: contains {needle!r}")
+        results.append({
+            'name': check.get('name', check['glob']),
+            'matched': len(paths),
+            'passed': not failures,
+            'failures': failures,
+        })
+
+    return {
+        'files': len(files),
+        'read': len(tasks),
+        'results': results,
+        'passed': all(result['passed'] for result in results),
+        'seconds': time.perf_counter() - start,
+        'jobs': jobs,
+    }
+
+
+def print_summary(summary):
+    for result in summary['results']:
+        mark = '✓' if result['passed'] else '✗'
+        print(f"  {mark} {result['name']} ({result['matched']:,} files)")
+        for failure in result['failures'][:MAX_LISTED]:
+            print(f"      {failure}")
+        if len(result['failures']) > MAX_LISTED:
+            print(f"      … and {len(result['failures']) - MAX_LISTED:,} more")
+    failed = sum(not result['passed'] for result in summary['results'])
+    print(f"  → {len(summary['results'])} assertions, {failed} failed; {summary['read']:,} of "
+          f"{summary['files']:,} files read in {summary['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check a built site against declarative assertions')
+    parser.add_argument('site', nargs='?', default='athletes', help='Site directory (default: athletes)')
+    parser.add_argument('--checks', help=f"Assertion list JSON (default: {DEFAULT_CHECKS_PATH.name} next to this script)")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if not Path(args.site).is_dir():
+        print(f"Site directory not found: {args.site}")
+        return 1
+    try:
+        checks = load_checks(args.checks)
+    except (OSError, ValueError) as e:
+        print(f"Could not load checks: {e}")
+        return 1
+
+    summary = verify_site(args.site, checks, args.jobs)
+    print_summary(summary)
+    return 0 if summary['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,7 +8,7 @@ import re
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # Neo-brutalist color scheme
 COLORS = {
@@ -78,9 +78,14 @@ def extract_sections(template: str) -> Dict[str, str]:
     
     return sections
 
-def replace_variables(text: str, race_data: Dict[str, Any]) -> str:
-    """Replace all template variables with race data"""
-    # Build variable mapping
+# Template variables look like {{RACE_NAME}}
+VARIABLE_PATTERN = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}')
+# A mapped value that is itself a placeholder ({{NAME}}, or the broken
+# single-brace {NAME}) means the race data had nothing for it
+PLACEHOLDER_VALUE_PATTERN = re.compile(r'\{\{?[A-Za-z0-9_]+\}\}?')
+
+def build_variable_map(race_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Template variable name -> value; missing data falls back to the {{NAME}} placeholder"""
     vars_map = {
         'RACE_NAME': race_data.get('race', {}).get('name', '{{RACE_NAME}}'),
         'DISTANCE': str(race_data.get('race', {}).get('vitals', {}).get('distance_miles', '{{DISTANCE}}')),
@@ -112,24 +117,24 @@ def replace_variables(text: str, race_data: Dict[str, Any]) -> str:
     workouts = race_data.get('key_workouts', [])
     for i in range(1, 5):
         if i <= len(workouts):
-            vars_map[f'KEY_WORKOUT_{i}_NAME'] = workouts[i-1].get('name', f'{{KEY_WORKOUT_{i}_NAME}}')
-            vars_map[f'KEY_WORKOUT_{i}_PURPOSE'] = workouts[i-1].get('purpose', f'{{KEY_WORKOUT_{i}_PURPOSE}}')
+            vars_map[f'KEY_WORKOUT_{i}_NAME'] = workouts[i-1].get('name', f'{{{{KEY_WORKOUT_{i}_NAME}}}}')
+            vars_map[f'KEY_WORKOUT_{i}_PURPOSE'] = workouts[i-1].get('purpose', f'{{{{KEY_WORKOUT_{i}_PURPOSE}}}}')
         else:
-            vars_map[f'KEY_WORKOUT_{i}_NAME'] = f'{{KEY_WORKOUT_{i}_NAME}}'
-            vars_map[f'KEY_WORKOUT_{i}_PURPOSE'] = f'{{KEY_WORKOUT_{i}_PURPOSE}}'
+            vars_map[f'KEY_WORKOUT_{i}_NAME'] = f'{{{{KEY_WORKOUT_{i}_NAME}}}}'
+            vars_map[f'KEY_WORKOUT_{i}_PURPOSE'] = f'{{{{KEY_WORKOUT_{i}_PURPOSE}}}}'
     
     # Non-negotiables
     non_negs = race_data.get('race', {}).get('non_negotiables', [])
     for i in range(1, 6):
         if i <= len(non_negs):
             req = non_negs[i-1]
-            vars_map[f'NON_NEG_{i}_REQUIREMENT'] = req.get('requirement', f'{{NON_NEG_{i}_REQUIREMENT}}')
-            vars_map[f'NON_NEG_{i}_BY_WHEN'] = req.get('by_when', f'{{NON_NEG_{i}_BY_WHEN}}')
-            vars_map[f'NON_NEG_{i}_WHY'] = req.get('why', f'{{NON_NEG_{i}_WHY}}')
+            vars_map[f'NON_NEG_{i}_REQUIREMENT'] = req.get('requirement', f'{{{{NON_NEG_{i}_REQUIREMENT}}}}')
+            vars_map[f'NON_NEG_{i}_BY_WHEN'] = req.get('by_when', f'{{{{NON_NEG_{i}_BY_WHEN}}}}')
+            vars_map[f'NON_NEG_{i}_WHY'] = req.get('why', f'{{{{NON_NEG_{i}_WHY}}}}')
         else:
-            vars_map[f'NON_NEG_{i}_REQUIREMENT'] = f'{{NON_NEG_{i}_REQUIREMENT}}'
-            vars_map[f'NON_NEG_{i}_BY_WHEN'] = f'{{NON_NEG_{i}_BY_WHEN}}'
-            vars_map[f'NON_NEG_{i}_WHY'] = f'{{NON_NEG_{i}_WHY}}'
+            vars_map[f'NON_NEG_{i}_REQUIREMENT'] = f'{{{{NON_NEG_{i}_REQUIREMENT}}}}'
+            vars_map[f'NON_NEG_{i}_BY_WHEN'] = f'{{{{NON_NEG_{i}_BY_WHEN}}}}'
+            vars_map[f'NON_NEG_{i}_WHY'] = f'{{{{NON_NEG_{i}_WHY}}}}'
     
     # Race-specific content
     vars_map['RACE_SPECIFIC_SKILL_NOTES'] = race_data.get('race', {}).get('skill_notes', '{{RACE_SPECIFIC_SKILL_NOTES}}')
@@ -143,12 +148,29 @@ def replace_variables(text: str, race_data: Dict[str, Any]) -> str:
     vars_map['SKILL_5_HOW'] = skills.get('skill_5_how', '{{SKILL_5_HOW}}')
     vars_map['SKILL_5_CUE'] = skills.get('skill_5_cue', '{{SKILL_5_CUE}}')
     
-    # Replace all variables
-    result = text
-    for var, value in vars_map.items():
-        result = result.replace(f'{{{{{var}}}}}', str(value))
-    
-    return result
+    return vars_map
+
+def replace_variables(text: str, race_data: Dict[str, Any], unresolved: Optional[List[str]] = None) -> str:
+    """
+    Replace all template variables with race data in a single pass.
+
+    Variables with no mapping, or whose value is still a placeholder, are
+    left in the text as {{NAME}}; their names are appended to `unresolved`
+    (in document order) when a list is passed.
+    """
+    # Replace all variables in one scan of the text
+    values = {var: str(value) for var, value in build_variable_map(race_data).items()
+              if not PLACEHOLDER_VALUE_PATTERN.fullmatch(str(value))}
+    
+    def lookup(match: 're.Match') -> str:
+        name = match.group(1)
+        if name in values:
+            return values[name]
+        if unresolved is not None:
+            unresolved.append(name)
+        return match.group(0)
+    
+    return VARIABLE_PATTERN.sub(lookup, text)
 
 def generate_svg_phase_bars() -> str:
     """Generate SVG phase bars with neo-brutalist styling"""
@@ -297,7 +319,10 @@ def generate_html(race_data: Dict[str, Any], output_path: Optional[Path] = None)
     sections = extract_sections(template)
     
     # Replace variables in template
-    processed_template = replace_variables(template, race_data)
+    unresolved_vars: List[str] = []
+    processed_template = replace_variables(template, race_data, unresolved_vars)
+    if unresolved_vars:
+        print(f"Warning: unresolved template variables left in guide: {', '.join(sorted(set(unresolved_vars)))}")
     processed_sections = extract_sections(processed_template)
     
     # Load neo-brutalist CSS
@@ -0,0 +1,152 @@
+/*
+ * Guide search client (index built by generators/search_index.py).
+ *
+ * Fetches docs.json once, then only the <prefix>.json shards the query's
+ * terms fall into (hot prefixes are split into longer ones, listed under
+ * 'split' in docs.json). Stopwords are dropped like in the index. Any <form data-guide-search="RESULTS_ID"> on the page
+ * gets search-as-you-type; window.GuideSearch.search(query) is also exposed.
+ */
+(function () {
+  var base = document.currentScript.src.replace(/[^\/]*$/, '');
+  var siteRoot = base + '../';
+  var indexPromise = null;
+  var shards = {};
+
+  function tokenize(text, stopwords) {
+    return (text.toLowerCase().match(/[\p{L}\p{N}]+/gu) || []).filter(function (term) {
+      return term.length > 1 && term.length <= 30 && !(stopwords && stopwords[term]);
+    });
+  }
+
+  function shardName(prefix) {
+    if (/^[a-z0-9]+$/.test(prefix)) return prefix;
+    return '_' + Array.prototype.map.call(new TextEncoder().encode(prefix), function (byte) {
+      return ('0' + byte.toString(16)).slice(-2);
+    }).join('');
+  }
+
+  function fetchJson(url) {
+    return fetch(url).then(function (response) { return response.ok ? response.json() : {}; });
+  }
+
+  function loadIndex() {
+    indexPromise = indexPromise || fetchJson(base + 'docs.json').then(function (index) {
+      index.stopwordSet = {};
+      (index.stopwords || []).forEach(function (term) { index.stopwordSet[term] = true; });
+      return index;
+    });
+    return indexPromise;
+  }
+
+  function shardPrefix(index, term) {
+    var prefix = term.slice(0, index.prefix_length);
+    while (term.length > prefix.length && index.split[prefix]) prefix = term.slice(0, prefix.length + 1);
+    return prefix;
+  }
+
+  function splitPrefixes(index, prefix) {
+    // The prefix and every shard split from it
+    var prefixes = [prefix];
+    Array.from(index.split[prefix] || '').forEach(function (next) {
+      prefixes = prefixes.concat(splitPrefixes(index, prefix + next));
+    });
+    return prefixes;
+  }
+
+  function loadShard(index, prefix) {
+    var name = shardName(prefix);
+    shards[name] = shards[name] || fetchJson(base + name + '.json?v=' + index.version);
+    return shards[name];
+  }
+
+  function matches(index, term, last) {
+    var prefix = shardPrefix(index, term);
+    return loadShard(index, prefix).then(function (shard) {
+      if (shard[term] || !last) return shard[term] ? [shard[term]] : [];
+      // The last term may still be being typed: match it as a prefix
+      return Promise.all(splitPrefixes(index, prefix).map(function (name) {
+        return loadShard(index, name);
+      })).then(function (loaded) {
+        var entries = [];
+        loaded.forEach(function (shard) {
+          Object.keys(shard).forEach(function (key) { if (key.indexOf(term) === 0) entries.push(shard[key]); });
+        });
+        return entries;
+      });
+    });
+  }
+
+  function search(query, limit) {
+    return loadIndex().then(function (index) {
+      var terms = tokenize(query, index.stopwordSet);
+      return Promise.all(terms.map(function (term, i) {
+        return matches(index, term, i === terms.length - 1);
+      })).then(function (found) {
+        var scores = {};
+        found.forEach(function (entries, i) {
+          entries.forEach(function (postings) {
+            var idf = Math.log(1 + index.docs.length / postings.length);
+            postings.forEach(function (posting) {
+              var hit = scores[posting[0]] || (scores[posting[0]] = {doc: posting[0], score: 0, matched: {}, weight: 0});
+              hit.score += Math.log(1 + posting[1]) * idf;
+              hit.matched[i] = true;
+              if (posting[1] > hit.weight) {
+                hit.weight = posting[1];
+                hit.section = index.sections[posting[2]];
+              }
+            });
+          });
+        });
+        return Object.keys(scores).map(function (doc) {
+          var hit = scores[doc];
+          hit.terms = Object.keys(hit.matched).length;
+          return hit;
+        }).sort(function (a, b) {
+          return b.terms - a.terms || b.score - a.score;
+        }).slice(0, limit || 20).map(function (hit) {
+          var doc = index.docs[hit.doc];
+          return {
+            url: siteRoot + doc[0] + (hit.section ? '#' + hit.section : ''),
+            title: doc[1],
+            section: hit.section || '',
+            terms: hit.terms
+          };
+        });
+      });
+    });
+  }
+
+  function bind(form) {
+    var input = form.querySelector('input');
+    var output = document.getElementById(form.getAttribute('data-guide-search'));
+    var latest = 0;
+    input.addEventListener('input', function () {
+      var request = ++latest;
+      if (!tokenize(input.value).length) {
+        output.textContent = '';
+        return;
+      }
+      search(input.value, 20).then(function (results) {
+        if (request !== latest) return;
+        output.textContent = '';
+        results.forEach(function (result) {
+          var item = document.createElement('li');
+          var link = document.createElement('a');
+          link.href = result.url;
+          link.textContent = result.title;
+          item.appendChild(link);
+          if (result.section) {
+            var section = document.createElement('span');
+            section.textContent = result.section.replace(/-/g, ' ');
+            item.appendChild(section);
+          }
+          output.appendChild(item);
+        });
+        if (!results.length) output.textContent = 'No guides match.';
+      });
+    });
+  }
+
+  window.GuideSearch = {search: search};
+  Array.prototype.forEach.call(document.querySelectorAll('form[data-guide-search]'), bind);
+})();
@@ -0,0 +1,177 @@
+/*
+ * Guide service worker (generated by generators/service_worker.py).
+ *
+ * precache-manifest.json lists every guide and shared asset with a content
+ * hash. Each response is cached under "<url>?__v=<hash>", so:
+ *   - shared assets (stylesheets, fonts, the catalog) are precached on
+ *     install, fetching only the ones whose hash changed;
+ *   - a guide is cached the first time it is opened, together with its
+ *     split-out sections, and then served from the cache;
+ *   - when a new build changes a guide this device holds, only that guide
+ *     is fetched again; entries with stale hashes are dropped on activate.
+ * Anything else in scope is network-first with a cached fallback.
+ */
+var VERSION = '{{VERSION}}';
+var MANIFEST_URL = '{{MANIFEST_URL}}';
+var CACHE_NAME = 'gg-guides';
+var FRAGMENT_PATTERN = /data-fragment="([^"]+)"/g;
+var scope = self.registration.scope;
+var manifestPromise = null;
+
+function cacheKey(rel, hash) {
+  return scope + rel + '?__v=' + hash;
+}
+
+// Scope-relative URL without query, 'index.html' or hash; null outside scope
+function relative(url) {
+  var path = url.split(/[?#]/)[0];
+  if (path.indexOf(scope) !== 0) return null;
+  path = path.slice(scope.length);
+  return /(^|\/)index\.html$/.test(path) ? path.slice(0, -'index.html'.length) : path;
+}
+
+function loadManifest() {
+  // Kept in the cache, so a restarted worker can still answer offline
+  manifestPromise = manifestPromise || caches.open(CACHE_NAME).then(function (cache) {
+    var request = new Request(scope + MANIFEST_URL);
+    return cache.match(request).then(function (cached) {
+      return cached || fetch(request).then(function (response) {
+        if (!response.ok) throw new Error(response.status);
+        return cache.put(request, response.clone()).then(function () { return response; });
+      });
+    });
+  }).then(function (response) {
+    return response.json();
+  }).then(function (data) {
+    var manifest = {shared: data.shared, revisions: {}, guides: {}};
+    data.shared.forEach(function (entry) { manifest.revisions[entry[0]] = entry[1]; });
+    data.guides.forEach(function (entry) {
+      manifest.revisions[entry[0]] = entry[1];
+      manifest.guides[entry[0]] = true;
+    });
+    return manifest;
+  }).catch(function (error) {
+    manifestPromise = null;
+    throw error;
+  });
+  return manifestPromise;
+}
+
+// [url the revision belongs to, hash]: split-out sections share their guide's
+function revisionOf(manifest, rel) {
+  if (rel === null) return null;
+  if (rel in manifest.revisions) return [rel, manifest.revisions[rel]];
+  var owner = rel.replace(/^([^\/]+\/)sections\/[^\/]+$/, '$1');
+  return owner !== rel && manifest.guides[owner] ? [owner, manifest.revisions[owner]] : null;
+}
+
+function fetchOk(url) {
+  return fetch(url).then(function (response) {
+    if (!response.ok) throw new Error(response.status);
+    return response;
+  });
+}
+
+// Cache a guide and every section it loads on demand, all under its hash
+function cacheGuide(cache, rel, hash, response) {
+  var pageUrl = scope + rel;
+  return response.clone().text().then(function (markup) {
+    var puts = [cache.put(cacheKey(rel, hash), response)];
+    var match;
+    FRAGMENT_PATTERN.lastIndex = 0;
+    while ((match = FRAGMENT_PATTERN.exec(markup))) {
+      var url = new URL(match[1].replace(/&amp;/g, '&'), pageUrl).href;
+      puts.push(fetchOk(url).then(function (fragment) {
+        return cache.put(cacheKey(relative(fragment.url), hash), fragment);
+      }, function () {}));
+    }
+    return Promise.all(puts);
+  });
+}
+
+self.addEventListener('install', function (event) {
+  event.waitUntil(Promise.all([loadManifest(), caches.open(CACHE_NAME)]).then(function (loaded) {
+    var manifest = loaded[0];
+    var cache = loaded[1];
+    return cache.keys().then(function (requests) {
+      var cached = {};
+      requests.forEach(function (request) { cached[request.url] = true; });
+      var shared = manifest.shared.filter(function (entry) {
+        return !cached[cacheKey(entry[0], entry[1])];
+      }).map(function (entry) {
+        return fetchOk(scope + entry[0]).then(function (response) {
+          return cache.put(cacheKey(entry[0], entry[1]), response);
+        });
+      });
+      // Guides this device already holds are refreshed when their hash changed
+      var refreshed = {};
+      requests.forEach(function (request) {
+        var rel = relative(request.url);
+        if (manifest.guides[rel] && !cached[cacheKey(rel, manifest.revisions[rel])]) refreshed[rel] = true;
+      });
+      var guides = Object.keys(refreshed).map(function (rel) {
+        return fetchOk(scope + rel).then(function (response) {
+          return cacheGuide(cache, rel, manifest.revisions[rel], response);
+        }).catch(function () {});
+      });
+      return Promise.all(shared.concat(guides));
+    });
+  }).then(function () {
+    return self.skipWaiting();
+  }));
+});
+
+self.addEventListener('activate', function (event) {
+  event.waitUntil(Promise.all([loadManifest(), caches.open(CACHE_NAME)]).then(function (loaded) {
+    var manifest = loaded[0];
+    var cache = loaded[1];
+    return cache.keys().then(function (requests) {
+      return Promise.all(requests.map(function (request) {
+        if (request.url === scope + MANIFEST_URL) return null;
+        // Earlier builds' manifests
+        if (request.url.indexOf(scope + MANIFEST_URL.split('?')[0]) === 0) return cache.delete(request);
+        var hash = /[?&]__v=([^&#]+)/.exec(request.url);
+        if (!hash) return null;
+        var revision = revisionOf(manifest, relative(request.url));
+        return revision && revision[1] === hash[1] ? null : cache.delete(request);
+      }));
+    });
+  }).then(function () {
+    return self.clients.claim();
+  }));
+});
+
+self.addEventListener('fetch', function (event) {
+  var request = event.request;
+  var rel = relative(request.url);
+  if (request.method !== 'GET' || rel === null) return;
+
+  event.respondWith(Promise.all([loadManifest(), caches.open(CACHE_NAME)]).then(function (loaded) {
+    var manifest = loaded[0];
+    var cache = loaded[1];
+    var revision = revisionOf(manifest, rel);
+    if (!revision) {
+      // Not versioned: network first, last good copy when offline
+      var key = request.url.split('#')[0].split('?')[0];
+      return fetch(request).then(function (response) {
+        if (response.ok) cache.put(key, response.clone());
+        return response;
+      }, function () {
+        return cache.match(key).then(function (cached) { return cached || Response.error(); });
+      });
+    }
+    var versioned = cacheKey(rel, revision[1]);
+    return cache.match(versioned).then(function (cached) {
+      return cached || fetch(request).then(function (response) {
+        if (!response.ok) return response;
+        var stored = manifest.guides[rel]
+          ? cacheGuide(cache, rel, revision[1], response.clone())
+          : cache.put(versioned, response.clone());
+        event.waitUntil(stored);
+        return response;
+      });
+    });
+  }).catch(function () {
+    return fetch(request);
+  }));
+});
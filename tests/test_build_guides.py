@@ -0,0 +1,12 @@
+from generators import build_guides, guide_generator
+
+
+def test_shared_input_hash_covers_the_reference_inputs(tmp_path, monkeypatch):
+    # Pruned and critical CSS are derived from the reference pages, so
+    # changing a reference input must rebuild every page
+    athlete = tmp_path / 'reference_athlete.json'
+    athlete.write_bytes(guide_generator.REFERENCE_ATHLETE_PATH.read_bytes())
+    monkeypatch.setattr(guide_generator, 'REFERENCE_ATHLETE_PATH', athlete)
+    before = build_guides.shared_input_hash()
+    athlete.write_text('{}', encoding='utf-8')
+    assert build_guides.shared_input_hash() != before
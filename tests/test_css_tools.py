@@ -0,0 +1,67 @@
+from generators.css_tools import html_tokens, parse_css, prune_css, selector_may_match, selector_tokens
+
+
+def tokens(tags=(), classes=(), ids=()):
+    return {'tags': set(tags), 'classes': set(classes), 'ids': set(ids)}
+
+
+def test_simple_selectors_need_their_token():
+    page = tokens(tags=['div'], classes=['card'], ids=['hero'])
+    assert selector_may_match('div', page)
+    assert selector_may_match('.card', page)
+    assert selector_may_match('#hero', page)
+    assert not selector_may_match('span', page)
+    assert not selector_may_match('.missing', page)
+    assert not selector_may_match('#missing', page)
+
+
+def test_compound_selectors_need_every_token():
+    page = tokens(tags=['div'], classes=['card'])
+    assert selector_may_match('div.card', page)
+    assert not selector_may_match('div.card.is-open', page)
+    assert not selector_may_match('span.card', page)
+
+
+def test_every_part_of_a_complex_selector_must_match():
+    page = tokens(tags=['ul', 'li'], classes=['toc', 'active'])
+    assert selector_may_match('.toc > li + li ~ li .active', page)
+    assert selector_may_match('ul.toc li', page)
+    assert not selector_may_match('.toc > li a', page)
+    assert not selector_may_match('nav .toc', page)
+
+
+def test_tag_names_match_case_insensitively():
+    assert selector_may_match('DIV', tokens(tags=['div']))
+
+
+def test_pseudo_classes_and_attributes_never_decide():
+    page = tokens(tags=['a', 'details'], classes=['link'])
+    assert selector_may_match('a.link:hover', page)
+    assert selector_may_match('.link::after', page)
+    assert selector_may_match('details[open] > a:not(.link)', page)
+    assert selector_may_match('a[href^="https:"]:nth-child(2n + 1)', page)
+    assert not selector_may_match('.missing:hover', page)
+
+
+def test_document_root_selectors_always_match():
+    page = tokens()
+    for selector in (':root', '*', 'html', 'body', 'html body', '*::before'):
+        assert selector_may_match(selector, page), selector
+
+
+def test_html_tokens_collects_tags_classes_and_ids():
+    found = html_tokens('<DIV class="a  b" id="x"><span CLASS=\'c\' data-id="nope"></span><p id=" "></p></DIV>')
+    assert found == tokens(tags=['div', 'span', 'p'], classes=['a', 'b', 'c'], ids=['x'])
+
+
+def test_selector_tokens_walk_grouping_at_rules():
+    css = '.a, #b > span:hover { x: 1 } @media (min-width: 1px) { p.c[hidden] { x: 2 } } @font-face { src: x }'
+    assert selector_tokens(parse_css(css)) == tokens(tags=['span', 'p'], classes=['a', 'c'], ids=['b'])
+
+
+def test_prune_css_drops_unmatched_selectors_and_empty_media():
+    css = '.a, .b { color: red } @media print { .b { color: blue } } @font-face { font-family: x }'
+    pruned = prune_css(css, tokens(classes=['a']))
+    assert '.a' in pruned and '.b' not in pruned
+    assert '@media' not in pruned
+    assert '@font-face' in pruned
@@ -0,0 +1,57 @@
+import itertools
+import re
+
+from generators import guide_generator
+
+
+def test_no_template_slot_inside_class_or_id():
+    # uncovered_tokens() only scans slot values, so the markup around them
+    # must not be able to form new classes or ids
+    template = guide_generator.TEMPLATE_PATH.read_text(encoding='utf-8')
+    assert not re.search(r'''\s(?:class|id)\s*=\s*(?:"[^"]*\{\{|'[^']*\{\{)''', template, re.IGNORECASE)
+
+
+def test_reference_pages_cover_every_page_type():
+    types = {guide_generator.page_type({'race_elevation': elevation, 'ability_level': ability_level,
+                                        'is_custom_plan': custom})
+             for elevation, ability_level, custom in itertools.product(
+                 (0, 3000), ('Intermediate', 'Masters'), (False, True))}
+    assert {page_type for page_type, _ in guide_generator.reference_pages()} == types
+
+
+def test_uncovered_tokens_only_reports_styled_tokens_missing_from_the_reference():
+    page_type = guide_generator.page_type({'race_elevation': 0, 'ability_level': 'Intermediate',
+                                           'is_custom_plan': False})
+    assert guide_generator.uncovered_tokens(['plain text', '<p>Body</p>'], page_type) == []
+    assert guide_generator.uncovered_tokens(['<blockquote class="unstyled-class">'], page_type) == ['blockquote']
+
+
+def test_fragments_share_the_race_model_precedence():
+    race = guide_generator.RaceModel({'name': 'Top Name', 'distance_miles': 120,
+                                      'race_metadata': {'name': 'Metadata Name', 'distance_miles': 100,
+                                                        'elevation_feet': 6000}})
+    assert guide_generator.generate_course_description_paragraph(race).startswith(
+        'The Top Name covers 120 miles with 6,000 feet of cumulative elevation gain')
+    assert guide_generator.generate_race_significance_paragraph(race).startswith('Top Name is')
+    assert 'Gear range for climbing' in guide_generator.generate_equipment_checklist(race)
+
+
+def test_embedded_fonts_skip_italic_faces():
+    css = guide_generator.embedded_font_css()
+    assert 'data:font/woff2;base64,' in css
+    assert 'italic' not in css
+
+
+def test_critical_css_is_a_small_fraction_of_the_brand_css():
+    critical = guide_generator.critical_css()
+    assert len(critical) < len(guide_generator.load_brand_css(guide_generator.FONT_ASSETS_DIR_NAME)) / 3
+    assert '.guide-header' in critical and '.gg-guide-toc' in critical
+    assert 'italic' not in critical
+
+
+def test_above_the_fold_stops_at_the_first_conditional_block_of_section_1():
+    page = ('<head><style>table{}</style></head><body><header></header><nav><!-- START TOC --></nav>'
+            '<section id="section-1"><p>Intro</p><!-- START BLOCK --><table></table></section>'
+            '<section id="section-2"></section>')
+    assert guide_generator.above_the_fold(page) == (
+        '<body><header></header><nav><!-- START TOC --></nav><section id="section-1"><p>Intro</p>')
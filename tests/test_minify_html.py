@@ -0,0 +1,85 @@
+from generators.minify_html import minify_css, minify_html, minify_js
+
+
+def test_collapses_whitespace_between_blocks_and_in_text():
+    html = '<div>\n  <p>Hello   \n   world</p>\n</div>\n'
+    assert minify_html(html) == '<div><p>Hello world</p></div>'
+
+
+def test_keeps_inline_whitespace_between_inline_tags():
+    assert minify_html('<p><b>a</b> <i>b</i></p>') == '<p><b>a</b> <i>b</i></p>'
+
+
+def test_keeps_non_breaking_space():
+    assert minify_html('<p>a  b</p>') == '<p>a  b</p>'
+
+
+def test_strips_comments_but_keeps_conditional_comments():
+    html = '<div><!-- START HERO --><p>x</p><!-- END HERO --><!--[if IE]><p>ie</p><![endif]--></div>'
+    assert minify_html(html) == '<div><p>x</p><!--[if IE]><p>ie</p><![endif]--></div>'
+
+
+def test_pre_and_textarea_are_verbatim():
+    pre = '<pre class="code">  line 1\n\n    line   2 <!-- kept --> \n</pre>'
+    textarea = '<textarea name="notes">\n  keep   this\n</textarea>'
+    assert minify_html(f'<div>\n  {pre}\n</div>') == f'<div>{pre}</div>'
+    assert minify_html(f'<p>Notes: {textarea}</p>') == f'<p>Notes: {textarea}</p>'
+
+
+def test_raw_text_markup_is_not_parsed():
+    html = '<script>\n  if (a < b && c > d) { el.innerHTML = "<p>  x  </p><!-- y -->"; }\n</script>'
+    assert minify_html(html) == '<script>if (a < b && c > d) { el.innerHTML = "<p>  x  </p><!-- y -->"; }</script>'
+
+
+def test_style_body_is_minified_but_strings_kept():
+    html = '<style>\n  .a  >  .b { content: "  x ;  } "; }\n  /* note */\n</style>'
+    assert minify_html(html) == '<style>.a>.b{content:"  x ;  } "}</style>'
+
+
+def test_attribute_values_containing_gt():
+    html = '<div title="a > b" data-rule=\'x>y\'>\n  <p>text</p>\n</div>'
+    assert minify_html(html) == '<div title="a > b" data-rule=\'x>y\'><p>text</p></div>'
+
+
+def test_attribute_value_containing_gt_on_raw_element():
+    html = '<script data-when="a>b">\n  // note\n  run();\n</script>'
+    assert minify_html(html) == '<script data-when="a>b">run();</script>'
+
+
+def test_lone_less_than_in_text_is_text():
+    assert minify_html('<p>1 <  2   and 3 > 2</p>') == '<p>1 < 2 and 3 > 2</p>'
+
+
+def test_json_script_is_compacted():
+    html = '<script type="application/ld+json">\n{ "a": [1, 2],\n  "b": "c d" }\n</script>'
+    assert minify_html(html) == '<script type="application/ld+json">{"a":[1,2],"b":"c d"}</script>'
+
+
+def test_non_javascript_script_is_untouched():
+    html = '<script type="text/template">\n  <p>  x  </p>\n</script>'
+    assert minify_html(html) == html
+
+
+def test_minify_js_drops_indentation_blank_lines_and_line_comments():
+    js = '\n  // setup\n  var a = 1;\n\n  var b = 2;  \n'
+    assert minify_js(js) == 'var a = 1;\nvar b = 2;'
+
+
+def test_minify_js_keeps_urls_and_trailing_comments():
+    js = '  var url = "https://example.com//path";\n  fetch(url); // go\n  //done'
+    assert minify_js(js) == 'var url = "https://example.com//path";\nfetch(url); // go'
+
+
+def test_minify_js_keeps_line_structure_for_semicolon_insertion():
+    js = 'var a = 1\n  (function () {})()'
+    assert minify_js(js) == 'var a = 1\n(function () {})()'
+
+
+def test_minify_js_skips_template_literals():
+    js = '\n  const html = `\n    // not a comment\n\n    <p>x</p>`;\n'
+    assert minify_js(js) == js.strip()
+
+
+def test_minify_css_keeps_strings_and_drops_comments():
+    css = '/* head */ a::before { content: "/* not */"; margin : 0 ; }'
+    assert minify_css(css) == 'a::before{content:"/* not */";margin :0}'
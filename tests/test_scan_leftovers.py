@@ -0,0 +1,28 @@
+import guide_generator as root_generator
+from generators.scan_leftovers import scan_page
+
+PAGE = '<section id="section-1"><h2>Key workouts</h2><p>{{KEY_WORKOUT_1_NAME}}: {{KEY_WORKOUT_1_PURPOSE}}</p></section>'
+
+
+def test_page_with_missing_workout_fails_the_scan():
+    unresolved = []
+    html = root_generator.replace_variables(PAGE, {'key_workouts': []}, unresolved)
+    assert unresolved == ['KEY_WORKOUT_1_NAME', 'KEY_WORKOUT_1_PURPOSE']
+    assert scan_page(html)['placeholders'] == {'KEY_WORKOUT_1_NAME': 1, 'KEY_WORKOUT_1_PURPOSE': 1}
+
+
+def test_page_with_workout_passes_the_scan():
+    race_data = {'key_workouts': [{'name': 'Over-unders', 'purpose': 'Threshold'}]}
+    html = root_generator.replace_variables(PAGE, race_data)
+    assert 'Over-unders: Threshold' in html
+    assert scan_page(html)['placeholders'] == {}
+
+
+def test_single_brace_placeholders_are_leftovers():
+    html = '<p>{KEY_WORKOUT_2_NAME} and {{ RACE_NAME }}</p>'
+    assert scan_page(html)['placeholders'] == {'KEY_WORKOUT_2_NAME': 1, 'RACE_NAME': 1}
+
+
+def test_css_and_script_braces_are_not_leftovers():
+    html = '<style>.a{color:red}@media print{.b{x:1}}</style><script>if (x) {RETURN_VALUE()}; f({a_b})</script>'
+    assert scan_page(html)['placeholders'] == {}
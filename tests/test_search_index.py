@@ -0,0 +1,17 @@
+from generators import search_index
+
+
+def test_hot_prefixes_split_without_dropping_postings(monkeypatch):
+    monkeypatch.setattr(search_index, 'MAX_SHARD_BYTES', 40)
+    postings = {term: [[doc, 1, 0] for doc in range(3)] for term in ('rac', 'race', 'racing', 'raft', 'zone')}
+    shards, split = search_index.shard_terms(postings)
+    assert split == {'rac': 'ei'}
+    assert shards['rac'] == {'rac': postings['rac']}
+    assert shards['race'] == {'race': postings['race']}
+    assert shards['raci'] == {'racing': postings['racing']}
+    assert shards['zon'] == {'zone': postings['zone']}
+    assert sum(len(terms) for terms in shards.values()) == len(postings)
+
+
+def test_tokenize_drops_stopwords():
+    assert search_index.tokenize('The heat of the race') == ['heat', 'race']